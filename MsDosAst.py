@@ -0,0 +1,383 @@
+
+from dataclasses import dataclass
+
+# --- Nodes ---
+
+@dataclass(slots=True)
+class Program:
+    statements: list
+
+@dataclass(slots=True)
+class Label:
+    name: str                   # Including the trailing "+" (e.g. "LABEL+")
+
+@dataclass(slots=True)
+class Rem:
+    comment: str
+
+@dataclass(slots=True)
+class ErrorLine:
+    text: str                   # Raw text of a top-level statement skipped by MsDosResilientParser
+    line: int
+    column: int
+
+# Statements
+
+@dataclass(slots=True)
+class If:
+    test: object                # CompareTest, ExistTest, DefinedTest or ErrorLevelTest
+    then: object
+    else_: object = None        # Command, or If for "else if"
+
+@dataclass(slots=True)
+class CompareTest:
+    left: str
+    op: str                     # "==", "EQU", "NEQ", "LSS", "LEQ", "GTR" or "GEQ"
+    right: str
+    ignore_case: bool = False
+    negate: bool = False
+
+@dataclass(slots=True)
+class ExistTest:
+    path: str
+    negate: bool = False
+
+@dataclass(slots=True)
+class DefinedTest:
+    name: str
+    negate: bool = False
+
+@dataclass(slots=True)
+class ErrorLevelTest:
+    level: int
+    negate: bool = False
+
+@dataclass(slots=True)
+class ForF:
+    options: str                # e.g. '"delims= "' (None if omitted)
+    variable: str               # e.g. "%%i"
+    source_kind: str            # "command", "text" or "filename"
+    source: str
+    body: object
+
+@dataclass(slots=True)
+class ForR:
+    root: str                   # None if omitted
+    variable: str
+    items: str
+    body: object
+
+@dataclass(slots=True)
+class ForL:
+    variable: str
+    start: str
+    step: str
+    end: str
+    body: object
+
+@dataclass(slots=True)
+class ForD:
+    recursive: bool
+    variable: str
+    items: str
+    body: object
+
+@dataclass(slots=True)
+class For:
+    variable: str
+    items: str
+    body: object
+
+# Command lines
+
+@dataclass(slots=True)
+class Chain:
+    commands: list
+    operators: list             # "&&", "||" or "&" between the commands
+
+@dataclass(slots=True)
+class Pipeline:
+    commands: list
+
+@dataclass(slots=True)
+class Group:
+    body: list
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class Redirect:
+    stream: int                 # 1 (stdout) or 2 (stderr)
+    append: bool
+    target: str
+
+# Commands
+
+@dataclass(slots=True)
+class Set:
+    name: str
+    value: str
+    prompt: bool = False        # SET /P
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class SetExpr:
+    name: str
+    expression: str
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class SetDisplay:
+    prefix: str                 # None if omitted
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class SetLocal:
+    args: str
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class Echo:
+    message: str                # None for ECHO without arguments, "" for ECHO.
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class CallLabel:
+    label: str
+    args: str = None
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class CallFile:
+    path: str
+    args: str = None
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class ChangeDir:
+    path: str = None
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class Goto:
+    label: str
+    redirects: tuple = ()
+
+@dataclass(slots=True)
+class Exe:
+    path: str
+    args: str = None
+    redirects: tuple = ()
+
+
+# --- Builder ---
+
+WHITESPACE_TOKENS = frozenset(['WS', 'WS_INLINE', 'WS_INLINE_ONCE', 'NL'])
+
+def _items(children):
+    """Drops whitespace tokens and empty lines."""
+    return [child for child in children if child is not None and getattr(child, 'type', None) not in WHITESPACE_TOKENS]
+
+def _optional_value(items, index, type_name):
+    """Returns items[index] as str if it is a token of the given type, otherwise None."""
+    if len(items) > index and getattr(items[index], 'type', None) == type_name:
+        return str(items[index])
+    return None
+
+class AstBuilder:
+    """
+    Inline transformer that builds the AST nodes above while the LALR parser reduces each rule,
+    without creating lark Trees. Use it through MsDosCommandParser(ast=True).
+    """
+
+    # Program
+
+    def program(self, children):
+        return Program(_items(children))
+
+    def subprogram(self, children):
+        return _items(children)
+
+    def emptyline(self, children):
+        return None
+
+    def error_line(self, children):
+        token = children[0]
+        return ErrorLine(str(token), token.line, token.column)
+
+    def label(self, children):
+        items = _items(children)
+        return Label(''.join(str(item) for item in items[1:]))
+
+    def command_rem(self, children):
+        items = _items(children)
+        return Rem(_optional_value(items, len(items) - 1, 'REM_COMMENT') or '')
+
+    # IF statement
+
+    def statement_if(self, children):
+        items = _items(children)
+        return If(items[1], items[2], items[3] if len(items) > 3 else None)
+
+    def statement_else(self, children):
+        return _items(children)[1]
+
+    def _compare_test(self, children, negate):
+        items = _items(children)
+        ignore_case = getattr(items[0], 'type', None) == 'OPTION_I'
+        left, op, right = [str(item) for item in items if item.type not in ('OPTION_I', 'NOT')]
+        return CompareTest(left, op, right, ignore_case, negate)
+
+    def test_comp(self, children):
+        return self._compare_test(children, False)
+
+    def test_not_comp(self, children):
+        return self._compare_test(children, True)
+
+    def test_exist(self, children):
+        return ExistTest(str(_items(children)[-1]))
+
+    def test_not_exist(self, children):
+        return ExistTest(str(_items(children)[-1]), negate=True)
+
+    def test_defined(self, children):
+        return DefinedTest(str(_items(children)[-1]))
+
+    def test_not_defined(self, children):
+        return DefinedTest(str(_items(children)[-1]), negate=True)
+
+    def test_errorlevel(self, children):
+        return ErrorLevelTest(int(_items(children)[-1]))
+
+    def test_not_errorlevel(self, children):
+        return ErrorLevelTest(int(_items(children)[-1]), negate=True)
+
+    # FOR statement
+    #   items: FOR [options...] variable IN ( range ) DO body
+
+    def _for_items(self, children):
+        items = _items(children)
+        options = items[1:-7]
+        variable, source, body = items[-7], items[-4], items[-1]
+        return options, variable, source, body
+
+    def statement_for_f(self, children):
+        options, variable, (source_kind, source), body = self._for_items(children)
+        return ForF(_optional_value(options, 1, 'OPTIONS'), variable, source_kind, source, body)
+
+    def statement_for_r(self, children):
+        options, variable, (_, items), body = self._for_items(children)
+        return ForR(_optional_value(options, 1, 'FILEPATH'), variable, items, body)
+
+    def statement_for_l(self, children):
+        _, variable, (start, step, end), body = self._for_items(children)
+        return ForL(variable, start, step, end, body)
+
+    def statement_for_d(self, children):
+        options, variable, items, body = self._for_items(children)
+        return ForD(_optional_value(options, 1, 'OPTION_R') is not None, variable, items, body)
+
+    def statement_for_none(self, children):
+        _, variable, items, body = self._for_items(children)
+        return For(variable, items, body)
+
+    def for_parameter(self, children):
+        return ''.join(str(child) for child in children)
+
+    def for_range_command(self, children):
+        return ('command', str(children[0]))
+
+    def for_range_text(self, children):
+        return ('text', str(children[0]))
+
+    def for_range_filename(self, children):
+        return ('filename', str(children[0]))
+
+    def for_range_set(self, children):
+        return str(children[0])
+
+    def for_range_start_step_end(self, children):
+        return tuple(children[0::2])
+
+    def for_range_start(self, children):
+        return str(children[0])
+
+    for_range_step = for_range_start
+    for_range_end = for_range_start
+
+    # Command lines
+
+    def command_line(self, children):
+        items = _items(children)
+        return Chain(items[0::2], [str(item) for item in items[1::2]])
+
+    subcommand_line = command_line
+
+    def pipeline(self, children):
+        return Pipeline(_items(children)[0::2])
+
+    subpipeline = pipeline
+
+    def group(self, children):
+        items = _items(children)
+        return Group(items[1], tuple(items[3:]))
+
+    def command_oneline(self, children):
+        items = _items(children)
+        command = [item for item in items if not isinstance(item, Redirect)][0]
+        command.redirects = tuple(item for item in items if isinstance(item, Redirect))
+        return command
+
+    subcommand_oneline = command_oneline
+
+    def redirect_stdout(self, children):
+        items = _items(children)
+        return Redirect(1, str(items[0]).endswith('>>'), str(items[1]))
+
+    def redirect_stderr(self, children):
+        items = _items(children)
+        return Redirect(2, str(items[0]).endswith('>>'), str(items[1]))
+
+    # Commands
+
+    def command_set(self, children):
+        items = _items(children)
+        prompt = items[1].type == 'OPTION_P'
+        if prompt:
+            del items[1]
+        return Set(str(items[1]), str(items[3]) if len(items) > 3 else '', prompt)
+
+    def command_set_expr(self, children):
+        items = _items(children)
+        return SetExpr(str(items[2]), str(items[4]) if len(items) > 4 else '')
+
+    def command_set_disp(self, children):
+        items = _items(children)
+        return SetDisplay(str(items[1]) if len(items) > 1 else None)
+
+    def command_setlocal(self, children):
+        return SetLocal(str(_items(children)[1]))
+
+    def command_echo(self, children):
+        items = _items(children)
+        if items[0].type == 'ECHODOT':
+            return Echo('')
+        return Echo(str(items[1]) if len(items) > 1 else None)
+
+    def command_call_label(self, children):
+        items = _items(children)
+        return CallLabel(items[1].name, str(items[2]) if len(items) > 2 else None)
+
+    def command_call_file(self, children):
+        items = _items(children)
+        return CallFile(str(items[1]), str(items[2]) if len(items) > 2 else None)
+
+    def command_cd(self, children):
+        items = _items(children)
+        return ChangeDir(str(items[1]) if len(items) > 1 else None)
+
+    def command_goto(self, children):
+        return Goto(str(_items(children)[-1]))
+
+    def command_exe(self, children):
+        items = _items(children)
+        return Exe(str(items[0]), str(items[1]) if len(items) > 1 else None)
@@ -0,0 +1,163 @@
+
+import asyncio
+import concurrent.futures
+import os
+from MsDosCommandParser import MsDosCommandParser
+from MsDosParallelParser import ParseResult, expand_paths
+from MsDosParseLimits import LimitedParser
+
+class ParseError(Exception):
+    """
+    Error of a parse run in the executor. The errors of lark hold the parser and cannot be pickled,
+    so they are sent back from the worker process as this exception.
+    error_type: name of the original exception class (e.g. 'UnexpectedToken', 'ParseLimitError').
+    line, column: position of the error in the script (1-based), None when unknown.
+    """
+
+    def __init__(self, error_type, message, line=None, column=None):
+        super().__init__(error_type, message, line, column)
+        self.error_type = error_type
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def __str__(self):
+        return '%s: %s' % (self.error_type, self.message)
+
+def _parse_text(parser_kwargs, limits, handler, inputfile_text):
+    """
+    Parses a text in a worker thread or process, with the parser shared by that process.
+    Returns (tree, None), or (None, ParseError) when the text cannot be parsed.
+    """
+    try:
+        parser = MsDosCommandParser(**parser_kwargs).get_parser()
+        if limits:
+            parser = LimitedParser(parser, **limits)
+        tree = parser.parse(inputfile_text)
+        if handler is not None:
+            tree = handler(tree)
+        return tree, None
+    except Exception as e:
+        return None, ParseError(type(e).__name__, str(e), getattr(e, 'line', None), getattr(e, 'column', None))
+
+def _read_file(path):
+    with open(path, 'r', encoding='utf-8') as a_file:
+        return a_file.read()
+
+class AsyncParser:
+    """
+    Parses scripts from asyncio code without blocking the event loop.
+    The files are read in a thread of the event loop, the parsing runs in the executor,
+    and at most max_concurrency files are read or parsed at once (the others wait for their turn).
+
+        async with AsyncParser(max_concurrency=8) as parser:
+            tree = await parser.parse(inputfile_text)
+            async for result in parser.parse_files(['./scripts']):
+                print(result.path, result.error)
+
+    parser_kwargs: arguments of MsDosCommandParser().
+    executor: concurrent.futures executor to parse in (None: a ProcessPoolExecutor owned by the AsyncParser,
+              shut down by close()). With a ProcessPoolExecutor, handler and the trees must be picklable.
+    max_concurrency: largest number of files being read or parsed at once, shared by all the calls.
+    handler: function applied to each tree in the executor (e.g. to convert it to a string).
+    limits: arguments of LimitedParser() (max_bytes, max_line_length, max_depth, timeout) for untrusted files.
+    """
+
+    def __init__(self, parser_kwargs=None, executor=None, max_concurrency=None, handler=None, limits=None):
+        self.parser_kwargs = parser_kwargs or {}
+        self.executor = executor
+        self.own_executor = executor is None
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.handler = handler
+        self.limits = limits
+        # Created on first use, in the running event loop
+        self.semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Shuts down the executor created by the AsyncParser (not the one given to it)."""
+        if self.own_executor and self.executor is not None:
+            executor = self.executor
+            self.executor = None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_concurrency)
+        return self.executor
+
+    def get_semaphore(self):
+        if self.semaphore is None:
+            self.semaphore = asyncio.BoundedSemaphore(self.max_concurrency)
+        return self.semaphore
+
+    async def parse(self, inputfile_text):
+        """Parses a text in the executor and returns its tree, or raises ParseError."""
+        async with self.get_semaphore():
+            return await self.run_parser(inputfile_text)
+
+    async def parse_file(self, path):
+        """Reads and parses a file, and returns its ParseResult."""
+        async with self.get_semaphore():
+            loop = asyncio.get_running_loop()
+            try:
+                inputfile_text = await loop.run_in_executor(None, _read_file, path)
+                tree = await self.run_parser(inputfile_text)
+                return ParseResult(path, tree, None)
+            except ParseError as e:
+                return ParseResult(path, None, str(e))
+            except Exception as e:
+                return ParseResult(path, None, '%s: %s' % (type(e).__name__, e))
+
+    async def run_parser(self, inputfile_text):
+        loop = asyncio.get_running_loop()
+        tree, error = await loop.run_in_executor(self.get_executor(), _parse_text,
+                                                 self.parser_kwargs, self.limits, self.handler, inputfile_text)
+        if error is not None:
+            raise error
+        return tree
+
+    async def parse_files(self, paths, ordered=False):
+        """
+        Parses the files and yields a ParseResult for each file as soon as it is done.
+
+        paths: file paths, directories (searched for *.cmd and *.bat) or glob patterns.
+        ordered: yield the results in input order instead of completion order.
+        """
+        loop = asyncio.get_running_loop()
+        # Searching the directories blocks too
+        filepaths = await loop.run_in_executor(None, lambda: list(expand_paths(paths)))
+        # Only a few files are in flight at once, so that finished trees do not pile up in memory
+        max_pending = self.max_concurrency * 2
+        pending = []
+        try:
+            for path in filepaths:
+                pending.append(asyncio.ensure_future(self.parse_file(path)))
+                if len(pending) >= max_pending:
+                    for result in await self._collect(pending, ordered):
+                        yield result
+            while pending:
+                for result in await self._collect(pending, ordered):
+                    yield result
+        finally:
+            # The consumer stopped early: do not parse the remaining files
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def _collect(pending, ordered):
+        """Returns at least one finished result and removes it from pending."""
+        if ordered:
+            return [await pending.pop(0)]
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        results = []
+        for task in list(pending):
+            if task in done:
+                pending.remove(task)
+                results.append(task.result())
+        return results
@@ -0,0 +1,245 @@
+
+import json
+import ntpath
+import os
+import posixpath
+import re
+from MsDosCommandParser import MsDosCommandParser
+from MsDosParallelParser import expand_paths, parse_files
+
+# Extensions tried, in this order, for CALL without an extension
+CALL_EXTENSIONS = ('.cmd', '.bat')
+
+# Directory of the running script (%~dp0, %~dps0, %~p0, ...)
+SCRIPT_DIR = re.compile(r'%~[dfs]*p[dfs]*0\\?', re.IGNORECASE)
+# %VAR%, !VAR!, %1, %~n1, ...
+VARIABLE = re.compile(r'%[^%]*%|![^!]*!|%~?[a-z]*[0-9]', re.IGNORECASE)
+
+# Version of the index file format
+INDEX_VERSION = 2
+# Version of extract_script_info(), to be incremented when it extracts other data from the same trees
+EXTRACTOR_VERSION = 1
+
+def extract_call_targets(tree):
+    """Returns the targets of the command_call_file commands of a program Tree as [target, line] lists, in script order."""
+    targets = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.data == 'command_call_file':
+            token = next(child for child in node.children if getattr(child, 'type', None) == 'FILEPATH')
+            targets.append([str(token), token.line])
+        else:
+            stack.extend(child for child in reversed(node.children) if hasattr(child, 'data'))
+    return targets
+
+def extract_script_info(tree):
+    """
+    Returns the CALL targets of a program Tree parsed by ResilientParser, and the error of its invalid statements
+    (None when there is none). The targets of the valid statements are returned even if others are invalid.
+    """
+    lines = sorted(error_line.children[0].line for error_line in tree.find_data('error_line'))
+    if not lines:
+        return extract_call_targets(tree), None
+    error = '%s %s' % ('Syntax error at line' if len(lines) == 1 else 'Syntax errors at lines',
+                       ', '.join(str(line) for line in lines))
+    return extract_call_targets(tree), error
+
+def normalize_call_target(target, script_dir):
+    """
+    Normalizes the literal parts of a CALL target. Returns (path, basename):
+    path is the case-folded path relative to the repository (with /) when the target has no variable, else None;
+    basename is the case-folded file name when it has no variable, else None.
+
+    script_dir: directory of the calling script relative to the repository (with /).
+    """
+    target = target.replace('"', '')
+    # Relative targets are resolved from the directory of the calling script, which %~dp0 also is
+    target = SCRIPT_DIR.sub('', target)
+    target = target.replace('\\', '/')
+    basename = posixpath.basename(target)
+    if VARIABLE.search(basename) or not basename:
+        basename = None
+    else:
+        basename = basename.casefold()
+    if VARIABLE.search(target) or ntpath.isabs(target.replace('/', '\\')):
+        # %BIN_PATH%\tool.cmd or C:\tools\tool.cmd: only the file name can be matched
+        return None, basename
+    path = posixpath.normpath(posixpath.join(script_dir, target)).casefold()
+    return path, basename
+
+class CallGraph:
+    """
+    Graph of the CALL commands between the scripts of a repository, kept up to date by update().
+    Each script is parsed (in parallel) and its command_call_file targets are stored in an index file,
+    so that the next update() only parses the scripts whose size or modification time changed.
+    The scripts are parsed by ResilientParser: the calls of a script with a syntax error are still linked,
+    and the script is reported by errors().
+
+        graph = CallGraph('./scripts', index_path='./.call_graph.json')
+        graph.update()
+        graph.callers('bin/MyProcess.cmd')      # Scripts that call bin/MyProcess.cmd
+        graph.reachable('main.cmd')             # Scripts run by main.cmd, directly or not
+
+    The targets are matched to the scripts by their path relative to the calling script, or by their
+    file name when the directory is a variable (%BIN_PATH%\\MyProcess.cmd), case-insensitively.
+    A file name shared by several scripts links to all of them.
+
+    root: directory of the repository. The scripts are named by their path relative to it, with /.
+    index_path: file to store the index in (None: not stored).
+    jobs, parser_kwargs: arguments of parse_files(). The targets are read from lark Trees parsed with the error
+                         recovery of lark, so ast and standalone are not supported, and drop_whitespace is always on.
+    """
+
+    def __init__(self, root, index_path=None, jobs=None, parser_kwargs=None):
+        self.root = root
+        self.index_path = index_path
+        self.jobs = jobs
+        self.parser_kwargs = dict(parser_kwargs or {})
+        for option in ('ast', 'standalone'):
+            if self.parser_kwargs.get(option):
+                raise ValueError('CallGraph cannot parse with %s=True' % option)
+        self.parser_kwargs['drop_whitespace'] = True
+        self.parser_kwargs['error_recovery'] = True
+        transpiler = MsDosCommandParser(**self.parser_kwargs)
+        # The index is stale when the grammar, the parser options or the extracted data change
+        self.fingerprint = '%s-%d' % (transpiler.get_fingerprint(transpiler.read_grammar()), EXTRACTOR_VERSION)
+        # Script: {'mtime_ns', 'size', 'calls': [[target, line], ...], 'error'}
+        self.scripts = {}
+        self.edges = {}             # Script: set of the called scripts
+        self.reverse_edges = {}     # Script: set of the calling scripts
+        self.unresolved_calls = []  # (script, target, line)
+        self.names = {}             # Case-folded name: name
+        self.load()
+
+    def load(self):
+        """Reads the index file. An index of another format or grammar is ignored."""
+        if self.index_path is None or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as a_file:
+                data = json.load(a_file)
+        except (OSError, ValueError):
+            return  # Broken file, index again
+        if data.get('version') == INDEX_VERSION and data.get('fingerprint') == self.fingerprint:
+            self.scripts = data['scripts']
+            self.build_edges()
+
+    def save(self):
+        if self.index_path is None:
+            return
+        data = {'version': INDEX_VERSION, 'fingerprint': self.fingerprint, 'scripts': self.scripts}
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = '%s.%d.tmp' % (self.index_path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as a_file:
+            json.dump(data, a_file, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def update(self):
+        """
+        Parses the new and changed scripts, forgets the removed ones, rebuilds the edges and saves the index.
+        Returns the list of the scripts that were parsed.
+        """
+        stats = {}
+        for path in expand_paths([self.root]):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[self.get_relative_name(path)] = (stat.st_mtime_ns, stat.st_size)
+
+        changed = [name for name, (mtime_ns, size) in stats.items()
+                   if name not in self.scripts
+                   or (self.scripts[name]['mtime_ns'], self.scripts[name]['size']) != (mtime_ns, size)]
+        for name in set(self.scripts) - set(stats):
+            del self.scripts[name]
+        if changed:
+            paths = [os.path.join(self.root, *name.split('/')) for name in changed]
+            for result in parse_files(paths, jobs=self.jobs, parser_kwargs=self.parser_kwargs,
+                                      handler=extract_script_info, resilient=True):
+                name = self.get_relative_name(result.path)
+                mtime_ns, size = stats[name]
+                calls, error = result.tree or ([], result.error)
+                self.scripts[name] = {'mtime_ns': mtime_ns, 'size': size, 'calls': calls, 'error': error}
+        self.build_edges()
+        self.save()
+        return sorted(changed)
+
+    def build_edges(self):
+        """Matches the CALL targets of all the scripts to the scripts, in time linear in the number of calls."""
+        by_path = self.names = {}
+        by_basename = {}
+        for name in self.scripts:
+            by_path[name.casefold()] = name
+            by_basename.setdefault(posixpath.basename(name).casefold(), []).append(name)
+
+        self.edges = {name: set() for name in self.scripts}
+        self.reverse_edges = {name: set() for name in self.scripts}
+        self.unresolved_calls = []
+        for name, script in self.scripts.items():
+            script_dir = posixpath.dirname(name)
+            for target, line in script['calls']:
+                callees = self.match_target(target, script_dir, by_path, by_basename)
+                if not callees:
+                    self.unresolved_calls.append((name, target, line))
+                for callee in callees:
+                    self.edges[name].add(callee)
+                    self.reverse_edges[callee].add(name)
+
+    @staticmethod
+    def match_target(target, script_dir, by_path, by_basename):
+        path, basename = normalize_call_target(target, script_dir)
+        suffixes = ('',) if posixpath.splitext(basename or path or '')[1] else CALL_EXTENSIONS
+        if path is not None:
+            for suffix in suffixes:
+                if path + suffix in by_path:
+                    return [by_path[path + suffix]]
+        if basename is not None:
+            for suffix in suffixes:
+                if basename + suffix in by_basename:
+                    return by_basename[basename + suffix]
+        return []
+
+    def get_relative_name(self, path):
+        """Returns the path relative to root, with /."""
+        root = os.path.normpath(self.root)
+        path = os.path.normpath(path)
+        if os.path.isabs(path) or path.startswith(root + os.sep):
+            path = os.path.relpath(path, root)
+        return path.replace(os.sep, '/')
+
+    def get_name(self, path):
+        """Returns the name of a script from its path or its name, case-insensitively like the paths of Windows."""
+        name = self.get_relative_name(path)
+        return self.names.get(name.casefold(), name)
+
+    def callees(self, path):
+        """Returns the scripts called by a script."""
+        return sorted(self.edges.get(self.get_name(path), ()))
+
+    def callers(self, path):
+        """Returns the scripts that call a script."""
+        return sorted(self.reverse_edges.get(self.get_name(path), ()))
+
+    def reachable(self, path):
+        """Returns the scripts that a script calls directly or through other scripts (without itself)."""
+        start = self.get_name(path)
+        seen = {start}
+        stack = [start]
+        while stack:
+            for callee in self.edges.get(stack.pop(), ()):
+                if callee not in seen:
+                    seen.add(callee)
+                    stack.append(callee)
+        seen.discard(start)
+        return sorted(seen)
+
+    def unresolved(self):
+        """Returns the CALL targets that match no script, as (script, target, line)."""
+        return sorted(self.unresolved_calls)
+
+    def errors(self):
+        """Returns the scripts that could not be read or that have syntax errors, with their error."""
+        return {name: script['error'] for name, script in self.scripts.items() if script['error']}
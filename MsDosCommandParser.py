@@ -1,16 +1,227 @@
 
-from lark import Lark  # pip install lark-parser regex
+import hashlib
+import importlib
+import os
+import pickle
+import sys
+import threading
+import warnings
+from functools import partial
+
+# Parsers shared by the whole process, keyed by the grammar path and the parser options
+_parsers = {}
+_parsers_lock = threading.Lock()
 
 class MsDosCommandParser:
 
+    grammar_path = './grammar.lark'
+    # Rules of the error recovery of MsDosResilientParser, appended to the grammar with error_recovery=True
+    recovery_grammar_path = './grammar_recovery.lark'
+    parser_options = {'parser': 'lalr', 'regex': True}
+
+    # Module generated from grammar.lark by build_standalone.py
+    standalone_module = 'msdos_parser_standalone'
+
+    # Number of times the on-disk parser cache was used (hit) or rebuilt (miss)
+    cache_stats = {'hits': 0, 'misses': 0}
+
+    def __init__(self, cache_dir=None, standalone=False, drop_whitespace=False, ast=False, profile=False,
+                 comment_fast_path=False, error_recovery=False):
+        """
+        cache_dir: directory to store the compiled parser in (None disables the cache).
+        standalone: use the generated standalone parser module when it is present.
+        drop_whitespace: leave the WS, WS_INLINE, WS_INLINE_ONCE and NL tokens and the emptyline nodes out of the tree.
+        ast: make parse() return the MsDosAst nodes instead of a lark Tree.
+        profile: record the time spent in each terminal and rule into parser.profile (MsDosParserProfile).
+        comment_fast_path: lex the whole REM and :: comment lines with one regular expression (MsDosCommentLexer).
+        error_recovery: add the error_line rule used by MsDosResilientParser to the grammar (not with standalone).
+        """
+        if standalone and error_recovery:
+            raise ValueError('error_recovery needs lark (the standalone module cannot recover from errors)')
+        self.cache_dir = cache_dir
+        self.standalone = standalone
+        self.drop_whitespace = drop_whitespace
+        self.ast = ast
+        self.profile = profile
+        self.comment_fast_path = comment_fast_path
+        self.error_recovery = error_recovery
+
     def get_parser(self):
+        """Returns the parser shared by the process, creating it on the first call."""
+        key = self.get_parser_key()
+        parser = _parsers.get(key)
+        if parser is None:
+            with _parsers_lock:
+                # Another thread may have built the parser while we were waiting
+                parser = _parsers.get(key)
+                if parser is None:
+                    parser = self.build_parser()
+                    _parsers[key] = parser
+        return parser
+
+    def get_parser_key(self):
+        """Returns the key identifying the parser in the shared registry."""
+        # The cache directory is part of the key, so that a parser given a cache_dir always saves to it
+        cache_dir = os.path.abspath(self.cache_dir) if self.cache_dir is not None else None
+        return (os.path.abspath(self.grammar_path), cache_dir) + self.get_options_key()
+
+    def get_options_key(self):
+        """Returns the options that change what the parser accepts or returns."""
+        return (tuple(sorted(self.parser_options.items())), self.standalone, self.drop_whitespace, self.ast,
+                self.profile, self.comment_fast_path, self.error_recovery)
+
+    @staticmethod
+    def clear_parsers():
+        """Discards the shared parsers (e.g. after editing the grammar)."""
+        with _parsers_lock:
+            _parsers.clear()
+
+    def read_grammar(self):
+        """Reads the grammar definition file (and the error recovery rules with error_recovery)."""
+        with open(self.grammar_path, 'r', encoding='utf-8') as a_file:
+            grammar_text = ''.join([line for line in a_file])
+        if self.error_recovery:
+            with open(self.recovery_grammar_path, 'r', encoding='utf-8') as a_file:
+                grammar_text += '\n' + a_file.read()
+        return grammar_text
+
+    def build_parser(self):
         """Reads the grammar definition file and creates a parser."""
+        parser = self.create_parser()
+        if self.comment_fast_path:
+            from MsDosCommentLexer import CommentLexer
+            CommentLexer.install(parser)
+        if self.profile:
+            from MsDosParserProfile import ParserProfile
+            parser.profile = ParserProfile().install(parser)
+        return parser
+
+    def create_parser(self):
+        """Creates a parser from the standalone module, the cache or the grammar definition file."""
 
         # Load grammar
-        grammar_main = ""
-        with open('./grammar.lark', 'r', encoding='utf-8') as a_file:
-            grammar_main = ''.join([line for line in a_file])
+        grammar_main = self.read_grammar()
+
+        if self.standalone:
+            module = self.load_standalone_module(grammar_main)
+            if module is not None:
+                return module.Lark_StandAlone(**self.get_load_options(module.Tree))
+
+        from lark import Lark, Tree  # pip install lark-parser regex
+        load_options = self.get_load_options(Tree)
+
+        if self.cache_dir is None:
+            # Create parser
+            parser = Lark(grammar_main, **self.parser_options, **load_options)
+            return parser
 
-        # Create parser
-        parser = Lark(grammar_main, parser='lalr', regex=True)
+        # Load the compiled parser from the cache when the grammar is unchanged
+        cache_path = self.get_cache_path(grammar_main)
+        if os.path.exists(cache_path):
+            try:
+                parser = self.load_cached_parser(cache_path, load_options)
+                MsDosCommandParser.cache_stats['hits'] += 1
+                return parser
+            except Exception:
+                pass  # Broken cache file, rebuild it below
+
+        # Create parser and store it into the cache
+        MsDosCommandParser.cache_stats['misses'] += 1
+        parser = Lark(grammar_main, **self.parser_options)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        with open(tmp_path, 'wb') as a_file:
+            self.save_parser(parser, a_file)
+        os.replace(tmp_path, cache_path)
+        if load_options:
+            # The cache holds the parser without the load options, so read it back with them
+            parser = self.load_cached_parser(cache_path, load_options)
         return parser
+
+    def get_load_options(self, tree_class):
+        """Returns the Lark options that can also be given when loading a parser from the cache or the standalone module."""
+        load_options = {}
+        if self.ast:
+            from MsDosAst import AstBuilder
+            load_options['transformer'] = AstBuilder()
+        elif self.drop_whitespace:
+            load_options['transformer'] = WhitespaceFilter(tree_class)
+        return load_options
+
+    @staticmethod
+    def load_cached_parser(cache_path, load_options):
+        """Loads a parser saved by save_parser()."""
+        from lark import Lark
+        with open(cache_path, 'rb') as a_file:
+            # Unlike Lark.load(), Lark._load() accepts the load options
+            # (a private API, which is why requirements.txt pins lark-parser)
+            return Lark.__new__(Lark)._load(a_file, **load_options)
+
+    def load_standalone_module(self, grammar_text):
+        """Imports the generated standalone module, or returns None if it is unusable."""
+        try:
+            module = importlib.import_module(self.standalone_module)
+        except ImportError:
+            return None
+        if getattr(module, 'GRAMMAR_DIGEST', None) != self.get_grammar_digest(grammar_text):
+            warnings.warn("%s is outdated, run build_standalone.py again" % self.standalone_module)
+            return None
+        return module
+
+    def get_grammar_digest(self, grammar_text, *extra):
+        """Returns a hash of the grammar and the parser options (and any extra values)."""
+        key = repr((grammar_text, sorted(self.parser_options.items())) + extra)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get_fingerprint(self, grammar_text):
+        """Returns a hash of the grammar, the parser options, the lark version and the Python version."""
+        import lark
+        return self.get_grammar_digest(grammar_text, lark.__version__, sys.version_info[:2])
+
+    def get_cache_path(self, grammar_text):
+        """Returns the cache file path keyed by the grammar, the lark version and the options."""
+        return os.path.join(self.cache_dir, 'msdos_parser_%s.pickle' % self.get_fingerprint(grammar_text))
+
+    @staticmethod
+    def fix_regexp_widths(parser):
+        """Replaces MAXREPEAT in the regex widths, which cannot be pickled or printed on recent Pythons."""
+        from lark.lexer import PatternRE
+        for terminal in parser.terminals:
+            if isinstance(terminal.pattern, PatternRE):
+                terminal.pattern._width = (int(terminal.pattern.min_width), int(terminal.pattern.max_width))
+
+    @classmethod
+    def save_parser(cls, parser, a_file):
+        """Serializes the parser in the format read by Lark.load()."""
+        from lark.grammar import Rule
+        from lark.lexer import TerminalDef
+        cls.fix_regexp_widths(parser)
+        data, memo = parser.memo_serialize([TerminalDef, Rule])
+        pickle.dump({'data': data, 'memo': memo}, a_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def cache_info(cls):
+        """Returns the number of cache hits and misses in this process."""
+        return dict(cls.cache_stats)
+
+class WhitespaceFilter:
+    """Inline transformer that drops the whitespace tokens and empty lines while the tree is built."""
+
+    whitespace_tokens = frozenset(['WS', 'WS_INLINE', 'WS_INLINE_ONCE', 'NL'])
+
+    def __init__(self, tree_class):
+        self.tree_class = tree_class
+
+    def __getattr__(self, name):
+        # Lark looks up a callback for every rule and terminal name. Only rules (lowercase) get one.
+        if name.startswith('_') or not name.islower():
+            raise AttributeError(name)
+        return partial(self.build_tree, name)
+
+    def build_tree(self, data, children):
+        return self.tree_class(data, [child for child in children if not self.is_whitespace(child)])
+
+    def is_whitespace(self, child):
+        if hasattr(child, 'data'):
+            return child.data == 'emptyline'
+        return child.type in self.whitespace_tokens
@@ -0,0 +1,188 @@
+
+import sys
+import regex  # pip install regex
+
+# Comment line as lexed by grammar.lark: AT* REM (separator REM_COMMENT?)? NL, or COLON COLON REM_COMMENT? NL.
+# REM_COMMENT is the same possessive expression as in the grammar, including the caret line continuation.
+COMMENT_LINE = regex.compile(r'''
+    (?P<AT>@*)
+    (?:
+         (?P<REM>[rR][eE][mM])
+         (?:
+             (?P<SEP>[ \t　:.\-=()])
+             (?P<REM_COMMENT>(?:\^\r?\n|\^|[^\r\n^]++)++)?
+         )?
+        |(?P<COLONS>::)
+         (?P<COLON_COMMENT>(?:\^\r?\n|\^|[^\r\n^]++)++)?
+    )
+    (?P<NL>\r?\n)
+''', regex.VERBOSE)
+
+# Token type of the character after REM
+SEPARATOR_TYPES = {
+    ' ': 'WS_INLINE_ONCE',
+    '\t': 'WS_INLINE_ONCE',
+    '　': 'WS_INLINE_ONCE',
+    ':': 'COLON',
+    '.': 'DOT',
+    '-': 'MINUS',
+    '=': 'EQ',
+    '(': 'PAREN_LEFT',
+    ')': 'PAREN_RIGHT',
+}
+
+# First characters of a comment line
+COMMENT_STARTS = frozenset('@rR:')
+
+# Comment lexed as the (ignored) AT terminal instead of REM_COMMENT: lark gives a match of a regular expression
+# terminal that is equal to a string terminal the type of the string terminal, so "REM:@" is a syntax error.
+AT_COMMENT = '@'
+
+class CommentLexer:
+    """
+    ContextualLexer of lark with a fast path for the comment lines (REM and ::).
+    When the parser is at the beginning of a line and the line is a whole comment, the line is matched
+    by one regular expression instead of running the contextual lexer token by token, and its command_rem
+    node is built by the rule callback and pushed on the parser stacks directly. Only its NL token goes
+    through the parser. The trees (and the transformers) are the same as without the fast path.
+    Use it through MsDosCommandParser(comment_fast_path=True).
+    """
+
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.token_class = sys.modules[type(lexer).__module__].Token
+        # command_rem rules by the types of their tokens, created on the first parse
+        self.comment_rules = None
+
+    def __getattr__(self, name):
+        # lexers, root_lexer, ... of the ContextualLexer
+        return getattr(self.lexer, name)
+
+    @classmethod
+    def install(cls, parser):
+        """Replaces the contextual lexer of a LALR parser (lark.Lark or Lark_StandAlone)."""
+        frontend = parser.parser
+        if not isinstance(frontend.lexer, cls):
+            frontend.lexer = cls(frontend.lexer)
+        return parser
+
+    def make_lexer_state(self, text):
+        return self.lexer.make_lexer_state(text)
+
+    def lex(self, lexer_state, parser_state):
+        text = lexer_state.text
+        line_ctr = lexer_state.line_ctr
+        states = parser_state.parse_conf.states
+        if self.comment_rules is None:
+            self.comment_rules = {tuple(symbol.name for symbol in rule.expansion): rule
+                                  for rule in parser_state.parse_conf.callbacks
+                                  if getattr(rule, 'origin', None) is not None and rule.origin.name == 'command_rem'}
+        shift = sys.modules[type(parser_state).__module__].Shift
+        while True:
+            # Comment lines at the current position, where a command_rem can begin
+            # (at the beginning of a line in program or subprogram)
+            pos = line_ctr.char_pos
+            while text[pos:pos + 1] in COMMENT_STARTS and 'REM' in states[parser_state.position]:
+                match = COMMENT_LINE.match(text, pos)
+                if match is None or (match.group('AT') and not match.group('REM')):
+                    break
+                if AT_COMMENT in (match.group('REM_COMMENT'), match.group('COLON_COMMENT')):
+                    # Left to the contextual lexer, which raises the same error
+                    break
+                tokens = self.comment_tokens(lexer_state, match)
+                self.shift_comment(parser_state, tokens[:-1], shift)
+                yield tokens[-1]
+                pos = line_ctr.char_pos
+            # Run the contextual lexer until the next line that may be a comment
+            for token in self.lexer.lex(lexer_state, parser_state):
+                yield token
+                pos = line_ctr.char_pos
+                if text[pos:pos + 1] in COMMENT_STARTS and text[pos - 1] in '\n \t':
+                    break
+            else:
+                return
+
+    def shift_comment(self, parser_state, tokens, shift):
+        """Does what the LALR parser does when it is fed the tokens of a command_rem (see ParserState.feed_token)."""
+        state_stack = parser_state.state_stack
+        value_stack = parser_state.value_stack
+        states = parser_state.parse_conf.states
+        callbacks = parser_state.parse_conf.callbacks
+
+        # Reductions of the previous line made on the first token
+        first_type = tokens[0].type
+        while True:
+            action, rule = states[state_stack[-1]][first_type]
+            if action is shift:
+                break
+            size = len(rule.expansion)
+            if size:
+                children = value_stack[-size:]
+                del state_stack[-size:]
+                del value_stack[-size:]
+            else:
+                children = []
+            value = callbacks[rule](children)
+            _action, new_state = states[state_stack[-1]][rule.origin.name]
+            state_stack.append(new_state)
+            value_stack.append(value)
+
+        rule = self.comment_rules[tuple([token.type for token in tokens])]
+        children = [callbacks[token.type](token) if token.type in callbacks else token for token in tokens]
+        _action, new_state = states[state_stack[-1]]['command_rem']
+        state_stack.append(new_state)
+        value_stack.append(callbacks[rule](children))
+
+    def comment_tokens(self, lexer_state, match):
+        """
+        Returns the tokens of a comment line matched by COMMENT_LINE, with the positions that
+        TraditionalLexer would give them, and moves the lexer after the line.
+        """
+        Token = self.token_class
+        line_ctr = lexer_state.line_ctr
+        line = line_ctr.line
+        # The tokens follow each other, after the ignored ATs
+        if match.group('REM') is not None:
+            pos = match.start('REM')
+            column = pos - line_ctr.line_start_pos + 1
+            tokens = [Token('REM', match.group('REM'), pos, line, column, line, column + 3, pos + 3)]
+            pos += 3
+            column += 3
+            separator = match.group('SEP')
+            comment = None
+            if separator is not None:
+                tokens.append(Token(SEPARATOR_TYPES[separator], separator, pos, line, column, line, column + 1, pos + 1))
+                pos += 1
+                column += 1
+                comment = match.group('REM_COMMENT')
+        else:
+            pos = match.start('COLONS')
+            column = pos - line_ctr.line_start_pos + 1
+            tokens = [Token('COLON', ':', pos, line, column, line, column + 1, pos + 1),
+                      Token('COLON', ':', pos + 1, line, column + 1, line, column + 2, pos + 2)]
+            pos += 2
+            column += 2
+            comment = match.group('COLON_COMMENT')
+        if comment:
+            end = pos + len(comment)
+            if '\n' in comment:
+                # Caret line continuation
+                end_line = line + comment.count('\n')
+                end_column = end - (pos + comment.rindex('\n') + 1) + 1
+            else:
+                end_line = line
+                end_column = column + len(comment)
+            tokens.append(Token('REM_COMMENT', comment, pos, line, column, end_line, end_column, end))
+            pos = end
+            line = end_line
+            column = end_column
+        newline = match.group('NL')
+        end = pos + len(newline)
+        tokens.append(Token('NL', newline, pos, line, column, line + 1, 1, end))
+
+        line_ctr.char_pos = end
+        line_ctr.line = line + 1
+        line_ctr.line_start_pos = end
+        line_ctr.column = 1
+        lexer_state.last_token = tokens[-1]
+        return tokens
@@ -0,0 +1,274 @@
+
+from array import array
+from MsDosLabelIndex import build_label_index, get_label_name
+
+# Edge kinds
+FLOW = 0    # Next command (including the skipped operand of && and ||, and the branches of IF)
+JUMP = 1    # GOTO to a label (or to EXIT for GOTO :EOF and a missing label)
+CALL = 2    # CALL :label to the subroutine
+LOOP = 3    # End of a FOR body back to the FOR
+
+# Nodes that every graph has
+ENTRY = 0
+EXIT = 1
+
+class ControlFlowGraph:
+    """
+    Control-flow graph of a script, built by build_cfg(). The nodes are integers: ENTRY, EXIT, then one node
+    per command, label, IF, FOR and group in script order. They are stored in arrays, as are the edges
+    (compressed sparse rows: the successors of node n are targets[offsets[n]:offsets[n + 1]]),
+    so large scripts do not need a Python object per node.
+
+    kinds: names of the node kinds; node_kinds[n] is the index of the kind of node n in kinds
+           ('entry', 'exit', 'label', 'command_goto', 'statement_if', 'statement_for_f', 'group', 'command_echo', ...).
+    lines, columns: position of each node in the script (0 for ENTRY and EXIT).
+    statement_indexes: index of the top-level statement (in program.children) of each node (-1 for ENTRY and EXIT).
+    label_names: dict of the label nodes to their names.
+    """
+
+    def __init__(self, kinds, node_kinds, lines, columns, statement_indexes, label_names, sources, targets, edge_kinds):
+        self.kinds = kinds
+        self.node_kinds = node_kinds
+        self.lines = lines
+        self.columns = columns
+        self.statement_indexes = statement_indexes
+        self.label_names = label_names
+        self.offsets, self.targets, self.edge_kinds = _compress(len(node_kinds), sources, targets, edge_kinds)
+        # Predecessors, created on first use
+        self.reverse = None
+
+    def __len__(self):
+        return len(self.node_kinds)
+
+    def kind(self, node):
+        return self.kinds[self.node_kinds[node]]
+
+    def successors(self, node):
+        """Returns the successors of a node as (node, edge kind) pairs."""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return list(zip(self.targets[start:end], self.edge_kinds[start:end]))
+
+    def predecessors(self, node):
+        """Returns the predecessors of a node as (node, edge kind) pairs."""
+        if self.reverse is None:
+            sources = array('l')
+            for node_from in range(len(self)):
+                sources.extend([node_from] * (self.offsets[node_from + 1] - self.offsets[node_from]))
+            self.reverse = _compress(len(self), self.targets, sources, self.edge_kinds)
+        offsets, sources, edge_kinds = self.reverse
+        start, end = offsets[node], offsets[node + 1]
+        return list(zip(sources[start:end], edge_kinds[start:end]))
+
+    def nodes_of_kind(self, kind):
+        """Returns the nodes of a kind (e.g. 'label')."""
+        if kind not in self.kinds:
+            return []
+        code = self.kinds.index(kind)
+        return [node for node, node_kind in enumerate(self.node_kinds) if node_kind == code]
+
+    def reachable(self, start=ENTRY, follow_calls=True):
+        """Returns a bytearray with 1 for each node reachable from start."""
+        offsets = self.offsets
+        targets = self.targets
+        edge_kinds = self.edge_kinds
+        seen = bytearray(len(self))
+        seen[start] = 1
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for i in range(offsets[node], offsets[node + 1]):
+                target = targets[i]
+                if not seen[target] and (follow_calls or edge_kinds[i] != CALL):
+                    seen[target] = 1
+                    stack.append(target)
+        return seen
+
+    def unreachable(self):
+        """Returns the nodes that cannot run (e.g. the commands after GOTO END, and the uncalled subroutines)."""
+        seen = self.reachable()
+        return [node for node in range(2, len(self)) if not seen[node]]
+
+    def uncalled_subroutines(self):
+        """Returns the names of the labels that no GOTO, CALL or fall-through reaches from the beginning."""
+        seen = self.reachable()
+        return [name for node, name in self.label_names.items() if not seen[node]]
+
+def _compress(num_nodes, sources, targets, edge_kinds):
+    """Sorts the edges by source (counting sort) and returns the offsets, targets and edge kinds arrays."""
+    offsets = array('l', bytes(array('l').itemsize * (num_nodes + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for node in range(num_nodes):
+        offsets[node + 1] += offsets[node]
+    positions = array('l', offsets)
+    sorted_targets = array('l', bytes(array('l').itemsize * len(sources)))
+    sorted_kinds = array('B', bytes(len(sources)))
+    for source, target, edge_kind in zip(sources, targets, edge_kinds):
+        i = positions[source]
+        sorted_targets[i] = target
+        sorted_kinds[i] = edge_kind
+        positions[source] += 1
+    return offsets, sorted_targets, sorted_kinds
+
+class _CfgBuilder:
+    """Lowers a program Tree into the arrays of a ControlFlowGraph."""
+
+    def __init__(self):
+        self.kinds = ['entry', 'exit']
+        self.kind_codes = {'entry': 0, 'exit': 1}
+        self.node_kinds = array('H', [0, 1])
+        self.lines = array('l', [0, 0])
+        self.columns = array('l', [0, 0])
+        self.statement_indexes = array('l', [-1, -1])
+        self.label_names = {}
+        self.sources = array('l')
+        self.targets = array('l')
+        self.edge_kinds = array('B')
+        self.statement_index = -1
+        self.label_nodes = {}       # Position of the LABEL token: node
+        self.jumps = []             # (node, edge kind, position of the LABEL token)
+
+    def add_node(self, tree, kind, preds):
+        code = self.kind_codes.get(kind)
+        if code is None:
+            code = self.kind_codes[kind] = len(self.kinds)
+            self.kinds.append(kind)
+        node = len(self.node_kinds)
+        self.node_kinds.append(code)
+        token = _first_token(tree)
+        self.lines.append(token.line if token is not None else 0)
+        self.columns.append(token.column if token is not None else 0)
+        self.statement_indexes.append(self.statement_index)
+        for pred in preds:
+            self.add_edge(pred, node, FLOW)
+        return node
+
+    def add_edge(self, source, target, edge_kind):
+        self.sources.append(source)
+        self.targets.append(target)
+        self.edge_kinds.append(edge_kind)
+
+    def lower_program(self, tree):
+        preds = [ENTRY]
+        for statement_index, child in enumerate(tree.children):
+            self.statement_index = statement_index
+            preds = self.lower(child, preds)
+        for pred in preds:
+            self.add_edge(pred, EXIT, FLOW)
+
+    def lower(self, tree, preds):
+        """
+        Adds the nodes of a tree, reached from the preds nodes, and returns the nodes that continue after it.
+        The nested statements are lowered with an explicit stack instead of recursion (deeply nested IFs and groups):
+        lower_node() yields (tree, preds) for each part to lower, and receives the nodes that continue after it.
+        """
+        stack = [self.lower_node(tree, preds)]
+        exits = None
+        while stack:
+            try:
+                tree, preds = stack[-1].send(exits)
+            except StopIteration as stop:
+                stack.pop()
+                exits = stop.value
+                continue
+            stack.append(self.lower_node(tree, preds))
+            exits = None
+        return exits
+
+    def lower_node(self, tree, preds):
+        """Generator of lower(): lowers one tree, and yields its parts to be lowered."""
+        data = getattr(tree, 'data', None)
+        if data is None or data in ('command_rem', 'emptyline') or data.startswith(('redirect_', 'test')):
+            return preds  # Tokens, comments and the parts of the commands
+        if data == 'label':
+            node = self.add_node(tree, 'label', preds)
+            name, token = get_label_name(tree.children)
+            self.label_names[node] = name
+            self.label_nodes[token.start_pos] = node
+            return [node]
+        if data == 'command_goto':
+            node = self.add_node(tree, data, preds)
+            self.jumps.append((node, JUMP, get_label_name(tree.children)[1].start_pos))
+            return []
+        if data == 'command_call_label':
+            node = self.add_node(tree, data, preds)
+            label = next(child for child in tree.children if getattr(child, 'data', None) == 'label')
+            self.jumps.append((node, CALL, get_label_name(label.children)[1].start_pos))
+            return [node]
+        if data == 'statement_if':
+            node = self.add_node(tree, data, preds)
+            branches = [child for child in tree.children if hasattr(child, 'data') and not child.data.startswith('test')]
+            exits = yield branches[0], [node]
+            if len(branches) > 1:
+                return exits + (yield branches[1], [node])
+            return exits + [node]
+        if data == 'statement_else':
+            # ELSE line or ELSE IF
+            return (yield [child for child in tree.children if hasattr(child, 'data')][-1], preds)
+        if data.startswith('statement_for'):
+            node = self.add_node(tree, data, preds)
+            body = [child for child in tree.children if hasattr(child, 'data')][-1]
+            for pred in (yield body, [node]):
+                self.add_edge(pred, node, LOOP)
+            return [node]
+        if data == 'group':
+            node = self.add_node(tree, data, preds)
+            return (yield next(child for child in tree.children if getattr(child, 'data', None) == 'subprogram'), [node])
+        if data == 'command_line':
+            # Nodes after which the exit code is 0 (succeeded) or not (failed)
+            succeeded = failed = preds
+            operator = None
+            for child in tree.children:
+                if getattr(child, 'type', None) == 'CHAIN_OP':
+                    operator = str(child)
+                elif hasattr(child, 'data'):
+                    if operator == '&&':
+                        exits = yield child, succeeded
+                        succeeded, failed = exits, _union(failed, exits)
+                    elif operator == '||':
+                        exits = yield child, failed
+                        succeeded, failed = _union(succeeded, exits), exits
+                    else:
+                        succeeded = failed = yield child, _union(succeeded, failed)
+            return _union(succeeded, failed)
+        if data.startswith('command_') and data != 'command_oneline' or data == 'error_line':
+            return [self.add_node(tree, data, preds)]
+        # program, subprogram, pipeline, command_oneline: in sequence
+        for child in tree.children:
+            if hasattr(child, 'data'):
+                preds = yield child, preds
+        return preds
+
+    def resolve_jumps(self, tree):
+        index = build_label_index(tree)
+        jumps = {jump.pos: jump for jump in index.jumps}
+        for node, edge_kind, pos in self.jumps:
+            target = jumps[pos].target
+            if target is not None:
+                self.add_edge(node, self.label_nodes[target.pos], edge_kind)
+            elif edge_kind == JUMP:
+                # GOTO :EOF, or a missing label which ends the script with an error
+                self.add_edge(node, EXIT, JUMP)
+
+def _union(nodes1, nodes2):
+    """Returns the nodes of both lists, without duplicates."""
+    if nodes1 is nodes2:
+        return nodes1
+    return nodes1 + [node for node in nodes2 if node not in nodes1]
+
+def _first_token(tree):
+    """Returns the first token of a tree, without recursion."""
+    while hasattr(tree, 'data'):
+        if not tree.children:
+            return None
+        tree = tree.children[0]
+    return tree
+
+def build_cfg(tree):
+    """Returns the ControlFlowGraph of a program Tree."""
+    builder = _CfgBuilder()
+    builder.lower_program(tree)
+    builder.resolve_jumps(tree)
+    return ControlFlowGraph(builder.kinds, builder.node_kinds, builder.lines, builder.columns,
+                            builder.statement_indexes, builder.label_names,
+                            builder.sources, builder.targets, builder.edge_kinds)
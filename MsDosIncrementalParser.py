@@ -0,0 +1,100 @@
+
+import bisect
+import io
+from lark import Tree  # pip install lark-parser regex
+from MsDosCommandParser import MsDosCommandParser
+from MsDosStreamParser import parse_segments
+
+class IncrementalParser:
+    """
+    Keeps the parse result of a text up to date while the text is edited (e.g. in an editor).
+
+    The text is split into segments, each holding one top-level statement (a whole multi-line
+    group, IF or FOR block) or empty lines. An edit re-parses only the segments it touches,
+    extended to the following lines while parentheses are open, and reuses the rest.
+    The statements are the same as those yielded by MsDosStreamParser.parse_stream().
+
+    parser: parser created by MsDosCommandParser (default: MsDosCommandParser().get_parser()).
+    """
+
+    def __init__(self, text, parser=None):
+        self.parser = parser or MsDosCommandParser().get_parser()
+        self.text = text
+        self.segments = None
+        self.reparse_all()
+
+    @property
+    def tree(self):
+        """Returns a program Tree of all the top-level statements."""
+        return Tree('program', self.statements)
+
+    @property
+    def statements(self):
+        if self.segments is None:
+            self.reparse_all()
+        return [statement for segment in self.segments for statement in segment.statements]
+
+    def reparse_all(self):
+        """Parses the whole text again."""
+        self.segments = None
+        self.segments = list(parse_segments(io.StringIO(self.text, newline=''), self.parser))
+
+    def get_offset(self, line, column):
+        """Returns the character offset of a 1-based line and column (as in the tokens)."""
+        offset = 0
+        for _ in range(line - 1):
+            offset = self.text.index('\n', offset) + 1
+        return offset + column - 1
+
+    def edit(self, start, end, replacement):
+        """
+        Replaces the characters [start, end) of the text and re-parses the affected statements.
+        Returns the new statements. If the new text has a syntax error, the error is raised and
+        the next access parses the whole text again.
+        """
+        old_text = self.text
+        self.text = old_text[:start] + replacement + old_text[end:]
+        if self.segments is None:
+            self.reparse_all()
+            return self.statements
+
+        pos_delta = len(replacement) - (end - start)
+        line_delta = replacement.count('\n') - old_text.count('\n', start, end)
+        segments = self.segments
+        first = self.find_segment(start)
+        if segments:
+            reparse_start, line_offset = segments[first].start, segments[first].line
+        else:
+            reparse_start, line_offset = 0, 0
+
+        # Re-parse from the first touched segment until a segment ends where an old one ended
+        # after the edit. Parentheses keep the following lines in the same segment.
+        new_segments = []
+        reuse_from = len(segments)
+        old_index = first
+        try:
+            for segment in parse_segments(io.StringIO(self.text[reparse_start:], newline=''), self.parser,
+                                          line_offset, reparse_start):
+                new_segments.append(segment)
+                old_end = segment.end - pos_delta
+                if segment.end < start + len(replacement) or old_end < end:
+                    continue
+                while old_index < len(segments) and segments[old_index].end < old_end:
+                    old_index += 1
+                if old_index < len(segments) and segments[old_index].end == old_end:
+                    reuse_from = old_index + 1
+                    break
+        except Exception:
+            self.segments = None
+            raise
+
+        tail = segments[reuse_from:]
+        for segment in tail:
+            segment.move(line_delta, pos_delta)
+        self.segments = segments[:first] + new_segments + tail
+        return [statement for segment in new_segments for statement in segment.statements]
+
+    def find_segment(self, offset):
+        """Returns the index of the segment containing the offset (the last one at the end of the text)."""
+        index = bisect.bisect_right(self.segments, offset, key=lambda segment: segment.start) - 1
+        return max(index, 0)
@@ -0,0 +1,116 @@
+
+import bisect
+import collections
+
+# Label definition (:NAME). key: case-folded name used for the lookups.
+# statement_index: index of the top-level statement (in program.children) containing the label.
+Label = collections.namedtuple('Label', ['name', 'key', 'line', 'column', 'pos', 'statement_index'])
+
+# GOTO or CALL to a label. kind: 'goto' or 'call'.
+# target: the Label jumped to, None for :EOF and for an unresolved label.
+Jump = collections.namedtuple('Jump', ['kind', 'name', 'key', 'line', 'column', 'pos', 'statement_index', 'target'])
+
+# GOTO :EOF and CALL :EOF jump to the end of the script without a label
+EOF_KEY = 'eof'
+
+class LabelIndex:
+    """
+    Index of the labels of a script and the targets of its GOTO and CALL commands, built in one pass
+    by build_label_index(). Label names are case-insensitive (:Sub+ and GOTO SUB+ match).
+
+    labels: dict of the key (case-folded name) to the list of Labels with that name, in script order.
+    jumps: list of the Jumps (command_goto and command_call_label) in script order, with their resolved target.
+    positions: dict of the key of each duplicate label to the sorted positions of its Labels, for resolve().
+    """
+
+    def __init__(self, labels, jumps):
+        self.labels = labels
+        self.positions = {key: [label.pos for label in definitions]
+                          for key, definitions in labels.items() if len(definitions) > 1}
+        self.jumps = []
+        self.jumps_by_key = {}
+        for jump in jumps:
+            self.add_jump(jump)
+
+    def add_jump(self, jump):
+        self.jumps.append(jump)
+        self.jumps_by_key.setdefault(jump.key, []).append(jump)
+
+    def resolve(self, name, pos=None):
+        """
+        Returns the Label that GOTO name (or CALL :name) at position pos jumps to, or None if there is no such label.
+        Like cmd.exe, a duplicate label is searched from the jump forward, then from the beginning of the script.
+        """
+        key = name.lstrip(':').casefold()
+        definitions = self.labels.get(key)
+        if not definitions:
+            return None
+        if len(definitions) == 1 or pos is None:
+            return definitions[0]
+        i = bisect.bisect_right(self.positions[key], pos)
+        return definitions[i] if i < len(definitions) else definitions[0]
+
+    def jumps_to(self, name):
+        """Returns the Jumps whose label name is name (including those resolved to another duplicate)."""
+        return self.jumps_by_key.get(name.lstrip(':').casefold(), [])
+
+    def unresolved(self):
+        """Returns the Jumps to a label that is not defined in the script (GOTO :EOF is not one of them)."""
+        return [jump for jump in self.jumps if jump.target is None and not is_eof_jump(jump)]
+
+    def duplicates(self):
+        """Returns the labels defined more than once, as a dict of the key to their Labels."""
+        return {key: definitions for key, definitions in self.labels.items() if len(definitions) > 1}
+
+    def unused(self):
+        """Returns the Labels that no GOTO or CALL jumps to."""
+        targets = {id(jump.target) for jump in self.jumps if jump.target is not None}
+        return [label for definitions in self.labels.values() for label in definitions if id(label) not in targets]
+
+def is_eof_jump(jump):
+    """GOTO :EOF (with the colon) and CALL :EOF end the script or the subroutine. GOTO EOF needs a label."""
+    return jump.key == EOF_KEY and (jump.kind == 'call' or jump.name.startswith(':'))
+
+def build_label_index(tree):
+    """Returns the LabelIndex of a program Tree, walking the tree once."""
+    labels = {}
+    pending_jumps = []
+    for statement_index, statement in enumerate(tree.children):
+        if not hasattr(statement, 'data'):
+            continue  # WS and NL tokens between the statements
+        # Depth-first in script order, without recursion (deeply nested groups)
+        stack = [statement]
+        while stack:
+            node = stack.pop()
+            data = node.data
+            if data == 'label':
+                name, token = get_label_name(node.children)
+                label = Label(name, name.casefold(), token.line, token.column, token.start_pos, statement_index)
+                labels.setdefault(label.key, []).append(label)
+            elif data == 'command_goto':
+                colon = any(child.type == 'COLON' for child in node.children if not hasattr(child, 'data'))
+                name, token = get_label_name(node.children)
+                pending_jumps.append(('goto', ':' + name if colon else name, name.casefold(), token, statement_index))
+            elif data == 'command_call_label':
+                # The label of CALL :name is a label node, which is not a definition
+                label_node = next(child for child in node.children if getattr(child, 'data', None) == 'label')
+                name, token = get_label_name(label_node.children)
+                pending_jumps.append(('call', ':' + name, name.casefold(), token, statement_index))
+            else:
+                stack.extend(child for child in reversed(node.children) if hasattr(child, 'data'))
+
+    index = LabelIndex(labels, [])
+    for kind, name, key, token, statement_index in pending_jumps:
+        target = index.resolve(key, token.start_pos)
+        jump = Jump(kind, name, key, token.line, token.column, token.start_pos, statement_index, target)
+        if is_eof_jump(jump):
+            # GOTO :EOF ends the script even when a label EOF exists
+            jump = jump._replace(target=None)
+        index.add_jump(jump)
+    return index
+
+def get_label_name(children):
+    """Returns the name of a label (LABEL and its PLUS suffix) and its LABEL token."""
+    token = next(child for child in children if getattr(child, 'type', None) == 'LABEL')
+    name = ''.join(str(child) for child in children if getattr(child, 'type', None) in ('LABEL', 'PLUS'))
+    return name, token
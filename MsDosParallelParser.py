@@ -0,0 +1,130 @@
+
+import collections
+import concurrent.futures
+import glob
+import os
+from MsDosCommandParser import MsDosCommandParser
+from MsDosParseLimits import LimitedParser
+from MsDosResilientParser import ResilientParser
+from MsDosResultCache import ParseResultCache
+
+# Result of parsing one file. Either tree or error is None.
+ParseResult = collections.namedtuple('ParseResult', ['path', 'tree', 'error'])
+
+# Extensions searched when a directory is given
+BATCH_FILE_EXTENSIONS = ('.cmd', '.bat')
+
+# _Worker of the worker process, created by _init_worker()
+_worker = None
+
+def expand_paths(paths):
+    """Yields the files matched by a list of file paths, directories and glob patterns."""
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(BATCH_FILE_EXTENSIONS):
+                        yield os.path.join(dirpath, filename)
+        elif glob.has_magic(path):
+            for filepath in sorted(glob.iglob(path, recursive=True)):
+                if os.path.isfile(filepath):
+                    yield filepath
+        else:
+            yield path
+
+class _Worker:
+    """Parser (and result cache) of a worker process, or of parse_files() itself with jobs=1."""
+
+    def __init__(self, parser_kwargs, handler, result_cache_dir=None, limits=None, resilient=False):
+        transpiler = MsDosCommandParser(**parser_kwargs)
+        self.handler = handler
+        self.parser = None
+        self.cache = None
+        if result_cache_dir:
+            # The limits are part of the key: a result parsed without them is not returned for a file exceeding them.
+            # Without limits, the parser is only built on the first cache miss.
+            self.cache = ParseResultCache(result_cache_dir, transpiler, limits=limits)
+        if limits:
+            self.parser = LimitedParser(transpiler.get_parser(), **limits)
+        elif resilient:
+            self.parser = ResilientParser(transpiler.get_parser())
+        elif not result_cache_dir:
+            self.parser = transpiler.get_parser()
+
+    def parse_file(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as a_file:
+                inputfile_text = a_file.read()
+            if self.cache is not None:
+                tree = self.cache.parse(inputfile_text, self.parser)
+            else:
+                tree = self.parser.parse(inputfile_text)
+            if self.handler is not None:
+                tree = self.handler(tree)
+            return ParseResult(path, tree, None)
+        except Exception as e:
+            return ParseResult(path, None, '%s: %s' % (type(e).__name__, e))
+
+def _init_worker(parser_kwargs, handler, result_cache_dir=None, limits=None, resilient=False):
+    """Creates the parser (and the result cache) once per worker process."""
+    global _worker
+    _worker = _Worker(parser_kwargs, handler, result_cache_dir, limits, resilient)
+
+def _parse_file(path):
+    """Parses one file in the worker process."""
+    return _worker.parse_file(path)
+
+def parse_files(paths, jobs=None, ordered=False, parser_kwargs=None, handler=None, result_cache_dir=None, limits=None,
+                resilient=False):
+    """
+    Parses the files in parallel and yields a ParseResult for each file as soon as it is done.
+
+    paths: file paths, directories (searched for *.cmd and *.bat) or glob patterns.
+    jobs: number of worker processes (None: number of CPUs, 1: parse in this process).
+    ordered: yield the results in input order instead of completion order.
+    parser_kwargs: arguments of MsDosCommandParser().
+    handler: picklable function applied to each tree in the worker (e.g. to convert it to a string).
+    result_cache_dir: directory of the ParseResultCache, so that unchanged files are not parsed again.
+    limits: arguments of LimitedParser() (max_bytes, max_line_length, max_depth, timeout) for untrusted files.
+    resilient: parse with ResilientParser, so that the invalid statements of a file become error_line nodes
+               instead of an error (not with result_cache_dir or limits). The parser is built with error_recovery.
+    """
+    if resilient and (result_cache_dir or limits):
+        raise ValueError('resilient cannot be combined with result_cache_dir or limits')
+    parser_kwargs = parser_kwargs or {}
+    if resilient:
+        parser_kwargs = dict(parser_kwargs, error_recovery=True)
+        MsDosCommandParser(**parser_kwargs)  # Raises ValueError here rather than in each worker (e.g. with standalone)
+    filepaths = expand_paths(paths)
+
+    if jobs == 1:
+        # A local worker, which leaves the one of this process (if it is a worker) unchanged
+        worker = _Worker(parser_kwargs, handler, result_cache_dir, limits, resilient)
+        for path in filepaths:
+            yield worker.parse_file(path)
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                initargs=(parser_kwargs, handler, result_cache_dir, limits, resilient)) as executor:
+        # Only a few files are in flight at once, so that finished trees do not pile up in memory
+        max_pending = jobs * 2
+        pending = collections.deque()
+        for path in filepaths:
+            pending.append(executor.submit(_parse_file, path))
+            if len(pending) >= max_pending:
+                yield from _collect(pending, ordered)
+        while pending:
+            yield from _collect(pending, ordered)
+
+def _collect(pending, ordered):
+    """Yields at least one finished result and removes it from pending."""
+    if ordered:
+        yield pending.popleft().result()
+        return
+    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+    for future in list(pending):
+        if future in done:
+            pending.remove(future)
+            yield future.result()
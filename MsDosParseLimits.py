@@ -0,0 +1,129 @@
+
+import time
+
+class ParseLimitError(Exception):
+    """
+    Raised when a script exceeds a limit of LimitedParser.
+    limit: name of the exceeded limit ('max_bytes', 'max_line_length', 'max_depth' or 'timeout').
+    value: measured value (the length of a continued line is counted up to the physical line that exceeded the limit).
+    maximum: configured limit.
+    line, column: position in the script (1-based), None for the whole script.
+    """
+
+    def __init__(self, limit, value, maximum, line=None, column=None):
+        # All the arguments are kept in args, so that the error can be pickled (e.g. by a process pool)
+        super().__init__(limit, value, maximum, line, column)
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+        self.line = line
+        self.column = column
+
+    def __str__(self):
+        message = '%s exceeded: %s > %s' % (self.limit, self.value, self.maximum)
+        if self.line is not None:
+            message += ' at line %d' % self.line
+            if self.column is not None:
+                message += ' col %d' % self.column
+        return message
+
+    def to_dict(self):
+        return {
+            'limit': self.limit,
+            'value': self.value,
+            'maximum': self.maximum,
+            'line': self.line,
+            'column': self.column,
+        }
+
+class LimitedParser:
+    """
+    Parses untrusted scripts with limits on their size, their line length, the nesting depth
+    of parentheses and the parse time. A script exceeding a limit raises ParseLimitError
+    as soon as it is detected. Each limit is disabled when None.
+
+        parser = LimitedParser(MsDosCommandParser().get_parser(), max_bytes=1024 * 1024, timeout=5.0)
+        tree = parser.parse(inputfile_text)
+
+    max_bytes: largest script size in UTF-8 bytes.
+    max_line_length: largest line length in characters, lines continued by a caret (^) counting as one line.
+    max_depth: deepest nesting of parentheses (groups, and the FOR sets inside them).
+    timeout: longest wall-clock parse time in seconds. It is checked between tokens: the match of one token
+             is not interrupted, so a script can run over the timeout by the time of its longest token.
+             Every terminal matches in linear time, so that overrun is bounded by max_line_length.
+    """
+
+    def __init__(self, parser, max_bytes=None, max_line_length=None, max_depth=None, timeout=None):
+        self.parser = parser
+        self.max_bytes = max_bytes
+        self.max_line_length = max_line_length
+        self.max_depth = max_depth
+        self.timeout = timeout
+
+    def parse(self, inputfile_text, start=None):
+        """Parses like Lark.parse(), start being the start rule (None: the only one of the parser)."""
+        start_time = time.perf_counter()
+        deadline = start_time + self.timeout if self.timeout is not None else None
+        if self.max_bytes is not None:
+            num_bytes = len(inputfile_text.encode('utf-8', 'surrogatepass'))
+            if num_bytes > self.max_bytes:
+                raise ParseLimitError('max_bytes', num_bytes, self.max_bytes)
+        if self.max_line_length is not None:
+            self.check_line_length(inputfile_text)
+        if deadline is None and self.max_depth is None:
+            return self.parser.parse(inputfile_text, start=start)
+        return self.parse_tokens(inputfile_text, start, start_time, deadline)
+
+    def check_line_length(self, inputfile_text):
+        """Raises ParseLimitError at the first logical line longer than max_line_length."""
+        max_line_length = self.max_line_length
+        first_line = 1
+        length = 0
+        for line_number, line in enumerate(inputfile_text.split('\n'), 1):
+            line = line.rstrip('\r')
+            length += len(line)
+            if length > max_line_length:
+                raise ParseLimitError('max_line_length', length, max_line_length, line=first_line)
+            # An odd number of trailing carets continues the line (^^ is an escaped caret)
+            if (len(line) - len(line.rstrip('^'))) % 2:
+                length -= 1
+            else:
+                first_line = line_number + 1
+                length = 0
+
+    def parse_tokens(self, inputfile_text, start, start_time, deadline):
+        """Parses with a lexer that checks the depth and the time before passing each token to the LALR parser."""
+        if start is None:
+            start, = self.parser.options.start
+        frontend = self.parser.parser
+        lexer = CheckedLexerThread(frontend.lexer, inputfile_text, self.max_depth, self.timeout, start_time, deadline)
+        # Same as frontend.parse(), which makes a LexerThread (the standalone module has no parse_interactive())
+        return frontend.parser.parse(lexer, start)
+
+class CheckedLexerThread:
+    """LexerThread of lark that raises ParseLimitError when the parentheses are too deep or the time is up."""
+
+    def __init__(self, lexer, text, max_depth, timeout, start, deadline):
+        self.lexer = lexer
+        self.state = lexer.make_lexer_state(text)
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.start = start
+        self.deadline = deadline
+
+    def lex(self, parser_state):
+        perf_counter = time.perf_counter
+        max_depth = self.max_depth
+        deadline = self.deadline
+        depth = 0
+        for token in self.lexer.lex(self.state, parser_state):
+            if deadline is not None and perf_counter() > deadline:
+                elapsed = round(perf_counter() - self.start, 3)
+                raise ParseLimitError('timeout', elapsed, self.timeout, line=token.line, column=token.column)
+            if token.type == 'PAREN_LEFT':
+                depth += 1
+                if max_depth is not None and depth > max_depth:
+                    raise ParseLimitError('max_depth', depth, max_depth, line=token.line, column=token.column)
+            elif token.type == 'PAREN_RIGHT':
+                depth -= 1
+            yield token
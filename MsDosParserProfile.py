@@ -0,0 +1,103 @@
+
+import time
+
+class ParserProfile:
+    """
+    Records, for each terminal, the number of matches, the matched bytes and the time spent in the lexer,
+    and for each rule, the number of reductions and the time spent building its node.
+    Use it through MsDosCommandParser(profile=True), which installs it on the parser as parser.profile.
+    """
+
+    def __init__(self):
+        self.terminals = {}     # Terminal name: [matches, bytes, seconds]
+        self.rules = {}         # Rule name: [reductions, seconds]
+
+    def install(self, parser):
+        """Wraps the lexers and the rule callbacks of a LALR parser (lark.Lark or Lark_StandAlone)."""
+        frontend = parser.parser
+        lexer = frontend.lexer
+        lexers = list(getattr(lexer, 'lexers', {}).values())
+        if hasattr(lexer, 'root_lexer'):
+            lexers.append(lexer.root_lexer)
+        else:
+            lexers.append(lexer)
+        wrapped = set()
+        for traditional_lexer in lexers:
+            if id(traditional_lexer) not in wrapped:
+                wrapped.add(id(traditional_lexer))
+                traditional_lexer.match = self.wrap_match(traditional_lexer.match)
+
+        callbacks = frontend.parser.parser.callbacks
+        for rule, callback in callbacks.items():
+            callbacks[rule] = self.wrap_callback(callback, rule.alias or rule.origin.name)
+        return self
+
+    def wrap_match(self, match):
+        terminals = self.terminals
+        perf_counter = time.perf_counter
+
+        def profiled_match(text, pos):
+            start = perf_counter()
+            res = match(text, pos)
+            elapsed = perf_counter() - start
+            if res:
+                value, type_ = res
+                stats = terminals.get(type_)
+                if stats is None:
+                    stats = terminals[type_] = [0, 0, 0.0]
+                stats[0] += 1
+                stats[1] += len(value.encode('utf-8'))
+                stats[2] += elapsed
+            else:
+                stats = terminals.setdefault('<no match>', [0, 0, 0.0])
+                stats[0] += 1
+                stats[2] += elapsed
+            return res
+        return profiled_match
+
+    def wrap_callback(self, callback, name):
+        rules = self.rules
+        perf_counter = time.perf_counter
+
+        def profiled_callback(children):
+            start = perf_counter()
+            result = callback(children)
+            elapsed = perf_counter() - start
+            stats = rules.get(name)
+            if stats is None:
+                stats = rules[name] = [0, 0.0]
+            stats[0] += 1
+            stats[1] += elapsed
+            return result
+        return profiled_callback
+
+    def reset(self):
+        self.terminals.clear()
+        self.rules.clear()
+
+    def hottest_terminals(self, top=None):
+        """Returns (name, matches, bytes, seconds) sorted by time, the hottest first."""
+        items = sorted(((name,) + tuple(stats) for name, stats in self.terminals.items()),
+                       key=lambda item: item[3], reverse=True)
+        return items[:top] if top else items
+
+    def hottest_rules(self, top=None):
+        """Returns (name, reductions, seconds) sorted by time, the hottest first."""
+        items = sorted(((name,) + tuple(stats) for name, stats in self.rules.items()),
+                       key=lambda item: item[2], reverse=True)
+        return items[:top] if top else items
+
+    def report(self, top=20):
+        """Returns the hottest terminals and rules as a text table."""
+        lexer_time = sum(stats[2] for stats in self.terminals.values()) or 1e-12
+        rule_time = sum(stats[1] for stats in self.rules.values()) or 1e-12
+        lines = ["%-28s %10s %12s %10s %7s %10s" % ('terminal', 'matches', 'bytes', 'time[ms]', '%', 'us/match')]
+        for name, matches, num_bytes, seconds in self.hottest_terminals(top):
+            lines.append("%-28s %10d %12d %10.2f %6.1f%% %10.2f" % (
+                name, matches, num_bytes, seconds * 1000, seconds / lexer_time * 100, seconds / matches * 1e6))
+        lines.append('')
+        lines.append("%-28s %10s %12s %10s %7s %10s" % ('rule', 'reductions', '', 'time[ms]', '%', 'us/reduce'))
+        for name, reductions, seconds in self.hottest_rules(top):
+            lines.append("%-28s %10d %12s %10.2f %6.1f%% %10.2f" % (
+                name, reductions, '', seconds * 1000, seconds / rule_time * 100, seconds / reductions * 1e6))
+        return '\n'.join(lines)
@@ -0,0 +1,151 @@
+
+import sys
+from MsDosStreamParser import paren_depth_delta
+
+class ResilientParser:
+    """
+    Parses a script and skips its invalid top-level statements instead of failing on the first one.
+    A skipped statement becomes an error_line node (ERROR_LINE token with its raw text and position)
+    in the program, and the parse goes on with the next statement.
+
+        parser = ResilientParser(MsDosCommandParser(error_recovery=True).get_parser())
+        tree = parser.parse(inputfile_text)
+        for error_line in tree.find_data('error_line'): ...
+
+    The script is parsed by the LALR parser as usual, and only a script with a syntax error
+    is parsed again with the on_error recovery of lark, so valid scripts are parsed as fast as before.
+    The recovery needs the interactive parser of lark, which the standalone module does not have,
+    and the error_line rule, which only the parsers of MsDosCommandParser(error_recovery=True) have
+    (so that the syntax errors of the other parsers do not expect ERROR_LINE).
+    """
+
+    def __init__(self, parser):
+        if not hasattr(sys.modules[type(parser.parser.parser).__module__], 'InteractiveParser'):
+            raise ValueError('ResilientParser needs a lark parser (the standalone module cannot recover from errors)')
+        if not any(rule.origin.name == 'error_line' for rule in parser.rules):
+            raise ValueError('ResilientParser needs a parser of MsDosCommandParser(error_recovery=True)')
+        self.parser = parser
+
+    def parse(self, inputfile_text, start=None):
+        """Parses like Lark.parse(), start being the start rule (None: the only one of the parser)."""
+        try:
+            return self.parser.parse(inputfile_text, start=start)
+        except Exception as e:
+            if not hasattr(e, 'pos_in_stream'):
+                raise  # Not a syntax error (lark.exceptions.UnexpectedInput)
+        if start is None:
+            start, = self.parser.options.start
+        frontend = self.parser.parser
+        lexer = RecoveringLexerThread(frontend.lexer, inputfile_text)
+        # Same as frontend.parse(inputfile_text, on_error=...), with the lexer that records the statement starts
+        return frontend.parser.parse(lexer, start, on_error=lexer.skip_statement)
+
+class RecoveringLexerThread:
+    """LexerThread of lark that records where the current top-level statement begins, to skip it on an error."""
+
+    def __init__(self, lexer, text):
+        self.lexer = lexer
+        self.state = lexer.make_lexer_state(text)
+        self.token_class = sys.modules[type(self.state).__module__].Token
+        # (position, line, column, line start position) of the current top-level statement
+        self.statement_start = (0, 1, 1, 0)
+
+    def lex(self, parser_state):
+        states = parser_state.parse_conf.states
+        line_ctr = self.state.line_ctr
+        # An error_line can begin where a top-level statement begins
+        if can_shift(states, parser_state.state_stack, 'ERROR_LINE'):
+            self.statement_start = (line_ctr.char_pos, line_ctr.line, line_ctr.column, line_ctr.line_start_pos)
+        for token in self.lexer.lex(self.state, parser_state):
+            yield token
+            if can_shift(states, parser_state.state_stack, 'ERROR_LINE'):
+                self.statement_start = (line_ctr.char_pos, line_ctr.line, line_ctr.column, line_ctr.line_start_pos)
+
+    def skip_statement(self, e):
+        """
+        on_error callback of lark: replaces the top-level statement that contains the error by an error_line,
+        and moves the lexer to the newline at its end. Returns False when there is nothing to skip.
+        """
+        text = self.state.text
+        parser_state = e.interactive_parser.parser_state
+        start, line, column, line_start_pos = self.statement_start
+        end = get_statement_end(text, start, max(e.pos_in_stream or 0, start))
+        if end <= start:
+            return False
+
+        # Drop the tokens and nodes of the statement from the parser stacks
+        states = parser_state.parse_conf.states
+        state_stack = parser_state.state_stack
+        value_stack = parser_state.value_stack
+        while not can_shift(states, state_stack, 'ERROR_LINE'):
+            state_stack.pop()
+            value_stack.pop()
+
+        # Feed the whole statement as one token and lex again from its end
+        raw_text = text[start:end]
+        newlines = raw_text.count('\n')
+        line_ctr = self.state.line_ctr
+        line_ctr.char_pos = end
+        line_ctr.line = line + newlines
+        if newlines:
+            line_ctr.line_start_pos = start + raw_text.rindex('\n') + 1
+        else:
+            line_ctr.line_start_pos = line_start_pos
+        line_ctr.column = end - line_ctr.line_start_pos + 1
+        token = self.token_class('ERROR_LINE', raw_text, start, line, column,
+                                 line_ctr.line, line_ctr.column, end)
+        self.state.last_token = token
+        e.interactive_parser.feed_token(token)
+        return True
+
+def can_shift(states, state_stack, token_type):
+    """
+    Returns whether the LALR parser can shift a token of token_type on state_stack, after the reductions
+    that the token triggers. The parse table may reduce on a token that cannot follow once reduced,
+    so the reductions are simulated (without changing state_stack).
+    """
+    popped = 0   # Number of states of state_stack removed by the reductions
+    pushed = []  # States pushed by the reductions
+    while True:
+        state = pushed[-1] if pushed else state_stack[-1 - popped]
+        action = states[state].get(token_type)
+        if action is None:
+            return False
+        if action[0].name == 'Shift':
+            return True
+        rule = action[1]
+        size = len(rule.expansion)
+        removed = min(size, len(pushed))
+        del pushed[len(pushed) - removed:]
+        popped += size - removed
+        state = pushed[-1] if pushed else state_stack[-1 - popped]
+        pushed.append(states[state][rule.origin.name][1])
+
+def get_statement_end(text, start, error_pos):
+    """
+    Returns the end (before the newline) of the top-level statement that begins at start and contains error_pos:
+    the first line end after error_pos where the parentheses are balanced, or the end of the line of error_pos.
+    """
+    depth = 0
+    logical_line = []
+    pos = start
+    while pos < len(text):
+        newline = text.find('\n', pos)
+        line_end = len(text) if newline < 0 else newline
+        line = text[pos:line_end]
+        logical_line.append(line)
+        pos = line_end + 1
+        if line.rstrip('\r').endswith('^'):
+            continue  # Line continuation
+        depth += paren_depth_delta('\n'.join(logical_line))
+        logical_line = []
+        if depth <= 0 and line_end >= error_pos:
+            return _strip_cr(text, start, line_end)
+    # Unbalanced parentheses: skip only the line of the error
+    newline = text.find('\n', error_pos)
+    return _strip_cr(text, start, len(text) if newline < 0 else newline)
+
+def _strip_cr(text, start, end):
+    if end > start and text[end - 1] == '\r':
+        return end - 1
+    return end
@@ -0,0 +1,169 @@
+
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import MsDosAst
+from MsDosCommandParser import MsDosCommandParser, WhitespaceFilter
+
+# File written in each results directory, so that only the directories of this cache are purged
+MARKER_NAME = 'parse_result_cache'
+
+def get_builder_digest():
+    """Returns a hash of the code that builds the trees while parsing (MsDosAst and WhitespaceFilter)."""
+    source = inspect.getsource(MsDosAst) + '\0' + inspect.getsource(WhitespaceFilter)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+class ParseResultCache:
+    """
+    On-disk cache of parse results keyed by the hash of the script text.
+
+    The results are stored under a directory named after the grammar fingerprint and a hash of the
+    tree builders (MsDosAst, WhitespaceFilter), so a change of grammar.lark, of these builders, lark
+    or Python never returns a stale result. The directories of the other fingerprints are removed
+    when the cache is opened. When the files exceed max_bytes, the least recently used ones are removed.
+    """
+
+    def __init__(self, cache_dir, transpiler=None, max_bytes=256 * 1024 * 1024, limits=None):
+        """
+        cache_dir: directory to store the results in.
+        transpiler: MsDosCommandParser whose results are cached (its mode is part of the key).
+        max_bytes: maximum total size of the stored results.
+        limits: arguments of the LimitedParser given to parse() (part of the key, so that a result parsed
+                without the limits is never returned for a script that exceeds them).
+        """
+        self.transpiler = transpiler or MsDosCommandParser()
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self.cache_dir = cache_dir
+        grammar_fingerprint = self.transpiler.get_fingerprint(self.transpiler.read_grammar())
+        self.fingerprint = hashlib.sha256((grammar_fingerprint + get_builder_digest()).encode('utf-8')).hexdigest()
+        self.results_dir = os.path.join(cache_dir, self.fingerprint)
+        self.mode = repr((self.transpiler.get_options_key(), sorted((limits or {}).items())))
+        self.total_bytes = None
+        self.purge_stale()
+        self.write_marker()
+
+    def parse(self, inputfile_text, parser=None):
+        """Returns the cached result for the text, or parses it and stores the result."""
+        key = self.get_key(inputfile_text)
+        result = self.get(key)
+        if result is None:
+            result = (parser or self.transpiler.get_parser()).parse(inputfile_text)
+            self.put(key, result)
+        return result
+
+    def get_key(self, inputfile_text):
+        """Returns the content hash of the text for the parser mode."""
+        return hashlib.sha256((self.mode + '\0' + inputfile_text).encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.results_dir, key[:2], key + '.pickle')
+
+    def get(self, key):
+        """Returns the stored result, or None."""
+        path = self.get_path(key)
+        try:
+            with open(path, 'rb') as a_file:
+                result = pickle.load(a_file)
+        except FileNotFoundError:
+            self.stats['misses'] += 1
+            return None
+        except Exception:
+            # Broken file, parse again
+            self.stats['misses'] += 1
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)  # The modification time orders the files for the LRU eviction
+        except OSError:
+            pass
+        self.stats['hits'] += 1
+        return result
+
+    def put(self, key, result):
+        """Stores the result. Results that cannot be pickled (e.g. too deep) are not stored."""
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError, TypeError):
+            return
+        path = self.get_path(key)
+        try:
+            old_size = os.path.getsize(path)  # The result replaced by this one
+        except OSError:
+            old_size = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as a_file:
+            a_file.write(data)
+        os.replace(tmp_path, path)
+
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, _, size in self.list_files())
+        else:
+            self.total_bytes += len(data) - old_size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Removes the least recently used results until the cache is under 90% of max_bytes."""
+        files = sorted(self.list_files())
+        self.total_bytes = sum(size for _, _, size in files)
+        for _, path, size in files:
+            if self.total_bytes <= self.max_bytes * 0.9:
+                break
+            self.remove(path)
+            self.total_bytes -= size
+            self.stats['evictions'] += 1
+
+    def list_files(self):
+        """Returns (modification time, path, size) of the stored results."""
+        files = []
+        if not os.path.isdir(self.results_dir):
+            return files
+        for subdir in os.scandir(self.results_dir):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith('.pickle'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue  # Removed by another process
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def write_marker(self):
+        """Creates the results directory with the marker file that purge_stale() looks for."""
+        os.makedirs(self.results_dir, exist_ok=True)
+        path = os.path.join(self.results_dir, MARKER_NAME)
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as a_file:
+                a_file.write(self.fingerprint)
+
+    def purge_stale(self):
+        """Removes the results stored for other fingerprints (the directories with a marker file only)."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if (entry.is_dir() and entry.name != self.fingerprint
+                    and os.path.isfile(os.path.join(entry.path, MARKER_NAME))):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def clear(self):
+        """Removes all the stored results."""
+        shutil.rmtree(self.results_dir, ignore_errors=True)
+        self.write_marker()
+        self.total_bytes = 0
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def cache_info(self):
+        """Returns the number of hits, misses and evictions of this cache object."""
+        return dict(self.stats)
@@ -0,0 +1,228 @@
+
+import collections
+import copy
+import re
+from lark.exceptions import UnexpectedEOF, UnexpectedInput, UnexpectedToken  # pip install lark-parser regex
+from MsDosCommandParser import MsDosCommandParser
+
+# REM or :: line (its parentheses are not counted)
+REM_LINE = re.compile(r'^\s*(?:@?rem(?![^\s:.\-=()])|::)', re.IGNORECASE)
+# Parentheses outside double quotes and not escaped by a caret
+PAREN_OR_QUOTE = re.compile(r'\^.|"[^"\n]*"?|[()]')
+
+def paren_depth_delta(logical_line):
+    """Returns the number of opened minus closed parentheses on a (caret-joined) line."""
+    if REM_LINE.match(logical_line):
+        return 0
+    delta = 0
+    for match in PAREN_OR_QUOTE.finditer(logical_line):
+        if match.group() == '(':
+            delta += 1
+        elif match.group() == ')':
+            delta -= 1
+    return delta
+
+class Segment:
+    """
+    Lines of the text parsed together: the characters [start, end), which begin after line newlines.
+    statements holds the top-level statements found in them (none for empty lines).
+    """
+
+    __slots__ = ('start', 'end', 'line', '_statements', '_pending')
+
+    def __init__(self, start, end, line, statements):
+        self.start = start
+        self.end = end
+        self.line = line
+        self._statements = statements
+        self._pending = (0, 0)
+
+    def __repr__(self):
+        return 'Segment(start=%d, end=%d, line=%d)' % (self.start, self.end, self.line)
+
+    @property
+    def statements(self):
+        if self._pending != (0, 0):
+            shift_tokens(self._statements, *self._pending)
+            self._pending = (0, 0)
+        return self._statements
+
+    def move(self, line_delta, pos_delta):
+        """Moves the segment. The token positions are updated when the statements are next read."""
+        self.start += pos_delta
+        self.end += pos_delta
+        self.line += line_delta
+        self._pending = (self._pending[0] + line_delta, self._pending[1] + pos_delta)
+
+class LineMemo:
+    """
+    Bounded LRU of the statements parsed from single-line chunks, keyed by the line text.
+    Scripts that repeat the same lines (e.g. generated ones) are parsed once per distinct line.
+
+    A hit returns a copy of the trees with the token positions of the new line.
+    AST nodes have no positions, but are copied too, so that identical lines never share mutable nodes.
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, line_text, line_offset, pos_offset):
+        """Returns the statements of the line placed at the offsets, or None."""
+        statements = self.entries.get(line_text)
+        if statements is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(line_text)
+        return [copy_tree(statement, line_offset, pos_offset) for statement in statements]
+
+    def put(self, line_text, statements, line_offset, pos_offset):
+        """Stores copies of the statements moved to the beginning of the text."""
+        self.entries[line_text] = [copy_tree(statement, -line_offset, -pos_offset) for statement in statements]
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def cache_info(self):
+        """Returns the number of hits and misses, and the number of stored lines."""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'max_size': self.max_size}
+
+def copy_tree(tree, line_delta, pos_delta):
+    """Returns a copy of a tree with the token positions moved (AST nodes are deep-copied)."""
+    if not hasattr(tree, 'children'):
+        return copy.deepcopy(tree)
+    tree_class = type(tree)
+
+    def copy_children(children):
+        copied = []
+        for child in children:
+            if type(child) is tree_class:
+                copied.append(tree_class(child.data, copy_children(child.children)))
+            else:
+                copied.append(type(child)(child.type, child.value, child.start_pos + pos_delta, child.line + line_delta,
+                                          child.column, child.end_line + line_delta, child.end_column,
+                                          child.end_pos + pos_delta))
+        return copied
+
+    return tree_class(tree.data, copy_children(tree.children))
+
+def shift_tokens(statements, line_delta, pos_delta):
+    """Moves the positions of the tokens in the statements (AST nodes have no positions)."""
+    for statement in statements:
+        if not hasattr(statement, 'scan_values'):
+            continue
+        for token in statement.scan_values(lambda value: hasattr(value, 'type')):
+            token.line += line_delta
+            token.end_line += line_delta
+            token.start_pos += pos_delta
+            token.end_pos += pos_delta
+
+def parse_stream(a_file, parser=None, memo=None):
+    """
+    Reads a script from the file object and yields its top-level statements one at a time:
+    a command line, a REM, a label, or a whole multi-line group, IF or FOR block.
+    Empty lines and whitespace tokens between the statements are not yielded.
+
+    Only the lines of the current statement are kept in memory. The line numbers and positions
+    of the tokens are those in the whole file.
+
+    parser: parser created by MsDosCommandParser (default: MsDosCommandParser().get_parser()).
+    memo: LineMemo reusing the statements of repeated lines.
+    """
+    for segment in parse_segments(a_file, parser, memo=memo):
+        yield from segment.statements
+
+def parse_segments(a_file, parser=None, line_offset=0, pos_offset=0, memo=None):
+    """
+    Reads a script from the file object and yields a Segment for each top-level statement
+    (or run of empty lines) as soon as it is complete.
+
+    line_offset, pos_offset: number of lines and characters in the text before a_file.
+    memo: LineMemo reusing the statements of repeated lines.
+    """
+    if parser is None:
+        parser = MsDosCommandParser().get_parser()
+
+    chunk = []          # Physical lines of the current statement
+    logical_line = []   # Physical lines joined by carets
+    depth = 0           # Estimated depth of parentheses
+
+    for line in a_file:
+        chunk.append(line)
+        logical_line.append(line)
+        if line.rstrip('\r\n').endswith('^'):
+            continue  # Line continuation
+        depth += paren_depth_delta(''.join(logical_line))
+        logical_line = []
+        if depth > 0:
+            continue  # Inside a block
+
+        chunk_text = ''.join(chunk)
+        try:
+            segment = _parse_chunk(parser, chunk_text, line_offset, pos_offset, memo if len(chunk) == 1 else None)
+        except (UnexpectedEOF, UnexpectedToken) as e:
+            if isinstance(e, UnexpectedEOF) or e.token.type == '$END':
+                continue  # The statement goes on in the next lines
+            raise _shift_error(e, line_offset, pos_offset)
+        except UnexpectedInput as e:
+            raise _shift_error(e, line_offset, pos_offset)
+        yield segment
+
+        line_offset += chunk_text.count('\n')
+        pos_offset += len(chunk_text)
+        chunk = []
+        depth = 0
+
+    chunk_text = ''.join(chunk)
+    if chunk_text:
+        try:
+            yield _parse_chunk(parser, chunk_text, line_offset, pos_offset, memo if len(chunk) == 1 else None)
+        except UnexpectedInput as e:
+            raise _shift_error(e, line_offset, pos_offset)
+
+def _parse_chunk(parser, chunk_text, line_offset, pos_offset, memo=None):
+    """
+    Parses a chunk and returns its Segment.
+    Except at the beginning of the file, the chunk is preceded by a newline so that it is lexed
+    as in the whole file (e.g. REDIRECT does not match at the beginning of the text).
+    memo: LineMemo to look up a single-line chunk in (the first line is lexed differently and is not looked up).
+    """
+    if memo is not None and pos_offset > 0:
+        statements = memo.get(chunk_text, line_offset, pos_offset)
+        if statements is None:
+            statements = _parse_chunk(parser, chunk_text, line_offset, pos_offset).statements
+            memo.put(chunk_text, statements, line_offset, pos_offset)
+        return Segment(pos_offset, pos_offset + len(chunk_text), line_offset, statements)
+
+    statements = []
+    if chunk_text.strip():
+        if pos_offset == 0:
+            result, shift = parser.parse(chunk_text), 0
+        else:
+            result, shift = parser.parse('\n' + chunk_text), 1
+        statements = _statements(result)
+        if line_offset - shift or pos_offset - shift:
+            shift_tokens(statements, line_offset - shift, pos_offset - shift)
+    return Segment(pos_offset, pos_offset + len(chunk_text), line_offset, statements)
+
+def _statements(result):
+    """Returns the statements of a parsed chunk without the whitespace tokens and empty lines."""
+    if hasattr(result, 'statements'):
+        # MsDosAst.Program
+        return result.statements
+    return [child for child in result.children if hasattr(child, 'data') and child.data != 'emptyline']
+
+def _shift_error(e, line_offset, pos_offset):
+    """Moves the position of a syntax error in a chunk to the whole file."""
+    shift = 1 if pos_offset else 0
+    if getattr(e, 'line', None) is not None and e.line > 0:
+        e.line += line_offset - shift
+    if getattr(e, 'pos_in_stream', None) is not None and e.pos_in_stream >= 0:
+        e.pos_in_stream += pos_offset - shift
+    return e
@@ -0,0 +1,55 @@
+
+import io
+import json
+
+def tree_to_json(tree, out):
+    """Writes the parse tree to the file-like object as JSON, piece by piece."""
+    if not hasattr(tree, 'data'):
+        # Token
+        out.write('{"token": %s, "value": %s, "line": %d, "column": %d}' % (
+            json.dumps(tree.type), json.dumps(str(tree), ensure_ascii=False), tree.line, tree.column))
+        return
+    out.write('{"rule": %s, "children": [' % json.dumps(tree.data))
+    for i, child in enumerate(tree.children):
+        if i:
+            out.write(', ')
+        tree_to_json(child, out)
+    out.write(']}')
+
+def tree_to_pretty(tree, out, indent_str='  '):
+    """
+    Writes the parse tree to the file-like object in the format of Tree.pretty(),
+    skipping the lines that contain only whitespace (e.g. WS and NL tokens).
+    """
+    children = tree.children
+    if len(children) == 1 and not hasattr(children[0], 'data'):
+        _write_nonblank_lines(tree.data + '\t' + children[0], out)
+        return
+    out.write(tree.data + '\n')
+    _write_pretty_children(children, indent_str, indent_str, out)
+
+def _write_pretty_children(children, indent, indent_str, out):
+    for child in children:
+        if not hasattr(child, 'data'):
+            # Token
+            _write_nonblank_lines(indent + child, out)
+        elif len(child.children) == 1 and not hasattr(child.children[0], 'data'):
+            _write_nonblank_lines(indent + child.data + '\t' + child.children[0], out)
+        else:
+            out.write(indent + child.data + '\n')
+            _write_pretty_children(child.children, indent + indent_str, indent_str, out)
+
+def _write_nonblank_lines(text, out):
+    if '\n' not in text:
+        if text and not text.isspace():
+            out.write(text + '\n')
+        return
+    for line in text.split('\n'):
+        if line and not line.isspace():
+            out.write(line + '\n')
+
+def format_pretty(tree):
+    """Returns the output of tree_to_pretty() as a string, without the last newline."""
+    out = io.StringIO()
+    tree_to_pretty(tree, out)
+    return out.getvalue()[:-1]
@@ -0,0 +1,146 @@
+
+import collections
+import re
+
+# Definition of a variable by SET. kind: 'set', 'set_p' (SET /P) or 'set_a' (SET /A).
+# value: text after the = (the prompt for SET /P, the expression for SET /A).
+Definition = collections.namedtuple('Definition', ['name', 'key', 'kind', 'value', 'line', 'column', 'pos'])
+
+# Reference to a variable. text: the whole reference (%VAR:~0,5%, !VAR!, ...), or the name in a SET /A expression
+# and after IF DEFINED.
+Reference = collections.namedtuple('Reference', ['name', 'key', 'text', 'line', 'column', 'pos'])
+
+# Token types whose text can contain %VAR% and !VAR! references
+REFERENCE_TOKEN_TYPES = frozenset([
+    'ARG_VALUE_IN_SET', 'ARG_VALUE_IN_SET_TOPLEVEL', 'ARG_VALUE_IN_PAREN', 'ARG_VALUE_IN_PAREN_TOPLEVEL',
+    'COMPARE_VALUE', 'FILEPATH', 'REDIRECT_TARGET', 'VARIABLE_NAME', 'FOR_RANGE_TEXT', 'FOR_RANGE_SET',
+    'DQUOTE_STRING', 'SQUOTE_STRING',
+])
+
+# %VAR%, %VAR:~n,m%, %VAR:a=b% and the same with ! (same expressions as COMPARE_VALUE in grammar.lark).
+# %% (escaped % and FOR parameters), %1 and %~dp0 are matched to be skipped.
+VARIABLE_REFERENCE = re.compile(r'''
+     %%
+    |%~[a-z$:]*[0-9]
+    |%[0-9*]
+    |%(?P<percent_name>[^%:~ \t\r\n]+)
+      (?:
+         :~-?[0-9]+(?:,-?[0-9]+)?                        # Substring (%VAR:~0,5%)
+        |:[^=%\r\n]+=[^%\r\n]*                           # Variable substitution (%VAR:"='%)
+      )?
+     %
+    |!(?P<delayed_name>[^!:~ \t\r\n]+)
+      (?:
+         :~-?[0-9]+(?:,-?[0-9]+)?                        # Substring (!VAR:~0,5!)
+        |:[^=!\r\n]+=[^!\r\n]*                           # Variable substitution (!VAR:"='!)
+      )?
+     !
+''', re.VERBOSE | re.IGNORECASE)
+
+# Variable names in a SET /A expression, which are used without % (hexadecimal and octal numbers excluded)
+EXPRESSION_NAME = re.compile(r'(?<![0-9A-Za-z_])[A-Za-z_][0-9A-Za-z_]*')
+# Other assignments of a SET /A expression (SET /A X=1, Y+=2 and SET /A "X=1", "Y+=2")
+EXPRESSION_ASSIGNMENT = re.compile(r',\s*"?([A-Za-z_][0-9A-Za-z_]*)\s*(?:[-+*/%&|^]|<<|>>)?=(?!=)')
+# Operator of a compound assignment, lexed as the end of VARIABLE_NAME (SET /A X+=1)
+ASSIGNMENT_OPERATOR = re.compile(r'(?:[-+*/%&|^]|<<|>>)$')
+
+class VariableIndex:
+    """
+    Index of the definitions (SET) and the references (%VAR%, !VAR!, ...) of the variables of a script,
+    built in one pass by build_variable_index(). Variable names are case-insensitive.
+
+    definitions: dict of the key (case-folded name) to the list of its Definitions, in statement order.
+    references: dict of the key to the list of its References, in statement order.
+    """
+
+    def __init__(self, definitions, references):
+        self.definitions = definitions
+        self.references = references
+
+    def definitions_of(self, name):
+        return self.definitions.get(name.casefold(), [])
+
+    def references_to(self, name):
+        return self.references.get(name.casefold(), [])
+
+    def undefined(self):
+        """Returns the keys of the variables that are used but not set in the script (e.g. set by the caller)."""
+        return sorted(key for key in self.references if key not in self.definitions)
+
+    def unused(self):
+        """Returns the keys of the variables that are set but never used in the script."""
+        return sorted(key for key in self.definitions if key not in self.references)
+
+def build_variable_index(tree):
+    """Returns the VariableIndex of a program Tree (or any Tree), walking the tree once."""
+    definitions = {}
+    references = {}
+
+    def add_reference(name, text, token, offset):
+        line, column = get_position(token, offset)
+        reference = Reference(name, name.casefold(), text, line, column, token.start_pos + offset)
+        references.setdefault(reference.key, []).append(reference)
+
+    def add_definition(name, kind, value, token, offset=0):
+        line, column = get_position(token, offset)
+        definition = Definition(name, name.casefold(), kind, value, line, column, token.start_pos + offset)
+        definitions.setdefault(definition.key, []).append(definition)
+
+    # Depth-first in script order, without recursion (deeply nested groups)
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        data = node.data
+        tokens = [child for child in node.children if not hasattr(child, 'data')]
+        types = [token.type for token in tokens]
+        if data in ('command_set', 'command_set_expr') and 'VARIABLE_NAME' in types:
+            name_token = tokens[types.index('VARIABLE_NAME')]
+            value_token = next((token for token in tokens if token.type.startswith('ARG_VALUE_IN_SET')), None)
+            value = str(value_token) if value_token is not None else ''
+            # SET "VAR=value", SET /A "X=Y+1"
+            name = str(name_token)
+            offset = 0
+            if name.startswith('"'):
+                offset = 1
+                value = value.rsplit('"', 1)[0]
+            if data == 'command_set_expr':
+                add_definition(ASSIGNMENT_OPERATOR.sub('', name[offset:]).strip(), 'set_a', value, name_token, offset)
+                if value_token is not None:
+                    add_expression_names(value_token, len(value), add_definition, add_reference)
+            else:
+                add_definition(name[offset:], 'set_p' if 'OPTION_P' in types else 'set', value, name_token, offset)
+        elif data in ('test_defined', 'test_not_defined'):
+            token = next(token for token in tokens if token.type in ('IDENTIFIER', 'ARG1'))
+            if token.type == 'IDENTIFIER':
+                add_reference(str(token), str(token), token, 0)
+        for token in tokens:
+            if token.type in REFERENCE_TOKEN_TYPES:
+                for match in VARIABLE_REFERENCE.finditer(token):
+                    name = match.group('percent_name') or match.group('delayed_name')
+                    if name:
+                        add_reference(name, match.group(), token, match.start())
+        stack.extend(child for child in reversed(node.children) if hasattr(child, 'data'))
+    return VariableIndex(definitions, references)
+
+def add_expression_names(token, end, add_definition, add_reference):
+    """
+    Adds the variables assigned and used without % in a SET /A expression.
+    end: length of the expression in the token (the text after the closing quote of SET /A "X=1" is not part of it).
+    """
+    text = str(token)
+    # %VAR% references are added with the other tokens
+    masked = VARIABLE_REFERENCE.sub(lambda match: ' ' * len(match.group()), text[:end]) + ' ' * (len(text) - end)
+    assigned = set()
+    for match in EXPRESSION_ASSIGNMENT.finditer(masked):
+        add_definition(match.group(1), 'set_a', text, token, match.start(1))
+        assigned.add(match.start(1))
+    for match in EXPRESSION_NAME.finditer(masked):
+        if match.start() not in assigned:
+            add_reference(match.group(), match.group(), token, match.start())
+
+def get_position(token, offset):
+    """Returns the line and column of a character of a token (a quoted string may span lines)."""
+    newline = token.rfind('\n', 0, offset)
+    if newline < 0:
+        return token.line, token.column + offset
+    return token.line + token.count('\n', 0, offset), offset - newline
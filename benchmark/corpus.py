@@ -0,0 +1,45 @@
+# Input scripts shared by the benchmarks
+
+import glob
+import re
+
+def load_sample():
+    """Returns the text of sample/input.cmd."""
+    with open('./sample/input.cmd', 'r', encoding='utf-8') as a_file:
+        return a_file.read()
+
+def load_unittest_snippets():
+    """Returns the input scripts embedded in unittest/grammer_*_test.py."""
+    snippets = []
+    for filepath in sorted(glob.glob('./unittest/grammer_*_test.py')):
+        with open(filepath, 'r', encoding='utf-8') as a_file:
+            snippets += re.findall(r'inputfile_text = """(.*?)"""', a_file.read(), re.DOTALL)
+    return snippets
+
+def concat_snippets(snippets, repeat=1):
+    """Joins the snippets into one large script."""
+    return ''.join(snippet.strip("\n") + "\n" for snippet in snippets) * repeat
+
+def nested_script(depth):
+    """Returns a script with IF and FOR blocks nested depth times."""
+    lines = []
+    for i in range(depth):
+        indent = '    ' * i
+        if i % 2 == 0:
+            lines.append('%sIF "%%FLG%d%%" == "1" (' % (indent, i))
+        else:
+            lines.append('%sFOR /F "delims= " %%%%i IN ("%d 2 3") DO (' % (indent, i))
+    lines.append('%sECHO %%%%i >> %%OUTPUT_LOG%%' % ('    ' * depth))
+    for i in reversed(range(depth)):
+        lines.append('%s)' % ('    ' * i))
+    return '\n'.join(lines) + '\n'
+
+def long_set_script(length, count=10):
+    """Returns a script with SET commands whose values are length characters long."""
+    value = ('%VAR:~0,5%\\path\\to\\dir' * (length // 22 + 1))[:length]
+    return ''.join('SET VARIABLE%d=%s\n' % (i, value) for i in range(count))
+
+def long_rem_script(num_continuations, count=10):
+    """Returns a script with REM lines continued num_continuations times by a caret."""
+    rem = 'REM ' + '^\n'.join('continued comment line %d ' % i for i in range(num_continuations + 1))
+    return ''.join(rem + '\n' for _ in range(count))
@@ -0,0 +1,53 @@
+# Lists the terminals and rules that take the most time to parse a file or a corpus
+#
+#   python -m benchmark.lexer_profile ./sample/input.cmd
+#   python -m benchmark.lexer_profile ./scripts '**/*.bat' --top 10
+#   python -m benchmark.lexer_profile            (sample, unittest snippets and synthetic scripts)
+
+import argparse
+import sys
+from benchmark.corpus import load_sample, load_unittest_snippets
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+from MsDosParallelParser import expand_paths
+
+def load_scripts(paths):
+    """Returns the texts of the files, or the default corpus without paths."""
+    if not paths:
+        return [load_sample()] + load_unittest_snippets() + [generate_script(2000, seed) for seed in range(3)]
+    scripts = []
+    for path in expand_paths(paths):
+        with open(path, 'r', encoding='utf-8') as a_file:
+            scripts.append(a_file.read())
+    return scripts
+
+def profile_scripts(scripts, parser_kwargs=None, warmup=True):
+    """Parses the scripts with a profiling parser and returns its ParserProfile."""
+    parser = MsDosCommandParser(profile=True, **(parser_kwargs or {})).build_parser()
+    if warmup:
+        # The lexer compiles its regular expressions on first use, which is not what we want to measure
+        for inputfile_text in scripts:
+            try:
+                parser.parse(inputfile_text)
+            except Exception:
+                pass
+        parser.profile.reset()
+    for inputfile_text in scripts:
+        try:
+            parser.parse(inputfile_text)
+        except Exception as e:
+            print('%s: %s' % (type(e).__name__, str(e).splitlines()[0]), file=sys.stderr)
+    return parser.profile
+
+def main():
+    argparser = argparse.ArgumentParser(description='Profiles the lexer terminals and the rules')
+    argparser.add_argument('paths', nargs='*', help='files, directories or glob patterns (default: built-in corpus)')
+    argparser.add_argument('--top', type=int, default=20, help='number of terminals and rules to list (default: 20)')
+    argparser.add_argument('--ast', action='store_true', help='profile the MsDosAst builder instead of lark Trees')
+    args = argparser.parse_args()
+
+    profile = profile_scripts(load_scripts(args.paths), {'ast': args.ast})
+    print(profile.report(args.top))
+
+if __name__ == '__main__':
+    main()
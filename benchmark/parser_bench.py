@@ -0,0 +1,141 @@
+# Benchmark of grammar.lark: parser build time, throughput and per-file latency
+#
+#   python -m benchmark.parser_bench -o before.json
+#   (edit grammar.lark)
+#   python -m benchmark.parser_bench -o after.json --compare before.json
+#
+# The results are stored as JSON so that runs on different commits can be compared.
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import time
+from benchmark.corpus import (load_sample, load_unittest_snippets, long_rem_script, long_set_script,
+                              nested_script)
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+
+MODES = {
+    'tree': {},
+    'drop_whitespace': {'drop_whitespace': True},
+    'ast': {'ast': True},
+    'comment_fast_path': {'comment_fast_path': True},
+}
+
+def get_corpora(scale):
+    """Returns the corpora as a list of (name, list of scripts)."""
+    return [
+        ('sample', [load_sample()]),
+        ('unittest_snippets', load_unittest_snippets()),
+        ('nested_if_for', [nested_script(depth) * scale for depth in (10, 30, 60)]),
+        ('long_set', [long_set_script(length, count=scale) for length in (1000, 10000, 50000)]),
+        ('long_rem_caret', [long_rem_script(continuations, count=scale) for continuations in (10, 100, 500)]),
+        ('synthetic', [generate_script(scale * 100, seed) for seed in range(5)]),
+    ]
+
+def percentile(sorted_values, ratio):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * ratio))]
+
+def measure_build(parser_kwargs, repeat):
+    """Returns the time to build the parser from grammar.lark (without any cache)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        MsDosCommandParser(**parser_kwargs).build_parser()
+        timings.append(time.perf_counter() - start)
+    return {'min_s': min(timings), 'median_s': statistics.median(timings)}
+
+def measure_corpus(parser, scripts, repeat):
+    """Parses every script repeat times and returns the throughput and the latency per script."""
+    latencies = []
+    for _ in range(repeat):
+        for inputfile_text in scripts:
+            start = time.perf_counter()
+            parser.parse(inputfile_text)
+            latencies.append(time.perf_counter() - start)
+    total_time = sum(latencies)
+    num_bytes = sum(len(inputfile_text.encode('utf-8')) for inputfile_text in scripts) * repeat
+    num_lines = sum(inputfile_text.count('\n') for inputfile_text in scripts) * repeat
+    latencies.sort()
+    return {
+        'files': len(scripts),
+        'bytes': num_bytes // repeat,
+        'lines': num_lines // repeat,
+        'total_s': total_time,
+        'bytes_per_s': num_bytes / total_time,
+        'lines_per_s': num_lines / total_time,
+        'latency_p50_ms': percentile(latencies, 0.50) * 1000,
+        'latency_p90_ms': percentile(latencies, 0.90) * 1000,
+        'latency_p99_ms': percentile(latencies, 0.99) * 1000,
+        'latency_max_ms': latencies[-1] * 1000,
+    }
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results, base=None):
+    print("build: %.3f s (min), %.3f s (median)" % (results['build']['min_s'], results['build']['median_s']))
+    print("%-18s %6s %10s %12s %12s %10s %10s %10s" % (
+        'corpus', 'files', 'lines', 'KB/s', 'lines/s', 'p50[ms]', 'p99[ms]', 'max[ms]'))
+    for name, corpus in results['corpora'].items():
+        print("%-18s %6d %10d %12.1f %12.1f %10.2f %10.2f %10.2f" % (
+            name, corpus['files'], corpus['lines'], corpus['bytes_per_s'] / 1024, corpus['lines_per_s'],
+            corpus['latency_p50_ms'], corpus['latency_p99_ms'], corpus['latency_max_ms']))
+        if base and name in base['corpora']:
+            base_corpus = base['corpora'][name]
+            print("%-18s %6s %10s %11.2fx %11.2fx %9.2fx %9.2fx %9.2fx" % (
+                '  vs %s' % (base.get('commit') or 'base'), '', '',
+                corpus['bytes_per_s'] / base_corpus['bytes_per_s'],
+                corpus['lines_per_s'] / base_corpus['lines_per_s'],
+                corpus['latency_p50_ms'] / base_corpus['latency_p50_ms'],
+                corpus['latency_p99_ms'] / base_corpus['latency_p99_ms'],
+                corpus['latency_max_ms'] / base_corpus['latency_max_ms']))
+
+def main():
+    argparser = argparse.ArgumentParser(description='Benchmark of grammar.lark')
+    argparser.add_argument('-m', '--mode', choices=sorted(MODES), default='tree', help='parser output (default: tree)')
+    argparser.add_argument('-n', '--repeat', type=int, default=3, help='number of times each script is parsed')
+    argparser.add_argument('-s', '--scale', type=int, default=20, help='size factor of the generated scripts')
+    argparser.add_argument('--build-repeat', type=int, default=3, help='number of times the parser is built')
+    argparser.add_argument('-o', '--output', help='JSON file to write the results to')
+    argparser.add_argument('--compare', help='JSON file of a previous run to compare with')
+    args = argparser.parse_args()
+
+    parser_kwargs = MODES[args.mode]
+    results = {
+        'commit': get_commit(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'mode': args.mode,
+        'repeat': args.repeat,
+        'scale': args.scale,
+        'build': measure_build(parser_kwargs, args.build_repeat),
+        'corpora': {},
+    }
+    parser = MsDosCommandParser(**parser_kwargs).get_parser()
+    corpora = get_corpora(args.scale)
+    for name, scripts in corpora:
+        # The contextual lexers are built on first use, so warm them up before measuring
+        measure_corpus(parser, scripts, 1)
+    for name, scripts in corpora:
+        results['corpora'][name] = measure_corpus(parser, scripts, args.repeat)
+
+    base = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as a_file:
+            base = json.load(a_file)
+    print_results(results, base)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as a_file:
+            json.dump(results, a_file, indent=2)
+
+if __name__ == '__main__':
+    main()
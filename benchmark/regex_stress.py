@@ -0,0 +1,108 @@
+# Stress harness for the regular expressions of the terminals in grammar.lark
+#
+#   python -m benchmark.regex_stress
+#   python -m benchmark.regex_stress --sizes 1000 4000 16000 --terminal ARG_VALUE_IN_PAREN
+#
+# Each terminal is matched against pathological inputs of growing length. The growth exponent
+# is log(time ratio) / log(length ratio): about 1 for linear matching, 2 or more for super-linear.
+
+import argparse
+import math
+import time
+import regex  # pip install regex
+from MsDosCommandParser import MsDosCommandParser
+
+# Pathological inputs by name: function of the length
+INPUTS = {
+    'open_parens': lambda n: '(' * n,
+    'close_parens': lambda n: ')' * n,
+    'nested_parens': lambda n: '(' * (n // 2) + ')' * (n // 2),
+    'unclosed_nested_parens': lambda n: '(' * (n // 2) + 'a' + ')' * (n // 2 - 1),
+    'paren_words': lambda n: '(a ' * (n // 3),
+    'quotes': lambda n: '"' * n,
+    'unclosed_quote': lambda n: '"' + 'a' * (n - 1),
+    'quoted_words': lambda n: '"a" ' * (n // 4),
+    'percents': lambda n: '%' * n,
+    'percent_words': lambda n: '%a' * (n // 2),
+    'percent_colons': lambda n: '%a:' * (n // 3),
+    'percent_tildes': lambda n: '%~' * (n // 2),
+    'bangs': lambda n: '!a' * (n // 2),
+    'bang_colons': lambda n: '!a:b=' * (n // 5),
+    'carets': lambda n: '^' * n,
+    'caret_newlines': lambda n: '^\n' * (n // 2),
+    'equals': lambda n: '=' * n,
+    'redirects': lambda n: '>' * n,
+    'digits': lambda n: '12' * (n // 2),
+    'spaces': lambda n: 'a ' * (n // 2),
+    'letters': lambda n: 'a' * n,
+    'mixed': lambda n: ('(%a:"=(!b!^' * (n // 11 + 1))[:n],
+}
+
+def get_terminal_regexps(parser):
+    """Returns (name, compiled regex) of every terminal, compiled as the lexer does."""
+    terminals = []
+    for terminal in parser.terminals:
+        flags = 0
+        for flag in terminal.pattern.flags:
+            flags |= getattr(regex, flag.upper())
+        terminals.append((terminal.name, regex.compile(terminal.pattern.to_regexp(), flags)))
+    return terminals
+
+def measure_match(compiled, text, repeat=3, clock=time.perf_counter):
+    """Returns the shortest time to match the regex at the beginning of the text."""
+    best = None
+    for _ in range(repeat):
+        start = clock()
+        compiled.match(text, 0)
+        elapsed = clock() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def growth_exponent(sizes, timings):
+    """Returns the exponent k of time ~ length^k between the smallest and the largest size (None for one size)."""
+    if len(sizes) < 2:
+        return None
+    # Timings below the clock resolution say nothing about the growth
+    low = max(timings[0], 1e-6)
+    high = max(timings[-1], 1e-6)
+    return math.log(high / low) / math.log(sizes[-1] / sizes[0])
+
+def stress_terminals(sizes=(1000, 4000, 16000), names=None, parser=None, clock=time.perf_counter):
+    """
+    Matches each terminal against each pathological input.
+    Returns a list of dicts (terminal, input, timings, exponent), the worst first.
+    clock: time function (e.g. time.process_time, which does not count the time of the other processes).
+    """
+    parser = parser or MsDosCommandParser().get_parser()
+    results = []
+    for name, compiled in get_terminal_regexps(parser):
+        if names and name not in names:
+            continue
+        for input_name, make_input in INPUTS.items():
+            timings = [measure_match(compiled, make_input(size), clock=clock) for size in sizes]
+            results.append({
+                'terminal': name,
+                'input': input_name,
+                'timings': timings,
+                'exponent': growth_exponent(sizes, timings),
+            })
+    results.sort(key=lambda result: result['timings'][-1], reverse=True)
+    return results
+
+def main():
+    argparser = argparse.ArgumentParser(description='Stress test of the terminal regular expressions')
+    argparser.add_argument('--sizes', type=int, nargs='+', default=[1000, 4000, 16000], help='input lengths')
+    argparser.add_argument('--terminal', action='append', help='terminal to test (default: all)')
+    argparser.add_argument('--top', type=int, default=20, help='number of results to print (default: 20)')
+    args = argparser.parse_args()
+
+    results = stress_terminals(args.sizes, args.terminal)
+    print("%-28s %-24s %s %8s" % ('terminal', 'input', ' '.join('%10s' % ('%d[ms]' % size) for size in args.sizes), 'exponent'))
+    for result in results[:args.top]:
+        exponent = '%.2f' % result['exponent'] if result['exponent'] is not None else '-'
+        print("%-28s %-24s %s %8s" % (result['terminal'], result['input'],
+                                       ' '.join('%10.3f' % (timing * 1000) for timing in result['timings']),
+                                       exponent))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+# Measures how the parse time grows with the size of synthetic scripts
+#
+#   python -m benchmark.scaling_bench --lines 10000 100000 1000000 --seed 1
+
+import argparse
+import time
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+
+def main():
+    argparser = argparse.ArgumentParser(description='Measures the parse time against the script size')
+    argparser.add_argument('--lines', type=int, nargs='+', default=[10000, 30000, 100000])
+    argparser.add_argument('--seed', type=int, default=0)
+    argparser.add_argument('--max-depth', type=int, default=4)
+    argparser.add_argument('-m', '--mode', choices=['tree', 'drop_whitespace', 'ast'], default='tree')
+    args = argparser.parse_args()
+
+    parser_kwargs = {'tree': {}, 'drop_whitespace': {'drop_whitespace': True}, 'ast': {'ast': True}}[args.mode]
+    parser = MsDosCommandParser(**parser_kwargs).get_parser()
+    parser.parse(generate_script(1000, args.seed, args.max_depth))  # Warm up the lexers
+
+    print("%10s %10s %10s %14s" % ('lines', 'KB', 'parse[s]', 'us/line'))
+    for num_lines in args.lines:
+        script = generate_script(num_lines, args.seed, args.max_depth)
+        start = time.perf_counter()
+        parser.parse(script)
+        elapsed = time.perf_counter() - start
+        actual_lines = script.count('\n')
+        print("%10d %10d %10.3f %14.2f" % (actual_lines, len(script) // 1024, elapsed, elapsed / actual_lines * 1e6))
+
+if __name__ == '__main__':
+    main()
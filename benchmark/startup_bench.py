@@ -0,0 +1,65 @@
+# Compares the import and first-parse latency of the parser modes
+#
+#   python build_standalone.py
+#   python -m benchmark.startup_bench [-n REPEAT] [inputfile]
+#
+# Each measurement runs in a fresh Python process, like a short-lived scan job.
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Code run in the child process. Prints the timings as JSON.
+CHILD_CODE = """
+import json, sys, time
+t0 = time.perf_counter()
+from MsDosCommandParser import MsDosCommandParser
+parser = MsDosCommandParser(cache_dir=%(cache_dir)r, standalone=%(standalone)r).get_parser()
+t1 = time.perf_counter()
+with open(%(inputfilepath)r, 'r', encoding='utf-8') as a_file:
+    parser.parse(a_file.read())
+t2 = time.perf_counter()
+print(json.dumps({'startup': t1 - t0, 'first_parse': t2 - t1, 'lark_imported': 'lark' in sys.modules}))
+"""
+
+def run_child(inputfilepath, cache_dir=None, standalone=False):
+    code = CHILD_CODE % {'cache_dir': cache_dir, 'standalone': standalone, 'inputfilepath': inputfilepath}
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    result = json.loads(output)
+    result['process'] = time.perf_counter() - start
+    return result
+
+def main():
+    argparser = argparse.ArgumentParser(description='Compares the import and first-parse latency of the parser modes')
+    argparser.add_argument('-n', '--repeat', type=int, default=5)
+    argparser.add_argument('inputfile', nargs='?', default='./sample/input.cmd')
+    args = argparser.parse_args()
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        run_child(args.inputfile, cache_dir=cache_dir)  # Warm the on-disk cache
+        modes = [
+            ('dynamic', {}),
+            ('cached', {'cache_dir': cache_dir}),
+            ('standalone', {'standalone': True}),
+        ]
+        print("%-12s %12s %12s %12s  %s" % ('mode', 'startup[ms]', 'parse[ms]', 'process[ms]', 'lark imported'))
+        for name, kwargs in modes:
+            results = [run_child(args.inputfile, **kwargs) for _ in range(args.repeat)]
+            print("%-12s %12.1f %12.1f %12.1f  %s" % (
+                name,
+                statistics.median(r['startup'] for r in results) * 1000,
+                statistics.median(r['first_parse'] for r in results) * 1000,
+                statistics.median(r['process'] for r in results) * 1000,
+                results[0]['lark_imported']))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
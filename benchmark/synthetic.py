@@ -0,0 +1,228 @@
+# Seeded generator of large synthetic batch scripts that use every construct of grammar.lark
+#
+#   python -m benchmark.synthetic -n 100000 --seed 1 -o large.cmd
+#
+# The same seed and options always produce the same script.
+
+import argparse
+import random
+import sys
+
+class ScriptGenerator:
+    """Generates a syntactically valid script line by line."""
+
+    def __init__(self, seed=0, max_depth=4, num_variables=50):
+        self.random = random.Random(seed)
+        self.max_depth = max_depth
+        self.num_variables = num_variables
+        self.lines = []
+        self.labels = ['END']
+        self.num_labels = 0
+
+    def generate(self, num_lines):
+        """Returns a script of about num_lines lines (a little more to close the last block)."""
+        self.lines.append('@ECHO OFF')
+        self.lines.append('setlocal ENABLEDELAYEDEXPANSION')
+        while len(self.lines) < num_lines - 1:
+            self.toplevel_statement()
+        self.lines.append(':END')
+        return '\n'.join(self.lines) + '\n'
+
+    # --- Values ---
+
+    def variable_name(self):
+        return 'VAR%d' % self.random.randrange(self.num_variables)
+
+    def variable_reference(self):
+        name = self.variable_name()
+        kind = self.random.randrange(5)
+        if kind == 0:
+            return '%%%s%%' % name
+        if kind == 1:
+            return '%%%s:~%d,%d%%' % (name, self.random.randrange(10), self.random.randrange(1, 10))
+        if kind == 2:
+            return '%%%s:a=b%%' % name
+        if kind == 3:
+            return '!%s!' % name
+        return '%%~%d' % self.random.randrange(1, 10)
+
+    def word(self):
+        return self.random.choice(['alpha', 'beta', 'gamma', 'delta', 'TEST', 'value', '123', '-n', '/q'])
+
+    def text(self):
+        words = [self.variable_reference() if self.random.random() < 0.3 else self.word()
+                 for _ in range(self.random.randint(1, 6))]
+        return ' '.join(words)
+
+    def path(self):
+        return self.random.choice(['%BIN_PATH%\\MyProcess.cmd', '%~dp0..\\bin\\tool.exe', 'c:\\path\\to\\my.exe',
+                                   '"d:\\Program Files\\app\\run.cmd"', '%SHARE_DIR_ROOT%\\path\\%VAR1:~0,5%.bat'])
+
+    def redirects(self):
+        choice = self.random.randrange(6)
+        if choice == 0:
+            return ' > out%d.txt' % self.random.randrange(10)
+        if choice == 1:
+            return ' >> %OUTPUT_LOG% 2>&1'
+        if choice == 2:
+            return ' 2> error.log'
+        return ''
+
+    # --- Commands ---
+
+    def command(self):
+        """Returns a single command without parentheses, valid both at the top level and in groups."""
+        choice = self.random.randrange(10)
+        if choice == 0:
+            return 'SET %s=%s' % (self.variable_name(), self.text())
+        if choice == 1:
+            return 'SET /A %s=%s+%d' % (self.variable_name(), self.variable_reference(), self.random.randrange(100))
+        if choice == 2:
+            return 'ECHO %s%s' % (self.text(), self.redirects())
+        if choice == 3:
+            return 'ECHO ---------- TEST TEXT ---------- >> %OUTPUT_LOG%'
+        if choice == 4:
+            return 'CALL %s %s%s' % (self.path(), self.text(), self.redirects())
+        if choice == 5 and len(self.labels) > 1:
+            return 'CALL :%s %s' % (self.random.choice(self.labels[1:]), self.text())
+        if choice == 6:
+            return 'CD %s' % self.path()
+        if choice == 7:
+            return 'mycommand.exe %s%s' % (self.text(), self.redirects())
+        if choice == 8:
+            return 'GOTO %s' % self.random.choice(self.labels)
+        return 'ECHO.'
+
+    def command_line(self):
+        """Returns commands joined by the chain (&&, ||, &) and pipe (|) operators."""
+        choice = self.random.randrange(8)
+        if choice == 0:
+            return 'ECHO %s | findstr %s' % (self.text(), self.word())
+        if choice == 1:
+            return '%s && %s' % (self.command_without_goto(), self.command_without_goto())
+        if choice == 2:
+            return '%s || %s & %s' % (self.command_without_goto(), self.command_without_goto(), self.command())
+        return self.command()
+
+    def command_without_goto(self):
+        command = self.command()
+        while command.startswith('GOTO'):
+            command = self.command()
+        return command
+
+    # --- Statements ---
+
+    def test(self):
+        choice = self.random.randrange(7)
+        if choice == 0:
+            return '"%s" == "%s"' % (self.variable_reference(), self.word())
+        if choice == 1:
+            return 'NOT "%s"=="%d"' % (self.variable_reference(), self.random.randrange(10))
+        if choice == 2:
+            return '/I "%s" == "%s"' % (self.variable_reference(), self.word())
+        if choice == 3:
+            return '%s %s %d' % (self.variable_reference(), self.random.choice(['EQU', 'NEQ', 'LSS', 'LEQ', 'GTR', 'GEQ']),
+                                  self.random.randrange(100))
+        if choice == 4:
+            return '%sEXIST %s' % (self.random.choice(['', 'NOT ']), self.path())
+        if choice == 5:
+            return '%sDEFINED %s' % (self.random.choice(['', 'NOT ']), self.variable_name())
+        return '%sERRORLEVEL %d' % (self.random.choice(['', 'NOT ']), self.random.randrange(3))
+
+    def for_header(self):
+        variable = '%%%%%s' % self.random.choice('ijkfn')
+        choice = self.random.randrange(5)
+        if choice == 0:
+            source = self.random.choice(["'DATE /T'", '"1 2 3"', '%FILEPATH%', "'CALL %MYDIR%\\MYCOMMAND /param'"])
+            return 'FOR /F "delims= " %s IN (%s) DO' % (variable, source)
+        if choice == 1:
+            return 'FOR /R c:\\path\\to %s IN (*.txt *.log) DO' % variable
+        if choice == 2:
+            return 'FOR /L %s IN (1,1,%d) DO' % (variable, self.random.randrange(2, 100))
+        if choice == 3:
+            return 'FOR /D %s IN (%%SHARE_DIR_ROOT%%\\*) DO' % variable
+        return 'FOR %s IN (a b c %s) DO' % (variable, self.variable_reference())
+
+    def block(self, header, depth, indent, redirect=''):
+        """Appends "header (", the body lines and ")"."""
+        self.lines.append('%s%s (' % (indent, header))
+        self.block_body(depth + 1, indent + '    ')
+        self.lines.append('%s)%s' % (indent, redirect))
+
+    def block_body(self, depth, indent):
+        for _ in range(self.random.randint(1, 4)):
+            self.statement(depth, indent)
+
+    def statement(self, depth, indent):
+        choice = self.random.random()
+        if depth >= self.max_depth or choice < 0.55:
+            if self.random.random() < 0.1:
+                self.lines.append('%sREM %s' % (indent, self.text()))
+            else:
+                self.lines.append(indent + self.command_line())
+        elif choice < 0.75:
+            self.if_statement(depth, indent)
+        elif choice < 0.95:
+            header = self.for_header()
+            if self.random.random() < 0.3:
+                self.lines.append('%s%s %s' % (indent, header, self.command()))
+            else:
+                self.block(header, depth, indent)
+        else:
+            self.lines.append('%s(' % indent)
+            self.block_body(depth + 1, indent + '    ')
+            self.lines.append('%s)%s' % (indent, self.redirects()))
+
+    def if_statement(self, depth, indent):
+        header = 'IF %s' % self.test()
+        if self.random.random() < 0.3:
+            # One line form
+            self.lines.append('%s%s %s' % (indent, header, self.command()))
+            return
+        self.lines.append('%s%s (' % (indent, header))
+        self.block_body(depth + 1, indent + '    ')
+        # ELSE IF chain
+        for _ in range(self.random.choice([0, 0, 1, 2])):
+            self.lines.append('%s) ELSE IF %s (' % (indent, self.test()))
+            self.block_body(depth + 1, indent + '    ')
+        if self.random.random() < 0.5:
+            self.lines.append('%s) ELSE (' % indent)
+            self.block_body(depth + 1, indent + '    ')
+        self.lines.append('%s)' % indent)
+
+    def toplevel_statement(self):
+        choice = self.random.random()
+        if choice < 0.05:
+            # Subroutine
+            self.num_labels += 1
+            label = 'L_SUB%d' % self.num_labels
+            self.lines.append('GOTO %s' % self.random.choice(self.labels))
+            self.lines.append('')
+            self.lines.append(':%s' % label)
+            self.labels.append(label)
+        elif choice < 0.07:
+            self.lines.append('REM ' + ' ^\n'.join(self.text() for _ in range(self.random.randint(2, 5))))
+        else:
+            self.statement(0, '')
+
+def generate_script(num_lines, seed=0, max_depth=4):
+    """Returns a synthetic script of about num_lines lines. The output is deterministic for a given seed."""
+    return ScriptGenerator(seed, max_depth).generate(num_lines)
+
+def main():
+    argparser = argparse.ArgumentParser(description='Generates a synthetic batch script')
+    argparser.add_argument('-n', '--lines', type=int, default=10000, help='number of lines (default: 10000)')
+    argparser.add_argument('--seed', type=int, default=0)
+    argparser.add_argument('--max-depth', type=int, default=4, help='maximum nesting of blocks (default: 4)')
+    argparser.add_argument('-o', '--output', help='output file (default: standard output)')
+    args = argparser.parse_args()
+
+    script = generate_script(args.lines, args.seed, args.max_depth)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as a_file:
+            a_file.write(script)
+    else:
+        sys.stdout.write(script)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# Runs the unittest modules in parallel and lists the tests that spend the most time parsing
+#
+#   python -m benchmark.test_runner
+#   python -m benchmark.test_runner --jobs 4 --top 10
+#   python -m benchmark.test_runner --pattern "grammer_*_test.py" --jobs 1
+
+import argparse
+import concurrent.futures
+import fnmatch
+import io
+import os
+import sys
+import time
+import traceback
+import unittest
+from benchmark.corpus import load_unittest_snippets
+from MsDosCommandParser import MsDosCommandParser
+
+TEST_DIR = './unittest'
+
+class TimingResult(unittest.TextTestResult):
+    """TextTestResult that records the wall-clock time of each test."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.test_times = {}
+
+    def startTest(self, test):
+        self.test_start = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.test_times[test.id()] = time.perf_counter() - self.test_start
+
+def find_test_modules(pattern):
+    """Returns the names of the test modules in TEST_DIR matching the pattern."""
+    return sorted(os.path.splitext(filename)[0] for filename in os.listdir(TEST_DIR)
+                  if fnmatch.fnmatch(filename, pattern))
+
+_warmed_up = False
+
+def warm_up():
+    """
+    Parses the unittest snippets once per process: the contextual lexers are built on first use,
+    which would otherwise be counted in the parse time of the first test reaching each of them.
+    """
+    global _warmed_up
+    if not _warmed_up:
+        parser = MsDosCommandParser().get_parser()
+        for inputfile_text in load_unittest_snippets():
+            try:
+                parser.parse(inputfile_text)
+            except Exception:
+                pass
+        _warmed_up = True
+
+def run_test_module(module_name):
+    """
+    Runs the tests of one module (in a worker process) and returns a dict with the counts, the failure reports,
+    the time of each test and the parse time of each test (GrammerTestCase tests only).
+    """
+    test_dir = os.path.abspath(TEST_DIR)
+    if test_dir not in sys.path:
+        sys.path.insert(0, test_dir)
+    import grammer_test_case
+    grammer_test_case.parse_times.clear()
+    warm_up()
+
+    stream = io.StringIO()
+    runner = unittest.TextTestRunner(stream=stream, resultclass=TimingResult, verbosity=0)
+    try:
+        suite = unittest.defaultTestLoader.loadTestsFromName(module_name)
+        result = runner.run(suite)
+    except Exception:
+        return {'module': module_name, 'tests': 0, 'failures': [], 'skipped': 0,
+                'errors': [(module_name, traceback.format_exc())], 'test_times': {}, 'parse_times': {}}
+    return {
+        'module': module_name,
+        'tests': result.testsRun,
+        'failures': [(test.id(), report) for test, report in result.failures] +
+                    [(test.id(), 'Unexpected success') for test in result.unexpectedSuccesses],
+        'errors': [(test.id(), report) for test, report in result.errors],
+        'skipped': len(result.skipped),
+        'test_times': result.test_times,
+        'parse_times': dict(grammer_test_case.parse_times),
+    }
+
+def run_tests(module_names, jobs=None):
+    """Runs the test modules, in worker processes unless jobs is 1, and yields their results as they finish."""
+    if jobs == 1:
+        for module_name in module_names:
+            yield run_test_module(module_name)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        futures = [executor.submit(run_test_module, module_name) for module_name in module_names]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+def format_report(results, top=20):
+    """Returns the failures, the slowest tests by parse time and the totals as text."""
+    lines = []
+    for result in results:
+        for test_id, report in result['failures'] + result['errors']:
+            lines.append('=' * 70)
+            lines.append('FAIL: %s' % test_id)
+            lines.append('-' * 70)
+            lines.append(report)
+
+    test_times = {}
+    parse_times = {}
+    for result in results:
+        test_times.update(result['test_times'])
+        parse_times.update(result['parse_times'])
+    if parse_times:
+        lines.append("%-72s %10s %10s" % ('test', 'parse[ms]', 'total[ms]'))
+        for test_id, seconds in sorted(parse_times.items(), key=lambda item: item[1], reverse=True)[:top]:
+            lines.append("%-72s %10.2f %10.2f" % (test_id, seconds * 1000, test_times.get(test_id, 0.0) * 1000))
+        lines.append('')
+
+    num_tests = sum(result['tests'] for result in results)
+    num_failed = sum(len(result['failures']) + len(result['errors']) for result in results)
+    num_skipped = sum(result['skipped'] for result in results)
+    lines.append('Ran %d tests in %d modules: %s (parse %.2f s in %d tests)' % (
+        num_tests, len(results), 'FAILED (%d)' % num_failed if num_failed else 'OK',
+        sum(parse_times.values()), len(parse_times)))
+    if num_skipped:
+        lines[-1] += ', %d skipped' % num_skipped
+    return '\n'.join(lines)
+
+def main():
+    argparser = argparse.ArgumentParser(description='Runs the unittest modules in parallel with per-test parse times')
+    argparser.add_argument('--pattern', default='*_test.py', help='test module file pattern (default: *_test.py)')
+    argparser.add_argument('--jobs', type=int, default=None, help='number of worker processes (default: number of CPUs)')
+    argparser.add_argument('--top', type=int, default=20, help='number of tests to list by parse time (default: 20)')
+    args = argparser.parse_args()
+
+    start = time.perf_counter()
+    results = []
+    for result in run_tests(find_test_modules(args.pattern), args.jobs):
+        failed = len(result['failures']) + len(result['errors'])
+        print('%-40s %4d tests %s' % (result['module'], result['tests'], 'FAILED' if failed else 'ok'), file=sys.stderr)
+        results.append(result)
+    results.sort(key=lambda result: result['module'])
+    print(format_report(results, args.top))
+    print('Wall time %.2f s' % (time.perf_counter() - start))
+    sys.exit(1 if any(result['failures'] or result['errors'] for result in results) else 0)
+
+if __name__ == '__main__':
+    main()
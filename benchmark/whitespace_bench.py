@@ -0,0 +1,59 @@
+# Compares the tree size with and without MsDosCommandParser(drop_whitespace=True)
+#
+#   python -m benchmark.whitespace_bench [-r REPEAT]
+
+import argparse
+import gc
+import time
+import tracemalloc
+from benchmark.corpus import concat_snippets, load_sample, load_unittest_snippets
+from MsDosCommandParser import MsDosCommandParser
+
+def count_nodes(tree):
+    """Returns the number of trees and tokens."""
+    num_trees = 0
+    num_tokens = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if hasattr(node, 'data'):
+            num_trees += 1
+            stack.extend(node.children)
+        else:
+            num_tokens += 1
+    return num_trees, num_tokens
+
+def measure(parser, inputfile_text):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = parser.parse(inputfile_text)
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count_nodes(tree) + (memory, elapsed)
+
+def main():
+    argparser = argparse.ArgumentParser(description='Compares the tree size with and without dropping whitespace')
+    argparser.add_argument('-r', '--repeat', type=int, default=200, help='repetitions of the snippets in the large corpus')
+    args = argparser.parse_args()
+
+    parsers = [
+        ('keep', MsDosCommandParser().get_parser()),
+        ('drop', MsDosCommandParser(drop_whitespace=True).get_parser()),
+    ]
+    corpora = [
+        ('sample/input.cmd', load_sample()),
+        ('snippets x%d' % args.repeat, concat_snippets(load_unittest_snippets(), args.repeat)),
+    ]
+    for _, parser in parsers:
+        parser.parse(corpora[0][1])  # Warm up the lexers
+    print("%-20s %-6s %10s %10s %12s %10s" % ('corpus', 'ws', 'trees', 'tokens', 'memory[KB]', 'parse[s]'))
+    for corpus_name, inputfile_text in corpora:
+        for parser_name, parser in parsers:
+            num_trees, num_tokens, memory, elapsed = measure(parser, inputfile_text)
+            print("%-20s %-6s %10d %10d %12.1f %10.3f" % (
+                corpus_name, parser_name, num_trees, num_tokens, memory / 1024, elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+# Generates a standalone parser module from grammar.lark
+#
+#   python build_standalone.py
+#
+# The generated module contains the precomputed LALR tables, so that
+# MsDosCommandParser(standalone=True) can parse without importing lark
+# and without compiling the grammar.
+
+from lark.tools.standalone import gen_standalone  # pip install lark-parser regex
+from MsDosCommandParser import MsDosCommandParser
+
+transpiler = MsDosCommandParser()
+grammar_main = transpiler.read_grammar()
+parser = transpiler.build_parser()
+MsDosCommandParser.fix_regexp_widths(parser)
+
+outputfilepath = "./%s.py" % MsDosCommandParser.standalone_module
+
+with open(outputfilepath, 'w', encoding='utf-8') as a_file:
+    gen_standalone(parser, out=a_file, compress=True)
+    # Used to detect that the module is outdated after editing grammar.lark
+    print("GRAMMAR_DIGEST = %r" % transpiler.get_grammar_digest(grammar_main), file=a_file)
+
+print("Generated %s" % outputfilepath)
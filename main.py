@@ -1,18 +1,105 @@
-
 # MSDOS command parser
+#
+#   python main.py ./sample/input.cmd
+#   python main.py --format jsonl --jobs 8 --stats ./scripts '**/*.bat'
+#   type input.cmd | python main.py
 
-import re
+import argparse
+import json
+import sys
+import time
 from MsDosCommandParser import MsDosCommandParser
+from MsDosParallelParser import ParseResult, parse_files
+from MsDosParseLimits import LimitedParser
+from MsDosTreeWriter import tree_to_json, tree_to_pretty
+
+def parse_stdin(parser_kwargs, limits=None):
+    """Parses the standard input and yields its ParseResult."""
+    inputfile_text = sys.stdin.read()
+    try:
+        parser = MsDosCommandParser(**parser_kwargs).get_parser()
+        if limits:
+            parser = LimitedParser(parser, **limits)
+        tree = parser.parse(inputfile_text)
+        yield ParseResult('-', tree, None)
+    except Exception as e:
+        yield ParseResult('-', None, '%s: %s' % (type(e).__name__, e))
+
+def write_results(results, output_format, out):
+    """Writes each ParseResult as soon as it is available. Returns the number of files and errors."""
+    num_files = 0
+    num_errors = 0
+    if output_format == 'json':
+        out.write('[')
+    for result in results:
+        if result.error is not None:
+            num_errors += 1
+            print('%s: %s' % (result.path, result.error), file=sys.stderr)
+        if output_format == 'pretty':
+            if result.tree is not None:
+                if num_files:
+                    out.write('\n')
+                tree_to_pretty(result.tree, out)
+        else:
+            if output_format == 'json':
+                out.write(',\n' if num_files else '\n')
+            out.write('{"path": %s' % json.dumps(result.path, ensure_ascii=False))
+            if result.tree is not None:
+                out.write(', "tree": ')
+                tree_to_json(result.tree, out)
+            else:
+                out.write(', "error": %s' % json.dumps(result.error, ensure_ascii=False))
+            out.write('}')
+            if output_format == 'jsonl':
+                out.write('\n')
+        out.flush()
+        num_files += 1
+    if output_format == 'json':
+        out.write('\n]\n')
+    return num_files, num_errors
 
-inputfilepath = "./sample/input.cmd"
+def main(argv=None):
+    argparser = argparse.ArgumentParser(description='Parses MS-DOS batch files and prints their parse trees.')
+    argparser.add_argument('paths', nargs='*',
+                           help='files, directories or glob patterns (reads the standard input when omitted or "-")')
+    argparser.add_argument('-f', '--format', choices=['pretty', 'json', 'jsonl'], default='pretty',
+                           help='output format (default: pretty)')
+    argparser.add_argument('-j', '--jobs', type=int, default=1,
+                           help='number of worker processes (0: number of CPUs, default: 1)')
+    argparser.add_argument('--ordered', action='store_true',
+                           help='with --jobs, write the results in input order')
+    argparser.add_argument('--cache-dir', default=None,
+                           help='directory of the on-disk parser cache')
+    argparser.add_argument('--result-cache', default=None,
+                           help='directory of the parse result cache (unchanged files are not parsed again)')
+    argparser.add_argument('--max-bytes', type=int, default=None,
+                           help='reject the files larger than this number of bytes')
+    argparser.add_argument('--max-line-length', type=int, default=None,
+                           help='reject the files with a longer line (caret-continued lines count as one)')
+    argparser.add_argument('--max-depth', type=int, default=None,
+                           help='reject the files with parentheses nested deeper than this')
+    argparser.add_argument('--timeout', type=float, default=None,
+                           help='stop parsing a file after this number of seconds')
+    argparser.add_argument('--stats', action='store_true',
+                           help='print the number of files and the elapsed time to the standard error')
+    args = argparser.parse_args(argv)
 
-with open(inputfilepath, 'r', encoding='utf-8') as a_file:
-    inputfile_text = a_file.read()
+    parser_kwargs = {'cache_dir': args.cache_dir}
+    limits = {name: getattr(args, name) for name in ('max_bytes', 'max_line_length', 'max_depth', 'timeout')
+              if getattr(args, name) is not None}
+    start = time.perf_counter()
+    if not args.paths or args.paths == ['-']:
+        results = parse_stdin(parser_kwargs, limits)
+    else:
+        results = parse_files(args.paths, jobs=args.jobs or None, ordered=args.ordered or args.jobs == 1,
+                              parser_kwargs=parser_kwargs, result_cache_dir=args.result_cache, limits=limits)
+    num_files, num_errors = write_results(results, args.format, sys.stdout)
+    elapsed = time.perf_counter() - start
 
-# Create parser
-parser = MsDosCommandParser().get_parser()
-ast_tree = parser.parse(inputfile_text)
-str_ast_tree = ast_tree.pretty()
-str_ast_tree = '\n'.join(line for line in str_ast_tree.split("\n") if not re.match(r'^\s*$', line))
+    if args.stats:
+        print('files: %d, errors: %d, elapsed: %.3f s, %.1f files/s' % (
+            num_files, num_errors, elapsed, num_files / elapsed if elapsed else 0.0), file=sys.stderr)
+    return 1 if num_errors else 0
 
-print(str_ast_tree)
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from MsDosAst import *
+from MsDosCommandParser import MsDosCommandParser
+
+class MsDosCmdAstTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        transpiler = MsDosCommandParser(ast=True)
+        self.parser = transpiler.get_parser()
+
+    # ------------------------------------------------------------------------
+    def test_ast_set_and_rem(self):
+        inputfile_text = """
+REM comment
+
+SET /P MY_VARIABLE=%~dp0
+SET /A COUNT=%COUNT%+1
+SET
+"""
+        expected_ast = Program([
+            Rem('comment'),
+            Set('MY_VARIABLE', '%~dp0', prompt=True),
+            SetExpr('COUNT', '%COUNT%+1'),
+            SetDisplay(None),
+        ])
+        self.assertEqual(self.parser.parse(inputfile_text), expected_ast)
+
+    # ------------------------------------------------------------------------
+    def test_ast_if_else(self):
+        inputfile_text = """
+IF /I "%INPUT%" == "N" (GOTO L_CANCEL) ELSE IF NOT EXIST c:\\my.exe (GOTO :L_CHECK) ELSE GOTO END
+IF NOT DEFINED MY_VARIABLE echo OK
+IF ERRORLEVEL 1 echo NG
+"""
+        expected_ast = Program([
+            If(CompareTest('"%INPUT%"', '==', '"N"', ignore_case=True),
+               Group([Goto('L_CANCEL')]),
+               If(ExistTest('c:\\my.exe', negate=True), Group([Goto('L_CHECK')]), Goto('END'))),
+            If(DefinedTest('MY_VARIABLE', negate=True), Echo('OK')),
+            If(ErrorLevelTest(1), Echo('NG')),
+        ])
+        self.assertEqual(self.parser.parse(inputfile_text), expected_ast)
+
+    # ------------------------------------------------------------------------
+    def test_ast_for(self):
+        inputfile_text = """
+FOR /F "delims= " %%i IN ('DATE /T') DO SET YMD=%%i
+FOR /R C:\\dir %%f IN (*.txt) DO echo %%f
+FOR /L %%n IN (1,1,10) DO echo %%n
+FOR /D /R %%d IN (*) DO echo %%d
+FOR %%x IN (a b c) DO (
+    echo %%x
+)
+"""
+        expected_ast = Program([
+            ForF('"delims= "', '%%i', 'command', "'DATE /T'", Set('YMD', '%%i')),
+            ForR('C:\\dir', '%%f', '*.txt', Echo('%%f')),
+            ForL('%%n', '1', '1', '10', Echo('%%n')),
+            ForD(True, '%%d', '*', Echo('%%d')),
+            For('%%x', 'a b c', Group([Echo('%%x')])),
+        ])
+        self.assertEqual(self.parser.parse(inputfile_text), expected_ast)
+
+    # ------------------------------------------------------------------------
+    def test_ast_command_line(self):
+        inputfile_text = """
+:SUBROUTINE+
+CALL :SUBROUTINE %1 && echo 123 || echo 456
+echo aaa | MYCOMMAND.exe -n 1 2>> error.log
+CALL %BIN_PATH%\\MyProcess.cmd > out.txt
+CD
+"""
+        expected_ast = Program([
+            Label('SUBROUTINE+'),
+            Chain([CallLabel('SUBROUTINE', '%1 '), Echo('123 '), Echo('456')], ['&&', '||']),
+            Pipeline([Echo('aaa '), Exe('MYCOMMAND.exe', '-n 1 ', redirects=(Redirect(2, True, 'error.log'),))]),
+            CallFile('%BIN_PATH%\\MyProcess.cmd', redirects=(Redirect(1, False, 'out.txt'),)),
+            ChangeDir(),
+        ])
+        self.assertEqual(self.parser.parse(inputfile_text), expected_ast)
+
+    # ------------------------------------------------------------------------
+    def test_ast_nodes_have_slots(self):
+        node = Echo('OK')
+        with self.assertRaises(AttributeError):
+            node.extra = 1
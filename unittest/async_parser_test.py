@@ -0,0 +1,119 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import asyncio
+import concurrent.futures
+import os
+import shutil
+import tempfile
+import unittest
+from MsDosAsyncParser import AsyncParser, ParseError
+from MsDosCommandParser import MsDosCommandParser
+
+class MsDosCmdAsyncParserTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.input_dir = tempfile.mkdtemp()
+        self.filepaths = []
+        for i in range(6):
+            filepath = os.path.join(self.input_dir, 'script%d.cmd' % i)
+            with open(filepath, 'w', encoding='utf-8') as a_file:
+                a_file.write("SET VAR%d=%d\necho %%VAR%d%%\n" % (i, i, i))
+            self.filepaths.append(filepath)
+        self.broken_filepath = os.path.join(self.input_dir, 'sub', 'broken.bat')
+        os.makedirs(os.path.dirname(self.broken_filepath))
+        with open(self.broken_filepath, 'w', encoding='utf-8') as a_file:
+            a_file.write("IF (\n")
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        shutil.rmtree(self.input_dir, ignore_errors=True)
+
+    # ------------------------------------------------------------------------
+    async def test_parse(self):
+        parser = AsyncParser(executor=self.executor)
+        tree = await parser.parse("SET A=1\n")
+        self.assertEqual(tree, MsDosCommandParser().get_parser().parse("SET A=1\n"))
+        with self.assertRaises(ParseError) as cm:
+            await parser.parse("IF (\n")
+        self.assertEqual(cm.exception.error_type, 'UnexpectedToken')
+        self.assertEqual((cm.exception.line, cm.exception.column), (1, 5))
+
+    # ------------------------------------------------------------------------
+    async def test_parse_files_ordered(self):
+        parser = AsyncParser(executor=self.executor, max_concurrency=2, handler=str)
+        results = [result async for result in parser.parse_files([self.input_dir], ordered=True)]
+        self.assertEqual([result.path for result in results], self.filepaths + [self.broken_filepath])
+        for result in results[:-1]:
+            self.assertIsNone(result.error)
+            self.assertIn('command_set', result.tree)
+        self.assertIsNone(results[-1].tree)
+        self.assertIn('Unexpected', results[-1].error)
+
+    # ------------------------------------------------------------------------
+    async def test_parse_files_unordered(self):
+        parser = AsyncParser(executor=self.executor, max_concurrency=3)
+        results = [result async for result in parser.parse_files(self.filepaths + ['missing.cmd'])]
+        self.assertEqual(sorted(result.path for result in results), sorted(self.filepaths + ['missing.cmd']))
+        for result in results:
+            if result.path == 'missing.cmd':
+                self.assertIn('FileNotFoundError', result.error)
+            else:
+                self.assertEqual(result.tree.data, 'program')
+
+    # ------------------------------------------------------------------------
+    async def test_max_concurrency(self):
+        parser = AsyncParser(executor=self.executor, max_concurrency=2)
+        running = 0
+        max_running = 0
+        run_parser = parser.run_parser
+
+        async def counting_run_parser(inputfile_text):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            try:
+                return await run_parser(inputfile_text)
+            finally:
+                running -= 1
+        parser.run_parser = counting_run_parser
+
+        texts = ["SET A=%d\n" % i for i in range(8)]
+        trees = await asyncio.gather(*[parser.parse(text) for text in texts])
+        self.assertEqual(len(trees), 8)
+        self.assertEqual(max_running, 2)
+
+    # ------------------------------------------------------------------------
+    async def test_limits(self):
+        parser = AsyncParser(executor=self.executor, limits={'max_depth': 1})
+        results = [result async for result in parser.parse_files([self.filepaths[0]])]
+        self.assertIsNone(results[0].error)
+        with open(self.filepaths[0], 'w', encoding='utf-8') as a_file:
+            a_file.write("(\n(\necho a\n)\n)\n")
+        results = [result async for result in parser.parse_files([self.filepaths[0]])]
+        self.assertIn('ParseLimitError: max_depth exceeded', results[0].error)
+
+    # ------------------------------------------------------------------------
+    async def test_process_executor(self):
+        async with AsyncParser(max_concurrency=2, handler=str) as parser:
+            results = [result async for result in parser.parse_files(self.filepaths, ordered=True)]
+            self.assertIsInstance(parser.executor, concurrent.futures.ProcessPoolExecutor)
+        self.assertIsNone(parser.executor)
+        self.assertEqual([result.path for result in results], self.filepaths)
+        self.assertEqual([result.error for result in results], [None] * 6)
+
+    # ------------------------------------------------------------------------
+    async def test_process_executor_syntax_error(self):
+        # The errors of lark cannot be pickled, they must come back from the worker process as ParseError
+        async with AsyncParser(max_concurrency=2) as parser:
+            with self.assertRaises(ParseError) as cm:
+                await parser.parse("IF (\n")
+            self.assertEqual((cm.exception.line, cm.exception.column), (1, 5))
+            result = await parser.parse_file(self.broken_filepath)
+        self.assertIsNone(result.tree)
+        self.assertTrue(result.error.startswith('UnexpectedToken: Unexpected'), result.error)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import MsDosCallGraph
+from MsDosCallGraph import CallGraph, normalize_call_target
+
+class MsDosCmdCallGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.root = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.root, '.index', 'call_graph.json')
+        self.write('main.cmd', 'call %~dp0lib\\common.cmd\nCALL "%BIN_PATH%\\MyProcess.cmd" arg\ncall sub\\Helper\ncall missing.cmd\n')
+        self.write('lib/common.cmd', 'call %TOOLS%\\util.bat\n')
+        self.write('bin/myprocess.cmd', 'echo hi\n')
+        self.write('sub/helper.cmd', 'IF "%1"=="" (\n    call ..\\lib\\common.cmd\n)\n')
+        self.write('tools/util.bat', 'echo util\n')
+        self.write('broken.cmd', 'IF (\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write(self, name, text):
+        path = os.path.join(self.root, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as a_file:
+            a_file.write(text)
+
+    # ------------------------------------------------------------------------
+    def test_normalize_call_target(self):
+        self.assertEqual(normalize_call_target('%~dp0lib\\Common.cmd', 'bin'), ('bin/lib/common.cmd', 'common.cmd'))
+        self.assertEqual(normalize_call_target('"%BIN_PATH%\\MyProcess.cmd"', ''), (None, 'myprocess.cmd'))
+        self.assertEqual(normalize_call_target('..\\lib\\x.bat', 'sub'), ('lib/x.bat', 'x.bat'))
+        self.assertEqual(normalize_call_target('C:\\tools\\x.bat', 'sub'), (None, 'x.bat'))
+        self.assertEqual(normalize_call_target('%BIN%\\%NAME%.cmd', ''), (None, None))
+
+    # ------------------------------------------------------------------------
+    def test_graph(self):
+        graph = CallGraph(self.root, jobs=1)
+        self.assertEqual(graph.update(), ['bin/myprocess.cmd', 'broken.cmd', 'lib/common.cmd', 'main.cmd',
+                                          'sub/helper.cmd', 'tools/util.bat'])
+        self.assertEqual(graph.callees('main.cmd'), ['bin/myprocess.cmd', 'lib/common.cmd', 'sub/helper.cmd'])
+        self.assertEqual(graph.callers('lib/common.cmd'), ['main.cmd', 'sub/helper.cmd'])
+        self.assertEqual(graph.callers(os.path.join(self.root, 'LIB', 'Common.cmd')), ['main.cmd', 'sub/helper.cmd'])
+        self.assertEqual(graph.reachable('main.cmd'), ['bin/myprocess.cmd', 'lib/common.cmd', 'sub/helper.cmd',
+                                                       'tools/util.bat'])
+        self.assertEqual(graph.reachable('tools/util.bat'), [])
+        self.assertEqual(graph.unresolved(), [('main.cmd', 'missing.cmd', 4)])
+        self.assertEqual(list(graph.errors()), ['broken.cmd'])
+
+    # ------------------------------------------------------------------------
+    def test_syntax_error(self):
+        # The calls of the valid statements are linked even though the script has a syntax error
+        self.write('partial.cmd', 'call bin\\myprocess.cmd\nIF (\ncall missing2.cmd\n')
+        graph = CallGraph(self.root, jobs=1)
+        graph.update()
+        self.assertEqual(graph.callees('partial.cmd'), ['bin/myprocess.cmd'])
+        self.assertEqual(graph.callers('bin/myprocess.cmd'), ['main.cmd', 'partial.cmd'])
+        self.assertIn(('partial.cmd', 'missing2.cmd', 3), graph.unresolved())
+        self.assertEqual(graph.errors(), {'broken.cmd': 'Syntax error at line 1', 'partial.cmd': 'Syntax error at line 2'})
+
+    # ------------------------------------------------------------------------
+    def test_incremental_update(self):
+        graph = CallGraph(self.root, index_path=self.index_path, jobs=1)
+        self.assertEqual(len(graph.update()), 6)
+        self.assertEqual(graph.update(), [])
+
+        # A new process loads the index and does not parse the unchanged scripts
+        graph = CallGraph(self.root, index_path=self.index_path, jobs=1)
+        self.assertEqual(graph.callers('bin/myprocess.cmd'), ['main.cmd'])
+        self.write('bin/myprocess.cmd', 'echo hi\ncall %~dp0..\\tools\\util.bat\n')
+        self.write('new.cmd', 'call bin\\myprocess.cmd\n')
+        os.remove(os.path.join(self.root, 'sub', 'helper.cmd'))
+        self.assertEqual(graph.update(), ['bin/myprocess.cmd', 'new.cmd'])
+        self.assertEqual(graph.callers('bin/myprocess.cmd'), ['main.cmd', 'new.cmd'])
+        self.assertEqual(graph.callers('tools/util.bat'), ['bin/myprocess.cmd', 'lib/common.cmd'])
+        self.assertEqual(graph.callees('main.cmd'), ['bin/myprocess.cmd', 'lib/common.cmd'])
+        self.assertEqual(graph.unresolved(), [('main.cmd', 'missing.cmd', 4), ('main.cmd', 'sub\\Helper', 3)])
+
+    # ------------------------------------------------------------------------
+    def test_stale_index(self):
+        graph = CallGraph(self.root, index_path=self.index_path, jobs=1)
+        graph.update()
+        with open(self.index_path, 'r', encoding='utf-8') as a_file:
+            data = json.load(a_file)
+        data['fingerprint'] = 'other grammar'
+        with open(self.index_path, 'w', encoding='utf-8') as a_file:
+            json.dump(data, a_file)
+        self.assertEqual(len(CallGraph(self.root, index_path=self.index_path, jobs=1).update()), 6)
+
+        # The extractor version is part of the fingerprint
+        CallGraph(self.root, index_path=self.index_path, jobs=1).update()
+        with mock.patch('MsDosCallGraph.EXTRACTOR_VERSION', MsDosCallGraph.EXTRACTOR_VERSION + 1):
+            self.assertEqual(len(CallGraph(self.root, index_path=self.index_path, jobs=1).update()), 6)
+
+    # ------------------------------------------------------------------------
+    def test_parser_options(self):
+        with self.assertRaises(ValueError):
+            CallGraph(self.root, parser_kwargs={'ast': True})
+        with self.assertRaises(ValueError):
+            CallGraph(self.root, parser_kwargs={'standalone': True})
+        graph = CallGraph(self.root, jobs=1, parser_kwargs={'drop_whitespace': False})
+        graph.update()
+        self.assertEqual(graph.callees('main.cmd'), ['bin/myprocess.cmd', 'lib/common.cmd', 'sub/helper.cmd'])
+        self.assertEqual(list(graph.errors()), ['broken.cmd'])
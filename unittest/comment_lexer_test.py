@@ -0,0 +1,102 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from benchmark.corpus import load_sample, load_unittest_snippets, long_rem_script
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+
+def get_tokens(tree, tokens=None):
+    """Returns the tokens of the tree with their positions."""
+    tokens = [] if tokens is None else tokens
+    for child in tree.children:
+        if hasattr(child, 'children'):
+            get_tokens(child, tokens)
+        else:
+            tokens.append((child.type, str(child), child.start_pos, child.line, child.column,
+                           child.end_line, child.end_column, child.end_pos))
+    return tokens
+
+class MsDosCmdCommentLexerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+        self.fast_parser = MsDosCommandParser(comment_fast_path=True).get_parser()
+
+    def assertSameParse(self, inputfile_text, parser=None, fast_parser=None):
+        parser = parser or self.parser
+        fast_parser = fast_parser or self.fast_parser
+        try:
+            expected = parser.parse(inputfile_text)
+        except Exception as e:
+            with self.assertRaises(type(e)) as context:
+                fast_parser.parse(inputfile_text)
+            self.assertEqual(str(e), str(context.exception))
+            return
+        tree = fast_parser.parse(inputfile_text)
+        self.assertEqual(expected, tree)
+        if hasattr(tree, 'children'):
+            self.assertEqual(get_tokens(expected), get_tokens(tree))
+
+    # ------------------------------------------------------------------------
+    def test_comment_lines(self):
+        inputfile_text = """@ECHO OFF
+REM
+rem comment
+REM:comment
+REM.
+REM-comment
+REM=
+REM(comment
+REM)
+@REM comment ^
+continued ^
+
+REM 
+REM\t\tcomment
+REM　comment
+:: comment
+::
+  REM indented
+:LABEL
+echo REM not a comment
+"""
+        self.assertSameParse(inputfile_text)
+        self.assertSameParse(inputfile_text.replace('\n', '\r\n'))
+
+    # ------------------------------------------------------------------------
+    def test_comment_lines_in_group(self):
+        self.assertSameParse("""IF EXIST a.txt (
+    REM comment )
+    :: comment (
+    echo a
+) ELSE (
+REM
+)
+""")
+
+    # ------------------------------------------------------------------------
+    def test_not_comment_lines(self):
+        for inputfile_text in ["remove.exe a\n", "REMARK\n", "REM comment", "REM a\rb\n", "goto ::a\n", "@::a\n",
+                               "REM a ^\n", "echo a\n::",
+                               "REM:@\n", "::@\n", "REM @\r\n", "@REM.@\n", "echo a\n::@\n", "REM:@@\n", "::@a\n",
+                               "REM:@^\nb\n", "(\nREM=@\n)\n"]:
+            self.assertSameParse(inputfile_text)
+
+    # ------------------------------------------------------------------------
+    def test_corpus(self):
+        scripts = [load_sample(), long_rem_script(5)] + load_unittest_snippets()
+        scripts += [generate_script(500, seed) for seed in range(3)]
+        for inputfile_text in scripts:
+            self.assertSameParse(inputfile_text)
+
+    # ------------------------------------------------------------------------
+    def test_transformers(self):
+        inputfile_text = "REM a\n:: b\necho c\n"
+        for parser_kwargs in ({'ast': True}, {'drop_whitespace': True}, {'standalone': True}):
+            parser = MsDosCommandParser(**parser_kwargs).get_parser()
+            fast_parser = MsDosCommandParser(comment_fast_path=True, **parser_kwargs).get_parser()
+            self.assertSameParse(inputfile_text, parser, fast_parser)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+from MsDosControlFlow import CALL, ENTRY, EXIT, FLOW, JUMP, LOOP, build_cfg
+
+class MsDosCmdControlFlowTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+
+    def get_graph(self, inputfile_text):
+        graph = build_cfg(self.parser.parse(inputfile_text))
+        # (kind, line) of each node, and (kind, line) of its successors
+        nodes = [(graph.kind(node), graph.lines[node]) for node in range(len(graph))]
+        edges = {nodes[node]: sorted((nodes[target], edge_kind) for target, edge_kind in graph.successors(node))
+                 for node in range(len(graph))}
+        return graph, edges
+
+    # ------------------------------------------------------------------------
+    def test_sequence_and_goto(self):
+        inputfile_text = """@echo off
+goto END
+echo dead
+:END
+echo end
+"""
+        graph, edges = self.get_graph(inputfile_text)
+        self.assertEqual(edges[('entry', 0)], [(('command_echo', 1), FLOW)])
+        self.assertEqual(edges[('command_goto', 2)], [(('label', 4), JUMP)])
+        self.assertEqual(edges[('command_echo', 3)], [(('label', 4), FLOW)])
+        self.assertEqual(edges[('command_echo', 5)], [(('exit', 0), FLOW)])
+        self.assertEqual([graph.lines[node] for node in graph.unreachable()], [3])
+        self.assertEqual(sorted(graph.lines[node] for node, _ in graph.predecessors(graph.nodes_of_kind('label')[0])), [2, 3])
+
+    # ------------------------------------------------------------------------
+    def test_if_else(self):
+        inputfile_text = """IF "%A%"=="1" (
+    echo a
+) ELSE IF "%A%"=="2" (
+    echo b
+) ELSE echo c
+echo end
+"""
+        graph, edges = self.get_graph(inputfile_text)
+        self.assertEqual(edges[('statement_if', 1)], [(('group', 1), FLOW), (('statement_if', 3), FLOW)])
+        self.assertEqual(edges[('statement_if', 3)], [(('command_echo', 5), FLOW), (('group', 3), FLOW)])
+        for line in (2, 4, 5):
+            self.assertEqual(edges[('command_echo', line)], [(('command_echo', 6), FLOW)])
+        self.assertEqual(graph.unreachable(), [])
+
+    # ------------------------------------------------------------------------
+    def test_if_without_else(self):
+        graph, edges = self.get_graph("IF EXIST a.txt del a.txt\necho end\n")
+        self.assertEqual(edges[('statement_if', 1)], [(('command_echo', 2), FLOW), (('command_exe', 1), FLOW)])
+
+    # ------------------------------------------------------------------------
+    def test_for(self):
+        inputfile_text = """FOR /F "tokens=1" %%i IN (list.txt) DO (
+    echo %%i
+    IF "%%i"=="x" goto DONE
+)
+FOR /L %%i IN (1,1,3) DO echo %%i
+:DONE
+"""
+        graph, edges = self.get_graph(inputfile_text)
+        self.assertEqual(edges[('statement_for_f', 1)], [(('group', 1), FLOW), (('statement_for_l', 5), FLOW)])
+        self.assertEqual(edges[('statement_if', 3)], [(('command_goto', 3), FLOW), (('statement_for_f', 1), LOOP)])
+        self.assertEqual(edges[('command_goto', 3)], [(('label', 6), JUMP)])
+        self.assertEqual(edges[('statement_for_l', 5)], [(('command_echo', 5), FLOW), (('label', 6), FLOW)])
+        self.assertEqual(edges[('command_echo', 5)], [(('statement_for_l', 5), LOOP)])
+
+    # ------------------------------------------------------------------------
+    def test_chain_operators(self):
+        graph, edges = self.get_graph("mkdir a && cd a || goto :eof\necho a & echo b\n")
+        # mkdir fails: cd is skipped and goto runs
+        self.assertEqual(edges[('command_exe', 1)], [(('command_cd', 1), FLOW), (('command_goto', 1), FLOW)])
+        self.assertEqual(edges[('command_cd', 1)], [(('command_echo', 2), FLOW), (('command_goto', 1), FLOW)])
+        self.assertEqual(edges[('command_goto', 1)], [(('exit', 0), JUMP)])
+        # Only a successful cd skips goto
+        self.assertEqual([graph.kind(node) for node, _ in graph.predecessors(graph.nodes_of_kind('command_echo')[0])],
+                         ['command_cd'])
+        self.assertEqual([graph.kind(node) for node, _ in graph.predecessors(graph.nodes_of_kind('command_echo')[1])],
+                         ['command_echo'])
+
+    # ------------------------------------------------------------------------
+    def test_call_and_subroutines(self):
+        inputfile_text = """call :SUB1 a
+goto :EOF
+:SUB1
+echo sub1
+goto :eof
+:SUB2
+echo sub2
+exit /b
+"""
+        graph, edges = self.get_graph(inputfile_text)
+        self.assertEqual(edges[('command_call_label', 1)], [(('command_goto', 2), FLOW), (('label', 3), CALL)])
+        self.assertEqual(edges[('command_goto', 5)], [(('exit', 0), JUMP)])
+        self.assertEqual(graph.uncalled_subroutines(), ['SUB2'])
+        self.assertEqual([graph.lines[node] for node in graph.unreachable()], [6, 7, 8])
+        without_calls = graph.reachable(follow_calls=False)
+        self.assertEqual([graph.lines[node] for node in range(2, len(graph)) if not without_calls[node]], [3, 4, 5, 6, 7, 8])
+
+    # ------------------------------------------------------------------------
+    def test_synthetic_script(self):
+        tree = self.parser.parse(generate_script(2000, 1))
+        graph = build_cfg(tree)
+        self.assertEqual(graph.offsets[-1], len(graph.targets))
+        self.assertTrue(graph.reachable()[EXIT])
+        self.assertEqual(graph.successors(EXIT), [])
+        self.assertTrue(graph.successors(ENTRY))
+
+    # ------------------------------------------------------------------------
+    def test_deeply_nested_if(self):
+        depth = 400
+        inputfile_text = "IF 1==1 (\n" * depth + "echo deep\n" + ")\n" * depth + "echo after\n"
+        graph = build_cfg(self.parser.parse(inputfile_text))
+        self.assertEqual(len(graph.nodes_of_kind('statement_if')), depth)
+        self.assertEqual(len(graph.nodes_of_kind('group')), depth)
+        echo_nodes = graph.nodes_of_kind('command_echo')
+        self.assertEqual([graph.lines[node] for node in echo_nodes], [depth + 1, depth * 2 + 2])
+        # The last echo follows the innermost one and every IF whose condition is false
+        self.assertEqual(len(graph.predecessors(echo_nodes[1])), depth + 1)
+        self.assertEqual(graph.unreachable(), [])
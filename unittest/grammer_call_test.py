@@ -1,18 +1,9 @@
 # python -m unittest discover ./unittest "*_test.py"
 
-import re
-import unittest
-from MsDosCommandParser import MsDosCommandParser
+from grammer_test_case import GrammerTestCase
+from MsDosTreeWriter import format_pretty
 
-def format_lark_pretty_print(pretty_print):
-    return '\n'.join(line for line in pretty_print.split("\n") if not re.match(r'^\s*$', line))
-
-class MsDosCmdGrammerTest(unittest.TestCase):
-
-    def setUp(self):
-        self.maxDiff = None
-        transpiler = MsDosCommandParser()
-        self.parser = transpiler.get_parser()
+class MsDosCmdGrammerTest(GrammerTestCase):
 
     # ------------------------------------------------------------------------
     def test_call_file(self):
@@ -25,8 +16,7 @@ program
     call
     %BIN_PATH%\\MyProcess2.cmd
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -41,8 +31,7 @@ program
     %BIN_PATH%\\MyProcess2.cmd
     %_MyVariable% 1234
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -58,8 +47,7 @@ program
       :
       SUBROUTINE
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -76,6 +64,5 @@ program
       SUBROUTINE
     %%i %%j %%k %%l %%m %%n
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
@@ -1,18 +1,9 @@
 # python -m unittest discover ./unittest "*_test.py"
 
-import re
-import unittest
-from MsDosCommandParser import MsDosCommandParser
+from grammer_test_case import GrammerTestCase
+from MsDosTreeWriter import format_pretty
 
-def format_lark_pretty_print(pretty_print):
-    return '\n'.join(line for line in pretty_print.split("\n") if not re.match(r'^\s*$', line))
-
-class MsDosCmdGrammerTest(unittest.TestCase):
-
-    def setUp(self):
-        self.maxDiff = None
-        transpiler = MsDosCommandParser()
-        self.parser = transpiler.get_parser()
+class MsDosCmdGrammerTest(GrammerTestCase):
 
     # ------------------------------------------------------------------------
     def test_echo(self):
@@ -32,8 +23,7 @@ program
       2>
       &1
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -54,8 +44,7 @@ program
       2>
       &1
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -76,8 +65,7 @@ program
       2>
       &1
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -98,8 +86,7 @@ program
       2>
       &1
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -120,8 +107,7 @@ program
       2>
       &1
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -148,8 +134,25 @@ program
           &1
     )
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
+        self.assertEqual(pretty_print, expected_parse_tree)
+
+    # ------------------------------------------------------------------------
+    def test_echo_unclosed_parens_before_close_paren(self):
+        inputfile_text = """
+(echo  b(!(%(%())
+"""
+        expected_parse_tree = """
+program
+  group
+    (
+    subprogram
+      command_echo
+        echo
+         b(!(%(%()
+    )
+""".strip("\n")
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -167,8 +170,7 @@ program
       >>
       %MyFolder%\\Input.csv
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -185,8 +187,7 @@ program
       >>
       %OUTPUT_LOG%
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -200,8 +201,7 @@ program
     ECHO
     OFF
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -213,6 +213,5 @@ ECHO
 program
   command_echo	ECHO
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
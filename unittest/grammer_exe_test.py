@@ -1,18 +1,9 @@
 # python -m unittest discover ./unittest "*_test.py"
 
-import re
-import unittest
-from MsDosCommandParser import MsDosCommandParser
+from grammer_test_case import GrammerTestCase
+from MsDosTreeWriter import format_pretty
 
-def format_lark_pretty_print(pretty_print):
-    return '\n'.join(line for line in pretty_print.split("\n") if not re.match(r'^\s*$', line))
-
-class MsDosCmdGrammerTest(unittest.TestCase):
-
-    def setUp(self):
-        self.maxDiff = None
-        transpiler = MsDosCommandParser()
-        self.parser = transpiler.get_parser()
+class MsDosCmdGrammerTest(GrammerTestCase):
 
     # ------------------------------------------------------------------------
     def test_exe(self):
@@ -31,8 +22,7 @@ program
       2>
       &1
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -46,8 +36,7 @@ program
     osql.exe
     -o %OUTPUTFILE% -s , -w 1024 -h-1 -d %MY_DB% -S %MY_DBSVR% -U %MY_DBUSER% -P %MY_DBPWD% -Q "SELECT TOP 1 * from MYTABLE where COL1 <> '' order by COL1"
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -65,8 +54,7 @@ program
       >>
       %OUTPUT_LOG%
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -96,8 +84,7 @@ program
             %OUTPUT_LOG%
       )
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -127,7 +114,6 @@ program
             %OUTPUT_LOG%
       )
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
@@ -1,18 +1,9 @@
 # python -m unittest discover ./unittest "*_test.py"
 
-import re
-import unittest
-from MsDosCommandParser import MsDosCommandParser
+from grammer_test_case import GrammerTestCase
+from MsDosTreeWriter import format_pretty
 
-def format_lark_pretty_print(pretty_print):
-    return '\n'.join(line for line in pretty_print.split("\n") if not re.match(r'^\s*$', line))
-
-class MsDosCmdGrammerTest(unittest.TestCase):
-
-    def setUp(self):
-        self.maxDiff = None
-        transpiler = MsDosCommandParser()
-        self.parser = transpiler.get_parser()
+class MsDosCmdGrammerTest(GrammerTestCase):
 
     # ------------------------------------------------------------------------
     def test_for_f_file(self):
@@ -39,8 +30,7 @@ program
         SUBROUTINE
       %%p
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -68,8 +58,7 @@ program
       =
       %%i
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -97,8 +86,7 @@ program
       =
       %%i
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -148,8 +136,7 @@ program
             )
       )
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -187,8 +174,7 @@ program
         echo
         %%i %%j
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
     # ------------------------------------------------------------------------
@@ -216,8 +202,33 @@ program
       =
       %%1
 """.strip("\n")
-        pretty_print = self.parser.parse(inputfile_text).pretty()
-        pretty_print = format_lark_pretty_print(pretty_print)
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
         self.assertEqual(pretty_print, expected_parse_tree)
 
-
+    # ------------------------------------------------------------------------
+    def test_for_unclosed_parens_before_escaped_paren(self):
+        inputfile_text = """
+FOR %%i IN (x) DO (echo ( ! (^(b)
+"""
+        expected_parse_tree = """
+program
+  statement_for_none
+    FOR
+    for_parameter
+      %%
+      i
+    IN
+    (
+    for_range_set	x
+    )
+    DO
+    group
+      (
+      subprogram
+        command_echo
+          echo
+          ( ! (^(b
+      )
+""".strip("\n")
+        pretty_print = format_pretty(self.parser.parse(inputfile_text))
+        self.assertEqual(pretty_print, expected_parse_tree)
@@ -0,0 +1,41 @@
+# Base class of the grammer_*_test.py test cases (not a test module itself)
+
+import time
+import unittest
+from MsDosCommandParser import MsDosCommandParser
+
+# Parse time of each test in seconds, by test id (see benchmark/test_runner.py)
+parse_times = {}
+
+class TimedParser:
+    """Parser that adds the time spent in parse() to the parse time of a test."""
+
+    def __init__(self, parser, test_id):
+        self.parser = parser
+        self.test_id = test_id
+
+    def __getattr__(self, name):
+        return getattr(self.parser, name)
+
+    def parse(self, inputfile_text, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.parser.parse(inputfile_text, *args, **kwargs)
+        finally:
+            parse_times[self.test_id] = parse_times.get(self.test_id, 0.0) + time.perf_counter() - start
+
+class GrammerTestCase(unittest.TestCase):
+    """
+    Test case sharing one parser with all its tests. The parser is taken from the process-wide
+    registry of MsDosCommandParser once per class, so the grammar is compiled once per process.
+    """
+
+    parser_kwargs = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shared_parser = MsDosCommandParser(**cls.parser_kwargs).get_parser()
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = TimedParser(self.shared_parser, self.id())
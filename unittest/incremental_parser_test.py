@@ -0,0 +1,97 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import io
+import random
+import unittest
+from lark import Token
+from lark.exceptions import UnexpectedInput
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+from MsDosIncrementalParser import IncrementalParser
+from MsDosStreamParser import parse_stream
+
+def token_positions(tree):
+    return [(token.type, token.line, token.column, token.end_line, token.start_pos, token.end_pos)
+            for token in tree.scan_values(lambda value: isinstance(value, Token))]
+
+class MsDosCmdIncrementalParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+
+    def assertSameAsFullParse(self, document):
+        expected = list(parse_stream(io.StringIO(document.text), self.parser))
+        statements = document.statements
+        self.assertEqual(expected, statements)
+        self.assertEqual([token_positions(tree) for tree in expected], [token_positions(tree) for tree in statements])
+
+    # ------------------------------------------------------------------------
+    def test_edit_line(self):
+        inputfile_text = """SET VAR1=123
+echo %VAR1%
+
+echo END
+"""
+        document = IncrementalParser(inputfile_text, self.parser)
+        start = inputfile_text.index('123')
+        statements = document.edit(start, start + 3, '456789')
+        self.assertEqual(1, len(statements))
+        self.assertEqual('456789', statements[0].children[-1])
+        self.assertSameAsFullParse(document)
+
+    # ------------------------------------------------------------------------
+    def test_edit_in_group(self):
+        inputfile_text = """echo BEGIN
+IF "%FLG%"=="1" (
+    echo ONE
+    echo TWO
+)
+echo END
+"""
+        document = IncrementalParser(inputfile_text, self.parser)
+        start = inputfile_text.index('TWO')
+        statements = document.edit(start, start + 3, 'TWO & echo THREE')
+        self.assertEqual(['statement_if'], [statement.data for statement in statements])
+        start = document.text.index('echo END')
+        statements = document.edit(start, start + 8, 'FOR %%i IN (a b) DO (\n    echo %%i\n)')
+        self.assertEqual(['statement_for_none'], [statement.data for statement in statements])
+        self.assertEqual(['command_echo', 'statement_if', 'statement_for_none'],
+                         [statement.data for statement in document.statements])
+        self.assertSameAsFullParse(document)
+
+    # ------------------------------------------------------------------------
+    def test_get_offset(self):
+        document = IncrementalParser("echo A\necho B\n", self.parser)
+        self.assertEqual(7, document.get_offset(2, 1))
+        self.assertEqual(document.statements[1].children[0].start_pos, document.get_offset(2, 1))
+
+    # ------------------------------------------------------------------------
+    def test_syntax_error(self):
+        inputfile_text = """echo A
+echo B
+"""
+        document = IncrementalParser(inputfile_text, self.parser)
+        with self.assertRaises(UnexpectedInput):
+            document.edit(7, 7, ') ')
+        document.edit(7, 9, '')
+        self.assertSameAsFullParse(document)
+
+    # ------------------------------------------------------------------------
+    def test_random_edits(self):
+        rand = random.Random(0)
+        replacements = ['(', ')', '\n', 'echo x\n', 'IF "a"=="b" (\n', ')\n', '^\n', 'REM (\n', 'SET A=1', ' ', '']
+        document = IncrementalParser(generate_script(100, 1), self.parser)
+        for _ in range(50):
+            start = rand.randrange(len(document.text) + 1)
+            end = min(len(document.text), start + rand.randrange(20))
+            replacement = rand.choice(replacements)
+            old_text = document.text
+            try:
+                document.edit(start, end, replacement)
+            except UnexpectedInput:
+                document.edit(start, start + len(replacement), old_text[start:end])
+            self.assertSameAsFullParse(document)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from MsDosCommandParser import MsDosCommandParser
+from MsDosLabelIndex import build_label_index
+
+class MsDosCmdLabelIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+
+    # ------------------------------------------------------------------------
+    def test_resolve(self):
+        inputfile_text = """
+:MAIN
+call :Sub+ arg1
+IF "%A%"=="1" (
+    goto :end
+)
+GOTO main
+:SUB+
+echo sub
+goto :EOF
+:END
+"""
+        index = build_label_index(self.parser.parse(inputfile_text))
+        self.assertEqual(sorted(index.labels), ['end', 'main', 'sub+'])
+        self.assertEqual([(label.name, label.line, label.column) for label in index.labels['sub+']], [('SUB+', 8, 2)])
+        self.assertEqual([(jump.kind, jump.name, jump.line, jump.target and jump.target.line) for jump in index.jumps], [
+            ('call', ':Sub+', 3, 8),
+            ('goto', ':end', 5, 11),
+            ('goto', 'main', 7, 2),
+            ('goto', ':EOF', 10, None),
+        ])
+        self.assertEqual(index.unresolved(), [])
+        self.assertEqual(index.duplicates(), {})
+        self.assertEqual(index.unused(), [])
+        self.assertEqual(index.resolve(':MAIN').statement_index, index.jumps[2].target.statement_index)
+        self.assertEqual([jump.line for jump in index.jumps_to('END')], [5])
+
+    # ------------------------------------------------------------------------
+    def test_unresolved_and_duplicate(self):
+        inputfile_text = """
+:LOOP
+goto LOOP
+:loop
+goto eof
+call :missing
+goto LOOP
+:UNUSED
+"""
+        index = build_label_index(self.parser.parse(inputfile_text))
+        self.assertEqual([(jump.name, jump.line) for jump in index.unresolved()], [('eof', 5), (':missing', 6)])
+        self.assertEqual([(label.name, label.line) for label in index.duplicates()['loop']], [('LOOP', 2), ('loop', 4)])
+        # A duplicate label is searched from the jump forward, then from the beginning
+        self.assertEqual([jump.target.line for jump in index.jumps_to('loop')], [4, 2])
+        self.assertEqual([(label.name, label.line) for label in index.unused()], [('UNUSED', 8)])
+
+    # ------------------------------------------------------------------------
+    def test_call_label_is_not_definition(self):
+        index = build_label_index(self.parser.parse("call :A\n"))
+        self.assertEqual(index.labels, {})
+        self.assertEqual([jump.name for jump in index.unresolved()], [':A'])
+
+    # ------------------------------------------------------------------------
+    def test_many_duplicates(self):
+        # Each jump goes to the next duplicate label, and the last one back to the first label
+        num_labels = 200
+        lines = []
+        for i in range(num_labels):
+            lines += [':LOOP', 'goto LOOP', 'call :loop']
+        tree = self.parser.parse('\n'.join(lines) + '\n')
+        index = build_label_index(tree)
+        self.assertEqual(len(index.duplicates()['loop']), num_labels)
+        expected_lines = [line for i in range(4, 3 * num_labels, 3) for line in (i, i)] + [1, 1]
+        self.assertEqual([jump.target.line for jump in index.jumps], expected_lines)
+        self.assertEqual([jump.line for jump in index.jumps_to(':LOOP')], [jump.line for jump in index.jumps])
+        self.assertEqual(index.unused(), [])
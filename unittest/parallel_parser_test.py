@@ -0,0 +1,86 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import os
+import shutil
+import tempfile
+import unittest
+import MsDosParallelParser
+from MsDosParallelParser import expand_paths, parse_files
+
+class MsDosCmdParallelParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.input_dir = tempfile.mkdtemp()
+        self.filepaths = []
+        for i in range(6):
+            filepath = os.path.join(self.input_dir, 'script%d.cmd' % i)
+            with open(filepath, 'w', encoding='utf-8') as a_file:
+                a_file.write("SET VAR%d=%d\necho %%VAR%d%%\n" % (i, i, i))
+            self.filepaths.append(filepath)
+        self.broken_filepath = os.path.join(self.input_dir, 'sub', 'broken.bat')
+        os.makedirs(os.path.dirname(self.broken_filepath))
+        with open(self.broken_filepath, 'w', encoding='utf-8') as a_file:
+            a_file.write("IF (\n")
+        with open(os.path.join(self.input_dir, 'readme.txt'), 'w', encoding='utf-8') as a_file:
+            a_file.write("not a batch file\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.input_dir, ignore_errors=True)
+
+    # ------------------------------------------------------------------------
+    def test_expand_paths(self):
+        self.assertEqual(list(expand_paths([self.input_dir])), self.filepaths + [self.broken_filepath])
+        self.assertEqual(list(expand_paths([os.path.join(self.input_dir, '*.cmd')])), self.filepaths)
+        self.assertEqual(list(expand_paths([os.path.join(self.input_dir, '**', '*.bat')])), [self.broken_filepath])
+
+    # ------------------------------------------------------------------------
+    def test_parse_files_ordered(self):
+        results = list(parse_files([self.input_dir], jobs=2, ordered=True, handler=str))
+        self.assertEqual([result.path for result in results], self.filepaths + [self.broken_filepath])
+        for result in results[:-1]:
+            self.assertIsNone(result.error)
+            self.assertIn('command_set', result.tree)
+        self.assertIsNone(results[-1].tree)
+        self.assertIn('Unexpected', results[-1].error)
+
+    # ------------------------------------------------------------------------
+    def test_parse_files_unordered(self):
+        results = list(parse_files(self.filepaths, jobs=2))
+        self.assertEqual(sorted(result.path for result in results), sorted(self.filepaths))
+        for result in results:
+            self.assertEqual(result.tree.data, 'program')
+
+    # ------------------------------------------------------------------------
+    def test_parse_files_in_process(self):
+        results = list(parse_files(self.filepaths + [self.broken_filepath], jobs=1))
+        self.assertEqual([result.path for result in results], self.filepaths + [self.broken_filepath])
+        self.assertEqual([result.error is None for result in results], [True] * 6 + [False])
+
+    # ------------------------------------------------------------------------
+    def test_parse_files_resilient(self):
+        results = list(parse_files([self.filepaths[0], self.broken_filepath], jobs=2, ordered=True, resilient=True))
+        self.assertEqual([result.error for result in results], [None, None])
+        self.assertEqual(len(list(results[1].tree.find_data('error_line'))), 1)
+        with self.assertRaises(ValueError):
+            list(parse_files([self.broken_filepath], jobs=1, resilient=True, limits={'max_depth': 1}))
+
+    # ------------------------------------------------------------------------
+    def test_parse_files_result_cache_with_limits(self):
+        result_cache_dir = os.path.join(self.input_dir, 'cache')
+        results = list(parse_files(self.filepaths[:1], jobs=1, result_cache_dir=result_cache_dir))
+        self.assertIsNone(results[0].error)
+        # The result cached without limits is not returned for a file exceeding them
+        results = list(parse_files(self.filepaths[:1], jobs=1, result_cache_dir=result_cache_dir,
+                                   limits={'max_bytes': 4}))
+        self.assertIsNone(results[0].tree)
+        self.assertIn('ParseLimitError', results[0].error)
+        results = list(parse_files(self.filepaths[:1], jobs=1, result_cache_dir=result_cache_dir,
+                                   limits={'max_bytes': 1000}))
+        self.assertIsNone(results[0].error)
+
+    # ------------------------------------------------------------------------
+    def test_parse_files_in_process_keeps_worker(self):
+        MsDosParallelParser._worker = None
+        list(parse_files(self.filepaths[:1], jobs=1, handler=str))
+        self.assertIsNone(MsDosParallelParser._worker)
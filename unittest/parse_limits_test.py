@@ -0,0 +1,100 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+from MsDosParallelParser import parse_files
+from MsDosParseLimits import LimitedParser, ParseLimitError
+
+class MsDosCmdParseLimitsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+
+    def parse_error(self, inputfile_text, **limits):
+        with self.assertRaises(ParseLimitError) as context:
+            LimitedParser(self.parser, **limits).parse(inputfile_text)
+        return context.exception.to_dict()
+
+    # ------------------------------------------------------------------------
+    def test_within_limits(self):
+        inputfile_text = """REM comment ^
+continued
+IF EXIST a.txt (
+    FOR %%i IN (a b) DO (
+        echo %%i
+    )
+)
+"""
+        parser = LimitedParser(self.parser, max_bytes=1000, max_line_length=40, max_depth=3, timeout=10.0)
+        self.assertEqual(self.parser.parse(inputfile_text), parser.parse(inputfile_text))
+
+    # ------------------------------------------------------------------------
+    def test_max_bytes(self):
+        self.assertEqual({'limit': 'max_bytes', 'value': 14, 'maximum': 12, 'line': None, 'column': None},
+                         self.parse_error("echo éééé\n", max_bytes=12))
+
+    # ------------------------------------------------------------------------
+    def test_max_line_length(self):
+        inputfile_text = "echo short\nREM" + " ^\nword" * 10000 + "\n"
+        self.assertEqual({'limit': 'max_line_length', 'value': 105, 'maximum': 100, 'line': 2, 'column': None},
+                         self.parse_error(inputfile_text, max_line_length=100))
+        # ^^ is an escaped caret, which does not continue the line
+        parser = LimitedParser(self.parser, max_line_length=11)
+        parser.parse("echo 1234^^\necho 1234^^\n")
+
+    # ------------------------------------------------------------------------
+    def test_max_depth(self):
+        inputfile_text = "(\n" * 100 + "echo a\n" + ")\n" * 100
+        self.assertEqual({'limit': 'max_depth', 'value': 33, 'maximum': 32, 'line': 33, 'column': 1},
+                         self.parse_error(inputfile_text, max_depth=32))
+
+    # ------------------------------------------------------------------------
+    def test_timeout(self):
+        error = self.parse_error(generate_script(20000, 1), timeout=0.01)
+        self.assertEqual('timeout', error['limit'])
+        self.assertGreaterEqual(error['value'], 0.01)
+        self.assertLess(error['value'], 1.0)
+
+    # ------------------------------------------------------------------------
+    def test_pickle(self):
+        error = ParseLimitError('max_depth', 65, 64, line=65, column=1)
+        copied = pickle.loads(pickle.dumps(error))
+        self.assertEqual(error.to_dict(), copied.to_dict())
+        self.assertEqual('max_depth exceeded: 65 > 64 at line 65 col 1', str(copied))
+
+    # ------------------------------------------------------------------------
+    def test_start(self):
+        inputfile_text = "(\n    echo a\n)\n"
+        expected = self.parser.parse(inputfile_text)
+        self.assertEqual(expected, LimitedParser(self.parser, max_depth=8).parse(inputfile_text, start='start'))
+        self.assertEqual(expected, LimitedParser(self.parser, max_bytes=100).parse(inputfile_text, start='start'))
+
+    # ------------------------------------------------------------------------
+    def test_syntax_error(self):
+        with self.assertRaises(Exception) as context:
+            LimitedParser(self.parser, max_depth=8, timeout=10.0).parse("IF (\n")
+        self.assertIn('Unexpected', type(context.exception).__name__)
+
+    # ------------------------------------------------------------------------
+    def test_parse_files(self):
+        input_dir = tempfile.mkdtemp()
+        try:
+            filepath = os.path.join(input_dir, 'nested.cmd')
+            with open(filepath, 'w', encoding='utf-8') as a_file:
+                a_file.write("(\n(\necho a\n)\n)\n")
+            results = list(parse_files([filepath], jobs=1, limits={'max_depth': 1}))
+            self.assertIsNone(results[0].tree)
+            self.assertEqual('ParseLimitError: max_depth exceeded: 2 > 1 at line 2 col 1', results[0].error)
+            results = list(parse_files([filepath], jobs=1, limits={'max_depth': 2}))
+            self.assertIsNone(results[0].error)
+        finally:
+            shutil.rmtree(input_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    unittest.main()
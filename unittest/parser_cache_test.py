@@ -0,0 +1,59 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import os
+import shutil
+import tempfile
+import unittest
+from MsDosCommandParser import MsDosCommandParser
+
+class MsDosCmdParserCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    # ------------------------------------------------------------------------
+    def test_cache_miss_then_hit(self):
+        inputfile_text = """
+SET MY_VARIABLE=%~dp0
+echo TEST
+"""
+        before = MsDosCommandParser.cache_info()
+        parser1 = MsDosCommandParser(cache_dir=self.cache_dir).build_parser()
+        parser2 = MsDosCommandParser(cache_dir=self.cache_dir).build_parser()
+        after = MsDosCommandParser.cache_info()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(parser1.parse(inputfile_text), parser2.parse(inputfile_text))
+
+    # ------------------------------------------------------------------------
+    def test_shared_parser_is_saved_to_cache_dir(self):
+        parser = MsDosCommandParser().get_parser()
+        cached_parser = MsDosCommandParser(cache_dir=self.cache_dir).get_parser()
+        self.assertIsNot(parser, cached_parser)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertIs(MsDosCommandParser(cache_dir=self.cache_dir + os.sep).get_parser(), cached_parser)
+
+    # ------------------------------------------------------------------------
+    def test_cache_key_changes_with_grammar(self):
+        transpiler = MsDosCommandParser(cache_dir=self.cache_dir)
+        path1 = transpiler.get_cache_path("program: WS")
+        path2 = transpiler.get_cache_path("program: NL")
+        self.assertNotEqual(path1, path2)
+        self.assertEqual(os.path.dirname(path1), self.cache_dir)
+
+    # ------------------------------------------------------------------------
+    def test_broken_cache_is_rebuilt(self):
+        transpiler = MsDosCommandParser(cache_dir=self.cache_dir)
+        transpiler.build_parser()
+        for filename in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, filename), 'wb') as a_file:
+                a_file.write(b'broken')
+        before = MsDosCommandParser.cache_info()
+        parser = transpiler.build_parser()
+        after = MsDosCommandParser.cache_info()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(parser.parse("echo TEST\n").data, 'program')
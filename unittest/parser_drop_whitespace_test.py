@@ -0,0 +1,57 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from lark import Tree
+from benchmark.corpus import load_sample, load_unittest_snippets
+from MsDosCommandParser import MsDosCommandParser
+
+def remove_whitespace(tree):
+    children = []
+    for child in tree.children:
+        if isinstance(child, Tree):
+            if child.data != 'emptyline':
+                children.append(remove_whitespace(child))
+        elif child.type not in ('WS', 'WS_INLINE', 'WS_INLINE_ONCE', 'NL'):
+            children.append(child)
+    return Tree(tree.data, children)
+
+class MsDosCmdParserDropWhitespaceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+        self.compact_parser = MsDosCommandParser(drop_whitespace=True).get_parser()
+
+    # ------------------------------------------------------------------------
+    def test_drop_whitespace(self):
+        inputfile_text = """
+IF "%FLG%"=="1" (
+    echo TEST
+
+)
+"""
+        expected_parse_tree = """
+program
+  statement_if
+    IF
+    test_comp
+      "%FLG%"
+      ==
+      "1"
+    group
+      (
+      subprogram
+        command_echo
+          echo
+          TEST
+      )
+""".strip("\n")
+        pretty_print = self.compact_parser.parse(inputfile_text).pretty().rstrip("\n")
+        self.assertEqual(pretty_print, expected_parse_tree)
+
+    # ------------------------------------------------------------------------
+    def test_drop_whitespace_same_as_filtered_tree(self):
+        inputfile_texts = [load_sample()] + load_unittest_snippets()
+        for inputfile_text in inputfile_texts:
+            expected = remove_whitespace(self.parser.parse(inputfile_text))
+            self.assertEqual(self.compact_parser.parse(inputfile_text), expected)
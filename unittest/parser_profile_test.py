@@ -0,0 +1,55 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from MsDosCommandParser import MsDosCommandParser
+
+class MsDosCmdParserProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser(profile=True).get_parser()
+        self.parser.profile.reset()
+
+    # ------------------------------------------------------------------------
+    def test_terminals(self):
+        inputfile_text = """@ECHO OFF
+SET VAR1=123
+IF "%VAR1%"=="123" (
+    echo TEST
+)
+"""
+        tree = self.parser.parse(inputfile_text)
+        profile = self.parser.profile
+        tokens = list(tree.scan_values(lambda value: hasattr(value, 'type')))
+        terminals = {name: (matches, num_bytes) for name, matches, num_bytes, _ in profile.hottest_terminals()}
+        self.assertEqual((1, 3), terminals['SET'])
+        self.assertEqual(2, terminals['COMPARE_VALUE'][0])
+        self.assertEqual(2, terminals['ECHO'][0])
+        # Every character is matched once (AT is matched but ignored)
+        self.assertEqual(len(inputfile_text), sum(num_bytes for matches, num_bytes in terminals.values()))
+        self.assertEqual(len(tokens) + 1, sum(matches for matches, num_bytes in terminals.values()))
+
+    # ------------------------------------------------------------------------
+    def test_rules(self):
+        self.parser.parse("echo A\necho B\nIF EXIST a.txt echo C\n")
+        rules = {name: reductions for name, reductions, _ in self.parser.profile.hottest_rules()}
+        self.assertEqual(3, rules['command_echo'])
+        self.assertEqual(1, rules['test_exist'])
+
+    # ------------------------------------------------------------------------
+    def test_report(self):
+        self.parser.parse("echo A\n")
+        report = self.parser.profile.report(top=3)
+        self.assertTrue(report.startswith('terminal'))
+        self.assertIn('\nrule', report)
+        self.assertIn('command_echo', report)
+
+    # ------------------------------------------------------------------------
+    def test_profile_parser_is_separate(self):
+        parser = MsDosCommandParser().get_parser()
+        self.assertIsNot(parser, self.parser)
+        self.assertFalse(hasattr(parser, 'profile'))
+        self.assertEqual(parser.parse("echo A\n"), self.parser.parse("echo A\n"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import threading
+import unittest
+from MsDosCommandParser import MsDosCommandParser
+
+class MsDosCmdParserRegistryTest(unittest.TestCase):
+
+    # ------------------------------------------------------------------------
+    def test_parser_is_shared(self):
+        parser1 = MsDosCommandParser().get_parser()
+        parser2 = MsDosCommandParser().get_parser()
+        self.assertIs(parser1, parser2)
+
+    # ------------------------------------------------------------------------
+    def test_parser_is_built_once_by_concurrent_callers(self):
+        MsDosCommandParser.clear_parsers()
+        parsers = []
+        threads = [threading.Thread(target=lambda: parsers.append(MsDosCommandParser().get_parser()))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(parsers), 8)
+        self.assertEqual(len(set(id(parser) for parser in parsers)), 1)
+        self.assertIs(parsers[0], MsDosCommandParser().get_parser())
@@ -0,0 +1,30 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import importlib.util
+import unittest
+from MsDosCommandParser import MsDosCommandParser
+
+class MsDosCmdParserStandaloneTest(unittest.TestCase):
+
+    inputfile_text = """
+SET MY_VARIABLE=%~dp0
+IF "%MY_VARIABLE%"=="" (
+    echo TEST > out.txt
+)
+"""
+
+    # ------------------------------------------------------------------------
+    def test_standalone_falls_back_when_missing(self):
+        transpiler = MsDosCommandParser(standalone=True)
+        transpiler.standalone_module = 'msdos_parser_standalone_missing'
+        parser = transpiler.build_parser()
+        expected = MsDosCommandParser().get_parser().parse(self.inputfile_text)
+        self.assertEqual(parser.parse(self.inputfile_text).pretty(), expected.pretty())
+
+    # ------------------------------------------------------------------------
+    @unittest.skipUnless(importlib.util.find_spec(MsDosCommandParser.standalone_module),
+                         "run build_standalone.py to generate the standalone parser")
+    def test_standalone_same_tree(self):
+        parser = MsDosCommandParser(standalone=True).build_parser()
+        expected = MsDosCommandParser().get_parser().parse(self.inputfile_text)
+        self.assertEqual(parser.parse(self.inputfile_text).pretty(), expected.pretty())
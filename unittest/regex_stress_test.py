@@ -0,0 +1,73 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import time
+import unittest
+from benchmark.regex_stress import stress_terminals
+from MsDosCommandParser import MsDosCommandParser
+
+# Longest command line of cmd.exe
+MAX_LINE_LENGTH = 8191
+
+class MsDosCmdRegexStressTest(unittest.TestCase):
+
+    # CPU time budget per character to match one terminal against a pathological input.
+    # Linear terminals take a few microseconds per character; a super-linear one takes seconds on MAX_LINE_LENGTH.
+    match_budget_per_char = 100e-6
+    # Largest growth exponent of the match time from a quarter of MAX_LINE_LENGTH to MAX_LINE_LENGTH:
+    # about 1 for a linear terminal, 2 for a quadratic one, even when it stays within the budget.
+    max_growth_exponent = 1.5
+    # Matches shorter than this on MAX_LINE_LENGTH are too short for their growth to be measured
+    min_growth_timing = 1e-3
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+
+    # ------------------------------------------------------------------------
+    def test_terminals_are_linear(self):
+        # process_time does not count the other tests running in parallel
+        results = stress_terminals((MAX_LINE_LENGTH // 4, MAX_LINE_LENGTH), parser=self.parser, clock=time.process_time)
+        budget = self.match_budget_per_char * MAX_LINE_LENGTH
+        slow = ['%s on %s: %.3f s' % (result['terminal'], result['input'], result['timings'][-1])
+                for result in results if result['timings'][-1] > budget]
+        self.assertEqual([], slow)
+        superlinear = ['%s on %s: exponent %.2f' % (result['terminal'], result['input'], result['exponent'])
+                       for result in results
+                       if result['timings'][-1] > self.min_growth_timing and result['exponent'] > self.max_growth_exponent]
+        self.assertEqual([], superlinear)
+
+    # ------------------------------------------------------------------------
+    def test_unclosed_parentheses_in_group(self):
+        inputfile_text = "(\n    echo %s\n)\n" % ('(' * MAX_LINE_LENGTH)
+        start = time.process_time()
+        tree = self.parser.parse(inputfile_text)
+        self.assertLess(time.process_time() - start, 1.0)
+        self.assertEqual('(' * MAX_LINE_LENGTH, next(tree.find_data('command_echo')).children[-1])
+
+    # ------------------------------------------------------------------------
+    def test_deeply_nested_parentheses(self):
+        tree = self.parser.parse("IF 1==1 (\n    echo (((((((a)))))))\n)\n")
+        self.assertEqual('(((((((a)))))))', next(tree.find_data('command_echo')).children[-1])
+        nested = '(' * 200 + 'a b' + ')' * 200
+        tree = self.parser.parse("(\n    echo %s & echo c\n)\n" % nested)
+        self.assertEqual([nested + ' ', 'c'], [command.children[-1] for command in tree.iter_subtrees_topdown() if command.data == 'command_echo'])
+        tree = self.parser.parse("echo %s\n" % nested)
+        self.assertEqual(nested, next(tree.find_data('command_echo')).children[-1])
+
+    # ------------------------------------------------------------------------
+    def test_unclosed_parentheses_before_operator(self):
+        tree = self.parser.parse("(\n    echo :( (a) & echo b >nul\n)\n")
+        self.assertEqual([':( (a) ', 'b '], [command.children[-1] for command in tree.iter_subtrees_topdown() if command.data == 'command_echo'])
+
+    # ------------------------------------------------------------------------
+    def test_unclosed_quotes_in_for(self):
+        inputfile_text = 'FOR /F "%s %%%%i IN (a) DO echo %%%%i\n' % ('a' * MAX_LINE_LENGTH)
+        start = time.process_time()
+        try:
+            self.parser.parse(inputfile_text)
+        except Exception:
+            pass  # Syntax error
+        self.assertLess(time.process_time() - start, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
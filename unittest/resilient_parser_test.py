@@ -0,0 +1,89 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from MsDosAst import ErrorLine
+from MsDosCommandParser import MsDosCommandParser
+from MsDosResilientParser import ResilientParser
+
+class MsDosCmdResilientParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser(error_recovery=True).get_parser()
+        self.resilient_parser = ResilientParser(self.parser)
+
+    def get_error_lines(self, tree):
+        return [(str(token), token.line, token.column, token.start_pos, token.end_pos)
+                for token in (error_line.children[0] for error_line in tree.find_data('error_line'))]
+
+    # ------------------------------------------------------------------------
+    def test_valid_script(self):
+        inputfile_text = "@ECHO OFF\nSET A=1\nIF \"%A%\"==\"1\" (\n    echo one\n)\n"
+        self.assertEqual(self.parser.parse(inputfile_text), self.resilient_parser.parse(inputfile_text))
+
+    # ------------------------------------------------------------------------
+    def test_invalid_lines(self):
+        inputfile_text = "echo a\nIF\nSET A=1\n  CALL :\necho last\n)"
+        tree = self.resilient_parser.parse(inputfile_text)
+        self.assertEqual([('IF', 2, 1, 7, 9), ('CALL :', 4, 3, 20, 26), (')', 6, 1, 37, 38)],
+                         self.get_error_lines(tree))
+        self.assertEqual(['command_echo', 'error_line', 'command_set', 'error_line', 'command_echo', 'error_line'],
+                         [child.data for child in tree.children if hasattr(child, 'data')])
+        # The statements after an error keep their positions
+        echo = list(tree.find_data('command_echo'))[-1]
+        self.assertEqual((5, 1, 27), (echo.children[0].line, echo.children[0].column, echo.children[0].start_pos))
+
+    # ------------------------------------------------------------------------
+    def test_invalid_line_in_group(self):
+        inputfile_text = "IF x==y (\r\n    echo ok\r\n    GOTO\r\n) ELSE (\r\n    echo ng\r\n)\r\necho next\r\n"
+        tree = self.resilient_parser.parse(inputfile_text)
+        self.assertEqual([('IF x==y (\r\n    echo ok\r\n    GOTO\r\n) ELSE (\r\n    echo ng\r\n)', 1, 1, 0, 58)],
+                         self.get_error_lines(tree))
+        self.assertEqual('next', list(tree.find_data('command_echo'))[-1].children[-1])
+
+    # ------------------------------------------------------------------------
+    def test_unclosed_group(self):
+        inputfile_text = "echo a\n(\n    echo b\n"
+        tree = self.resilient_parser.parse(inputfile_text)
+        # Without the closing parenthesis, the statement is skipped up to the line of the error (the end)
+        self.assertEqual([('(\n    echo b', 2, 1, 7, 19)], self.get_error_lines(tree))
+
+    # ------------------------------------------------------------------------
+    def test_ast(self):
+        parser = ResilientParser(MsDosCommandParser(ast=True, error_recovery=True).get_parser())
+        program = parser.parse("echo a\n)\necho b\n")
+        self.assertEqual(ErrorLine(')', 2, 1), program.statements[1])
+        self.assertEqual(3, len(program.statements))
+
+    # ------------------------------------------------------------------------
+    def test_error_line_in_open_group(self):
+        # The parser stack is unwound to a state that can shift the error_line (not one that only reduces on it)
+        tree = self.resilient_parser.parse(')\n(&|:L\r\n \n|')
+        self.assertEqual([(')', 1, 1, 0, 1), ('(&|:L\r\n \n|', 2, 1, 2, 12)], self.get_error_lines(tree))
+        tree = self.resilient_parser.parse('ELSE |@(xSET A=1\n\r\n')
+        self.assertEqual([('ELSE |@(xSET A=1\n', 1, 1, 0, 17)], self.get_error_lines(tree))
+        tree = self.resilient_parser.parse('(|(IF a==b \r\n\nx')
+        self.assertEqual(['error_line'], [child.data for child in tree.children if hasattr(child, 'data')])
+
+    # ------------------------------------------------------------------------
+    def test_error_recovery_option(self):
+        with self.assertRaises(ValueError):
+            ResilientParser(MsDosCommandParser().get_parser())
+        with self.assertRaises(ValueError):
+            MsDosCommandParser(standalone=True, error_recovery=True)
+        # Only the parsers with error_recovery expect an ERROR_LINE in their syntax errors
+        for parser in (MsDosCommandParser().get_parser(), self.parser):
+            with self.assertRaises(Exception) as context:
+                parser.parse("echo a\n)\n")
+            self.assertEqual(parser is self.parser, 'ERROR_LINE' in str(context.exception))
+        inputfile_text = "@ECHO OFF\nSET A=1\nIF \"%A%\"==\"1\" (\n    echo one\n)\n"
+        self.assertEqual(MsDosCommandParser().get_parser().parse(inputfile_text), self.parser.parse(inputfile_text))
+
+    # ------------------------------------------------------------------------
+    def test_nothing_to_skip(self):
+        with self.assertRaises(Exception) as context:
+            self.resilient_parser.parse("")
+        self.assertIn('Unexpected', type(context.exception).__name__)
+
+if __name__ == '__main__':
+    unittest.main()
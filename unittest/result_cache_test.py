@@ -0,0 +1,108 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+import MsDosResultCache
+from MsDosCommandParser import MsDosCommandParser
+from MsDosResultCache import ParseResultCache
+
+class MsDosCmdResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    # ------------------------------------------------------------------------
+    def test_miss_then_hit(self):
+        inputfile_text = """
+SET MY_VARIABLE=%~dp0
+echo TEST
+"""
+        cache = ParseResultCache(self.cache_dir)
+        tree1 = cache.parse(inputfile_text)
+        tree2 = ParseResultCache(self.cache_dir).parse(inputfile_text)
+        self.assertEqual({'hits': 0, 'misses': 1, 'evictions': 0}, cache.cache_info())
+        self.assertEqual(MsDosCommandParser().get_parser().parse(inputfile_text), tree2)
+        self.assertEqual(tree1, tree2)
+
+    # ------------------------------------------------------------------------
+    def test_key_depends_on_mode(self):
+        cache = ParseResultCache(self.cache_dir)
+        ast_cache = ParseResultCache(self.cache_dir, MsDosCommandParser(ast=True))
+        self.assertNotEqual(cache.get_key("echo TEST\n"), ast_cache.get_key("echo TEST\n"))
+        # The comment fast path accepts other scripts, and the profile parser records the parses
+        for options in ({'comment_fast_path': True}, {'profile': True}, {'error_recovery': True}):
+            other_cache = ParseResultCache(self.cache_dir, MsDosCommandParser(**options))
+            self.assertNotEqual(cache.get_key("echo TEST\n"), other_cache.get_key("echo TEST\n"))
+        self.assertNotEqual(cache.get_key("echo TEST\n"), cache.get_key("echo TEST2\n"))
+        self.assertEqual('Echo', type(ast_cache.parse("echo TEST\n").statements[0]).__name__)
+
+    # ------------------------------------------------------------------------
+    def test_stale_grammar_is_purged(self):
+        stale_dir = os.path.join(self.cache_dir, '0' * 64)
+        os.makedirs(os.path.join(stale_dir, '00'))
+        with open(os.path.join(stale_dir, MsDosResultCache.MARKER_NAME), 'w', encoding='utf-8') as a_file:
+            a_file.write('0' * 64)
+        # Directories without the marker were not written by the cache
+        other_dir = os.path.join(self.cache_dir, '1' * 64)
+        os.makedirs(other_dir)
+        cache = ParseResultCache(self.cache_dir)
+        self.assertFalse(os.path.exists(stale_dir))
+        self.assertTrue(os.path.isdir(other_dir))
+        self.assertEqual(64, len(cache.fingerprint))
+
+        cache.clear()
+        self.assertTrue(os.path.isfile(os.path.join(cache.results_dir, MsDosResultCache.MARKER_NAME)))
+
+    # ------------------------------------------------------------------------
+    def test_fingerprint_depends_on_builders(self):
+        cache = ParseResultCache(self.cache_dir)
+        cache.parse("echo TEST\n")
+        with mock.patch('MsDosResultCache.get_builder_digest', return_value='0' * 64):
+            new_cache = ParseResultCache(self.cache_dir)
+        self.assertNotEqual(cache.fingerprint, new_cache.fingerprint)
+        self.assertFalse(os.path.exists(cache.results_dir))
+        self.assertIsNone(new_cache.get(new_cache.get_key("echo TEST\n")))
+
+    # ------------------------------------------------------------------------
+    def test_lru_eviction(self):
+        cache = ParseResultCache(self.cache_dir)
+        cache.parse("echo 1\n")
+        cache.parse("echo 2\n")
+        cache.parse("echo 3\n")
+        # Make "echo 1" the most recently used
+        old = time.time() - 100
+        for _, path, _ in cache.list_files():
+            os.utime(path, (old, old))
+        cache.parse("echo 1\n")
+        size = max(size for _, _, size in cache.list_files())
+        cache.max_bytes = size * 2
+        cache.evict()
+        self.assertEqual(2, cache.cache_info()['evictions'])
+        self.assertEqual([cache.get_path(cache.get_key("echo 1\n"))], [path for _, path, _ in cache.list_files()])
+
+    # ------------------------------------------------------------------------
+    def test_overwrite_keeps_total_bytes(self):
+        cache = ParseResultCache(self.cache_dir)
+        cache.parse("echo 1\n")
+        key = cache.get_key("echo 1\n")
+        result = cache.get(key)
+        for _ in range(3):
+            cache.put(key, result)
+        self.assertEqual(sum(size for _, _, size in cache.list_files()), cache.total_bytes)
+
+    # ------------------------------------------------------------------------
+    def test_broken_file_is_a_miss(self):
+        cache = ParseResultCache(self.cache_dir)
+        cache.parse("echo TEST\n")
+        with open(cache.get_path(cache.get_key("echo TEST\n")), 'wb') as a_file:
+            a_file.write(b'broken')
+        self.assertEqual('program', cache.parse("echo TEST\n").data)
+        self.assertEqual(0, cache.cache_info()['hits'])
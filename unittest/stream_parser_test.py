@@ -0,0 +1,142 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import io
+import unittest
+from lark import Token
+from lark.exceptions import UnexpectedInput
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+from MsDosStreamParser import LineMemo, parse_stream
+
+def token_positions(tree):
+    return [(token.type, token.line, token.column, token.end_line, token.start_pos, token.end_pos)
+            for token in tree.scan_values(lambda value: isinstance(value, Token))]
+
+class MsDosCmdStreamParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+
+    def full_parse(self, inputfile_text):
+        return [child for child in self.parser.parse(inputfile_text).children
+                if not isinstance(child, Token) and child.data != 'emptyline']
+
+    def stream_parse(self, inputfile_text):
+        return list(parse_stream(io.StringIO(inputfile_text), self.parser))
+
+    def assertSameStatements(self, inputfile_text):
+        expected = self.full_parse(inputfile_text)
+        statements = self.stream_parse(inputfile_text)
+        self.assertEqual(expected, statements)
+        self.assertEqual([token_positions(tree) for tree in expected], [token_positions(tree) for tree in statements])
+
+    # ------------------------------------------------------------------------
+    def test_statements(self):
+        inputfile_text = """@ECHO OFF
+SET VAR1=123
+
+:LABEL1
+IF "%FLG%"=="1" (
+    echo TEST (1)
+    FOR %%i IN (a b c) DO (
+        echo %%i
+    )
+) ELSE (
+    echo NG
+) > out.txt
+> SAMPLE.CONFIG  echo set key1 32767
+REM comment (
+echo END
+"""
+        statements = self.stream_parse(inputfile_text)
+        self.assertEqual(['command_echo', 'command_set', 'label', 'statement_if', 'command_oneline', 'command_rem', 'command_echo'],
+                         [statement.data for statement in statements])
+        self.assertSameStatements(inputfile_text)
+
+    # ------------------------------------------------------------------------
+    def test_rem_caret_continuation(self):
+        inputfile_text = """REM first ^
+second (^
+third
+echo END
+"""
+        statements = self.stream_parse(inputfile_text)
+        self.assertEqual(['command_rem', 'command_echo'], [statement.data for statement in statements])
+        self.assertEqual(4, statements[1].children[0].line)
+        self.assertSameStatements(inputfile_text)
+
+    # ------------------------------------------------------------------------
+    def test_double_colon_comment(self):
+        inputfile_text = """:: comment (
+echo END
+"""
+        statements = self.stream_parse(inputfile_text)
+        self.assertEqual(['command_rem', 'command_echo'], [statement.data for statement in statements])
+        self.assertSameStatements(inputfile_text)
+
+    # ------------------------------------------------------------------------
+    def test_synthetic(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                self.assertSameStatements(generate_script(500, seed))
+
+    # ------------------------------------------------------------------------
+    def test_syntax_error_line(self):
+        inputfile_text = """echo a
+echo b
+IF "a"=="b" (
+    echo c
+)
+) echo bad
+"""
+        with self.assertRaises(UnexpectedInput) as context:
+            self.stream_parse(inputfile_text)
+        self.assertEqual(6, context.exception.line)
+
+    # ------------------------------------------------------------------------
+    def test_line_memo(self):
+        inputfile_text = """ECHO ---------- TEST TEXT ---------- >> %OUTPUT_LOG%
+call %BIN_PATH%\\MyProcess.cmd
+ECHO ---------- TEST TEXT ---------- >> %OUTPUT_LOG%
+IF "%FLG%"=="1" (
+    call %BIN_PATH%\\MyProcess.cmd
+)
+call %BIN_PATH%\\MyProcess.cmd
+ECHO ---------- TEST TEXT ---------- >> %OUTPUT_LOG%
+"""
+        memo = LineMemo()
+        statements = list(parse_stream(io.StringIO(inputfile_text), self.parser, memo))
+        expected = self.full_parse(inputfile_text)
+        self.assertEqual(expected, statements)
+        self.assertEqual([token_positions(tree) for tree in expected], [token_positions(tree) for tree in statements])
+        # The first line and the IF block are not looked up
+        self.assertEqual({'hits': 2, 'misses': 2, 'size': 2, 'max_size': 4096}, memo.cache_info())
+        self.assertEqual(0.5, memo.hit_rate())
+        self.assertIsNot(statements[2], statements[5])
+
+    # ------------------------------------------------------------------------
+    def test_line_memo_lru(self):
+        memo = LineMemo(max_size=2)
+        inputfile_text = "echo 0\necho 1\necho 2\necho 3\necho 1\necho 3\n"
+        statements = list(parse_stream(io.StringIO(inputfile_text), self.parser, memo))
+        self.assertEqual(self.full_parse(inputfile_text), statements)
+        self.assertEqual({'hits': 1, 'misses': 4, 'size': 2, 'max_size': 2}, memo.cache_info())
+        self.assertEqual(["echo 1\n", "echo 3\n"], list(memo.entries))
+
+    # ------------------------------------------------------------------------
+    def test_line_memo_ast(self):
+        parser = MsDosCommandParser(ast=True).get_parser()
+        memo = LineMemo()
+        inputfile_text = "SET A=1\nSET A=1\nSET A=1\nSET A=1\n"
+        statements = list(parse_stream(io.StringIO(inputfile_text), parser, memo))
+        self.assertEqual({'hits': 2, 'misses': 1, 'size': 1, 'max_size': 4096}, memo.cache_info())
+        self.assertEqual(parser.parse(inputfile_text).statements, statements)
+        # Changing one occurrence changes neither the others nor the stored one
+        statements[1].value = '2'
+        self.assertEqual(['1', '2', '1', '1'], [statement.value for statement in statements])
+        statements = list(parse_stream(io.StringIO("SET A=1\nSET A=1\n"), parser, memo))
+        self.assertEqual(['1', '1'], [statement.value for statement in statements])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from benchmark.synthetic import generate_script
+from MsDosCommandParser import MsDosCommandParser
+
+class MsDosCmdSyntheticCorpusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        transpiler = MsDosCommandParser()
+        self.parser = transpiler.get_parser()
+
+    # ------------------------------------------------------------------------
+    def test_generate_script_is_deterministic(self):
+        self.assertEqual(generate_script(300, seed=1), generate_script(300, seed=1))
+        self.assertNotEqual(generate_script(300, seed=1), generate_script(300, seed=2))
+
+    # ------------------------------------------------------------------------
+    def test_generate_script_size(self):
+        script = generate_script(1000, seed=3)
+        self.assertGreaterEqual(script.count("\n"), 1000)
+        self.assertLess(script.count("\n"), 1100)
+
+    # ------------------------------------------------------------------------
+    def test_generate_script_uses_every_construct(self):
+        rules = set()
+        for seed in range(5):
+            tree = self.parser.parse(generate_script(1000, seed=seed))
+            rules |= set(subtree.data for subtree in tree.iter_subtrees())
+        expected_rules = {
+            'program', 'subprogram', 'emptyline', 'label', 'group', 'command_line', 'subcommand_line',
+            'pipeline', 'subpipeline', 'command_oneline', 'subcommand_oneline',
+            'redirect_stdout', 'redirect_stderr',
+            'command_rem', 'command_set', 'command_set_expr', 'command_setlocal', 'command_echo',
+            'command_call_label', 'command_call_file', 'command_cd', 'command_goto', 'command_exe',
+            'statement_if', 'statement_else',
+            'test_comp', 'test_not_comp', 'test_exist', 'test_not_exist', 'test_defined', 'test_not_defined',
+            'test_errorlevel', 'test_not_errorlevel',
+            'statement_for_f', 'statement_for_r', 'statement_for_l', 'statement_for_d', 'statement_for_none',
+        }
+        self.assertEqual(expected_rules - rules, set())
@@ -0,0 +1,43 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from benchmark.test_runner import find_test_modules, format_report, run_test_module
+
+class MsDosCmdTestRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+
+    # ------------------------------------------------------------------------
+    def test_find_test_modules(self):
+        modules = find_test_modules('grammer_*_test.py')
+        self.assertIn('grammer_if_test', modules)
+        self.assertNotIn('grammer_test_case', modules)
+        self.assertEqual(modules, sorted(modules))
+
+    # ------------------------------------------------------------------------
+    def test_run_test_module(self):
+        result = run_test_module('grammer_goto_test')
+        self.assertEqual(result['tests'], 4)
+        self.assertEqual(result['failures'] + result['errors'], [])
+        self.assertEqual(sorted(result['parse_times']), sorted(result['test_times']))
+        for test_id, seconds in result['parse_times'].items():
+            self.assertTrue(test_id.startswith('grammer_goto_test.MsDosCmdGrammerTest.test_'))
+            self.assertGreater(seconds, 0.0)
+            self.assertLessEqual(seconds, result['test_times'][test_id])
+
+    # ------------------------------------------------------------------------
+    def test_format_report(self):
+        results = [
+            {'module': 'a_test', 'tests': 2, 'failures': [], 'errors': [], 'skipped': 0,
+             'test_times': {'a_test.T.test_slow': 0.004, 'a_test.T.test_fast': 0.002},
+             'parse_times': {'a_test.T.test_slow': 0.003, 'a_test.T.test_fast': 0.001}},
+            {'module': 'b_test', 'tests': 1, 'failures': [('b_test.T.test_b', 'AssertionError')], 'errors': [],
+             'skipped': 1, 'test_times': {'b_test.T.test_b': 0.001}, 'parse_times': {}},
+        ]
+        lines = format_report(results, top=1).split('\n')
+        self.assertEqual(lines[1], 'FAIL: b_test.T.test_b')
+        self.assertEqual(lines[3], 'AssertionError')
+        self.assertEqual(lines[5].split(), ['a_test.T.test_slow', '3.00', '4.00'])
+        self.assertEqual(lines[6], '')
+        self.assertEqual(lines[7], 'Ran 3 tests in 2 modules: FAILED (1) (parse 0.00 s in 2 tests), 1 skipped')
@@ -0,0 +1,56 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import io
+import json
+import re
+import unittest
+from benchmark.corpus import load_unittest_snippets
+from MsDosCommandParser import MsDosCommandParser
+from MsDosTreeWriter import format_pretty, tree_to_json, tree_to_pretty
+
+def format_lark_pretty_print(pretty_print):
+    # Former helper of the grammar tests, which removed the blank lines from Tree.pretty()
+    return '\n'.join(line for line in pretty_print.split("\n") if not re.match(r'^\s*$', line))
+
+class MsDosCmdTreeWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        transpiler = MsDosCommandParser()
+        self.parser = transpiler.get_parser()
+
+    # ------------------------------------------------------------------------
+    def test_tree_to_pretty(self):
+        with open('./sample/input.cmd', 'r', encoding='utf-8') as a_file:
+            tree = self.parser.parse(a_file.read())
+        out = io.StringIO()
+        tree_to_pretty(tree, out)
+        self.assertEqual(out.getvalue(), format_lark_pretty_print(tree.pretty()) + "\n")
+
+    # ------------------------------------------------------------------------
+    def test_format_pretty_same_as_filtered_pretty(self):
+        inputfile_texts = [
+            "\n\n\nREM line1 ^\n  line2\n\n\t\n",
+            "echo\u3000TEST\r\n\r\nSET A=1\r\n",
+        ] + load_unittest_snippets()
+        for inputfile_text in inputfile_texts:
+            tree = self.parser.parse(inputfile_text)
+            self.assertEqual(format_pretty(tree), format_lark_pretty_print(tree.pretty()))
+
+    # ------------------------------------------------------------------------
+    def test_tree_to_json(self):
+        inputfile_text = """
+GOTO L_TEST123
+"""
+        out = io.StringIO()
+        tree_to_json(self.parser.parse(inputfile_text), out)
+        expected_json = {'rule': 'program', 'children': [
+            {'token': 'WS', 'value': '\n', 'line': 1, 'column': 1},
+            {'rule': 'command_goto', 'children': [
+                {'token': 'GOTO', 'value': 'GOTO', 'line': 2, 'column': 1},
+                {'token': 'WS_INLINE', 'value': ' ', 'line': 2, 'column': 5},
+                {'token': 'LABEL', 'value': 'L_TEST123', 'line': 2, 'column': 6},
+            ]},
+            {'token': 'NL', 'value': '\n', 'line': 2, 'column': 15},
+        ]}
+        self.assertEqual(json.loads(out.getvalue()), expected_json)
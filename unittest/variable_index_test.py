@@ -0,0 +1,76 @@
+# python -m unittest discover ./unittest "*_test.py"
+
+import unittest
+from MsDosCommandParser import MsDosCommandParser
+from MsDosVariableIndex import build_variable_index
+
+class MsDosCmdVariableIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.parser = MsDosCommandParser().get_parser()
+
+    # ------------------------------------------------------------------------
+    def test_definitions(self):
+        inputfile_text = """SET SHARE_DIR_ROOT=\\\\server\\share
+set "Quoted=a b"
+SET /P ANSWER=Continue?
+SET /A COUNT+=1, Total=COUNT*2
+(
+    set share_dir_root=%SHARE_DIR_ROOT%\\sub
+)
+"""
+        index = build_variable_index(self.parser.parse(inputfile_text))
+        self.assertEqual([(d.name, d.kind, d.value, d.line, d.column) for d in index.definitions_of('Share_Dir_Root')], [
+            ('SHARE_DIR_ROOT', 'set', '\\\\server\\share', 1, 5),
+            ('share_dir_root', 'set', '%SHARE_DIR_ROOT%\\sub', 6, 9),
+        ])
+        self.assertEqual([(d.name, d.value) for d in index.definitions_of('quoted')], [('Quoted', 'a b')])
+        self.assertEqual([(d.name, d.kind) for d in index.definitions_of('ANSWER')], [('ANSWER', 'set_p')])
+        self.assertEqual([(d.name, d.kind, d.column) for d in index.definitions_of('count')], [('COUNT', 'set_a', 8)])
+        self.assertEqual([(d.name, d.kind, d.column) for d in index.definitions_of('total')], [('Total', 'set_a', 18)])
+        self.assertEqual([(r.text, r.line, r.column) for r in index.references_to('count')], [('COUNT', 4, 24)])
+        self.assertEqual(index.unused(), ['answer', 'quoted', 'total'])
+
+    # ------------------------------------------------------------------------
+    def test_quoted_expressions(self):
+        inputfile_text = """SET /A "X=Y+1"
+SET /A "X+=1"
+SET /A "Z=X*2", "W-=Z"
+set /a "V=1" & echo %V%
+"""
+        index = build_variable_index(self.parser.parse(inputfile_text))
+        self.assertEqual([(d.name, d.key, d.kind, d.value, d.line, d.column) for d in index.definitions_of('x')], [
+            ('X', 'x', 'set_a', 'Y+1', 1, 9),
+            ('X', 'x', 'set_a', '1', 2, 9),
+        ])
+        self.assertEqual([(d.name, d.line, d.column) for d in index.definitions_of('z')], [('Z', 3, 9)])
+        self.assertEqual([(d.name, d.line, d.column) for d in index.definitions_of('w')], [('W', 3, 18)])
+        self.assertEqual([(r.text, r.line, r.column) for r in index.references_to('y')], [('Y', 1, 11)])
+        self.assertEqual([(r.text, r.line, r.column) for r in index.references_to('z')], [('Z', 3, 21)])
+        self.assertEqual([(r.text, r.line, r.column) for r in index.references_to('v')], [('%V%', 4, 21)])
+        self.assertEqual(index.references_to('echo'), [])
+        self.assertEqual(sorted(index.definitions), ['v', 'w', 'x', 'z'])
+        self.assertEqual(index.undefined(), ['y'])
+
+    # ------------------------------------------------------------------------
+    def test_references(self):
+        inputfile_text = """IF DEFINED LOG_DIR echo %LOG_DIR:~0,3% !log_dir! %%i %~dp0 %1 100%% > %LOG_DIR%\\out.txt
+IF /I "%MODE%"=="debug" copy %SRC:a=b%\\x.txt "%DST%"
+FOR /F "delims=" %%i IN (%LIST%) DO echo %%i
+%TOOLS%\\run.exe
+"""
+        index = build_variable_index(self.parser.parse(inputfile_text))
+        self.assertEqual([(r.name, r.text, r.line, r.column) for r in index.references_to('LOG_DIR')], [
+            ('LOG_DIR', 'LOG_DIR', 1, 12),
+            ('LOG_DIR', '%LOG_DIR:~0,3%', 1, 25),
+            ('log_dir', '!log_dir!', 1, 40),
+            ('LOG_DIR', '%LOG_DIR%', 1, 71),
+        ])
+        self.assertEqual([(r.text, r.line, r.column) for r in index.references_to('mode')], [('%MODE%', 2, 8)])
+        self.assertEqual([r.text for r in index.references_to('src')], ['%SRC:a=b%'])
+        self.assertEqual([r.text for r in index.references_to('dst')], ['%DST%'])
+        self.assertEqual([r.text for r in index.references_to('list')], ['%LIST%'])
+        self.assertEqual([r.text for r in index.references_to('tools')], ['%TOOLS%'])
+        self.assertEqual(index.undefined(), ['dst', 'list', 'log_dir', 'mode', 'src', 'tools'])
+        self.assertEqual(index.definitions, {})